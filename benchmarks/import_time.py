@@ -0,0 +1,131 @@
+"""Measure how long ``import proposal_generator`` takes and guard against regressions.
+
+Runs ``python -X importtime`` several times in fresh interpreters and reports
+the median cumulative import time and the slowest modules. Exits with status 1
+if a module that should be imported lazily shows up at import time, if more
+modules are imported than in the stored baseline (when it was recorded with
+the same Python version), or if the import became slower relative to a
+reference import of ``REFERENCE_MODULE`` measured in the same run. Absolute
+times vary too much between machines and runs to be compared directly.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_time_baseline.json')
+
+# Third-party packages that must only load inside the code paths that use them
+DEFERRED_PACKAGES = [
+    'aiohttp', 'bs4', 'html2text', 'newsapi', 'numpy', 'PIL', 'pytrends', 'reportlab',
+    'requests', 'selenium', 'selenium_stealth', 'textblob', 'whois', 'yfinance'
+]
+# Standard library import timed alongside to calibrate for the machine's speed
+REFERENCE_MODULE = 'asyncio'
+
+
+def measure_once(module):
+    """Import a module in a fresh interpreter and parse its ``-X importtime`` report."""
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'src'))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, check=True
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(module, runs, reference=REFERENCE_MODULE):
+    """Return the median cumulative import time, its median ratio to ``reference`` and the modules seen.
+
+    The two imports alternate, so both see the same load on the machine.
+    """
+    totals = []
+    ratios = []
+    modules = {}
+    for _ in range(runs):
+        modules = measure_once(module)
+        reference_us = measure_once(reference)[reference][1]
+        totals.append(modules[module][1])
+        ratios.append(modules[module][1] / reference_us)
+    return statistics.median(totals), statistics.median(ratios), modules
+
+
+def python_version():
+    return f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time benchmark for proposal_generator')
+    parser.add_argument('--module', default='proposal_generator', help='Module to import')
+    parser.add_argument('--runs', type=int, default=7, help='Number of fresh interpreters to measure')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed slowdown relative to the reference import, as a fraction (default: 0.5)')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest modules to list')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this measurement as the new baseline')
+    args = parser.parse_args()
+
+    median_us, ratio, modules = measure(args.module, args.runs)
+    print(f"import {args.module}: {median_us / 1000:.1f} ms (median of {args.runs} runs, {len(modules)} modules), "
+          f"{ratio:.2f}x import {REFERENCE_MODULE}")
+    print(f"\n{'Module':<50}{'self (ms)':>12}{'cumulative (ms)':>18}")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"{name:<50}{self_us / 1000:>12.1f}{cumulative_us / 1000:>18.1f}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                'module': args.module,
+                'python': python_version(),
+                'reference': REFERENCE_MODULE,
+                'ratio': round(ratio, 3),
+                'modules': len(modules)
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+        return 0
+
+    failures = []
+    eager = sorted(
+        name for name in modules
+        if name.split('.')[0] in DEFERRED_PACKAGES
+    )
+    if eager:
+        failures.append(f"Deferred packages imported eagerly: {', '.join(eager[:10])}")
+
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        limit = baseline['ratio'] * (1 + args.tolerance)
+        print(f"\nBaseline: {baseline['ratio']:.2f}x import {baseline['reference']}, limit: {limit:.2f}x")
+        if ratio > limit:
+            failures.append(f"Import time regressed: {ratio:.2f}x > {limit:.2f}x import {baseline['reference']}")
+        # Which standard library modules load differs between Python versions
+        if baseline['python'] == python_version():
+            print(f"Baseline: {baseline['modules']} modules")
+            if len(modules) > baseline['modules']:
+                failures.append(f"More modules imported: {len(modules)} > {baseline['modules']}")
+        else:
+            print(f"Baseline was recorded with Python {baseline['python']}; module count not compared")
+    else:
+        print(f"\nNo baseline at {BASELINE_PATH}; run with --update-baseline to create one")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
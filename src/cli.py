@@ -1,7 +1,13 @@
 import argparse
+import concurrent.futures
 import json
+import logging
 import os
+import re
+import time
 from proposal_generator.generator import ProposalGenerator
+from proposal_generator.components.analysis_cache import AnalysisCache, default_cache_path
+from proposal_generator.components import har
 
 def get_boolean_input(prompt):
     while True:
@@ -12,6 +18,183 @@ def get_boolean_input(prompt):
             return False
         print("Please enter 'y' or 'n'")
 
+# Generator settings and instance for each batch worker process
+_batch_settings = {}
+_batch_generator = None
+
+def _init_batch_worker(use_cache, cache_path):
+    logging.basicConfig(level=logging.WARNING)
+    _batch_settings.update(use_cache=use_cache, cache_path=cache_path)
+
+def _get_batch_generator():
+    """Create the worker's generator on first use so a setup failure fails briefs, not the pool."""
+    global _batch_generator
+    if _batch_generator is None:
+        _batch_generator = ProposalGenerator(**_batch_settings)
+    return _batch_generator
+
+def _write_atomic(path, write):
+    """Write a file through a temporary path so a crash never leaves a partial output."""
+    tmp_path = path + '.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def _run_batch_brief(job):
+    """Generate the markdown/PDF pair for one brief inside a worker process."""
+    brief_id, client_brief, md_path, pdf_path, deadline = job
+    start = time.perf_counter()
+    try:
+        generator = _get_batch_generator()
+        proposal = generator.create_proposal(client_brief, deadline=deadline)
+        stage_timings = dict(generator.last_stage_timings)
+        
+        # The markdown marks the brief as done, so it is written last
+        pdf_error = None
+        try:
+            _write_atomic(pdf_path, lambda path: generator.generate_pdf(proposal, path))
+        except Exception as e:
+            pdf_error = str(e)
+        
+        def write_markdown(path):
+            with open(path, 'w') as f:
+                f.write(proposal)
+        _write_atomic(md_path, write_markdown)
+        
+        return {'id': brief_id, 'ok': True, 'elapsed': time.perf_counter() - start,
+                'stage_timings': stage_timings, 'cut_stages': sorted(generator.last_cut_stages),
+                'pdf_error': pdf_error}
+    except Exception as e:
+        return {'id': brief_id, 'ok': False, 'elapsed': time.perf_counter() - start, 'error': str(e)}
+
+def _brief_id(client_brief, line_number):
+    raw_id = client_brief.get('id') or f"{line_number:05d}-{client_brief.get('client_name', 'client')}"
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', str(raw_id)).strip('-.') or f"{line_number:05d}"
+
+def _load_batch(path):
+    """Read briefs from a JSON Lines file, skipping blank and malformed lines."""
+    briefs = []
+    with open(path, 'r') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                client_brief = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_number}: invalid JSON ({e})")
+                continue
+            briefs.append((_brief_id(client_brief, line_number), client_brief))
+    return briefs
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+def _print_batch_summary(results, skipped, elapsed):
+    succeeded = [r for r in results if r['ok']]
+    failed = [r for r in results if not r['ok']]
+    minutes = elapsed / 60
+    rate = len(succeeded) / minutes if minutes else 0.0
+    print(f"\nBatch finished in {minutes:.1f} min: {len(succeeded)} generated, "
+          f"{skipped} skipped, {len(failed)} failed ({rate:.2f} proposals/min)")
+    
+    cut = [r for r in succeeded if r['cut_stages']]
+    if cut:
+        print(f"{len(cut)} proposals had stages cut by the deadline")
+    
+    stage_samples = {}
+    for result in succeeded:
+        for stage, seconds in result['stage_timings'].items():
+            stage_samples.setdefault(stage, []).append(seconds)
+        stage_samples.setdefault('total', []).append(result['elapsed'])
+    
+    if stage_samples:
+        print(f"\n{'Stage':<24}{'p50 (s)':>10}{'p95 (s)':>10}")
+        # Analysis stages first, then rendering and the end-to-end latency
+        order = sorted(set(stage_samples) - {'render', 'total'}) + ['render', 'total']
+        for stage in order:
+            samples = stage_samples.get(stage)
+            if not samples:
+                continue
+            print(f"{stage:<24}{_percentile(samples, 50):>10.2f}{_percentile(samples, 95):>10.2f}")
+    
+    for result in failed:
+        print(f"Failed {result['id']}: {result['error']}")
+
+def _print_har_analysis(analysis):
+    print(f"{analysis['requests']} requests, {analysis['total_bytes'] / 1024:.0f} KB transferred")
+    if not analysis['requests']:
+        return
+    
+    critical_path = analysis['critical_path']
+    print(f"\nCritical path: {critical_path['depth']} requests, {critical_path['length_ms'] / 1000:.2f}s")
+    for url in critical_path['requests']:
+        print(f"  {url}")
+    
+    blocking = analysis['render_blocking']
+    print(f"\nRender-blocking requests: {blocking['requests']}")
+    for chain in blocking['chains']:
+        print(f"  {chain['length_ms'] / 1000:.2f}s: {' -> '.join(chain['requests'])}")
+    
+    for title, key in (('Uncompressed', 'uncompressed'), ('Unminified', 'unminified')):
+        if analysis[key]:
+            print(f"\n{title} assets:")
+            for item in analysis[key]:
+                print(f"  {item['url']} ({item['bytes'] / 1024:.0f} KB)")
+    if analysis['cache_issues']:
+        print("\nCache header issues:")
+        for item in analysis['cache_issues']:
+            print(f"  {item['url']}: {item['reason']}")
+    
+    third_party = analysis['third_party']
+    print(f"\nThird parties: {third_party['requests']} requests, "
+          f"{third_party['bytes'] / 1024:.0f} KB ({third_party['share_of_bytes']:.0%} of bytes)")
+    for host, cost in third_party['hosts'].items():
+        print(f"  {host:<40}{cost['requests']:>5} requests{cost['bytes'] / 1024:>8.0f} KB{cost['time_ms'] / 1000:>8.2f}s")
+    
+    if analysis['recommendations']:
+        print("\nRecommendations:")
+        for recommendation in analysis['recommendations']:
+            print(f"- {recommendation}")
+
+def run_batch(args):
+    """Generate one proposal per brief in a JSON Lines file across a process pool.
+
+    Briefs whose markdown output already exists are skipped, so an interrupted
+    batch can be resumed by running the same command again.
+    """
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs, skipped = [], 0
+    for brief_id, client_brief in _load_batch(args.batch):
+        md_path = os.path.join(args.output_dir, f"{brief_id}.md")
+        pdf_path = os.path.join(args.output_dir, f"{brief_id}.pdf")
+        if os.path.exists(md_path):
+            skipped += 1
+            continue
+        jobs.append((brief_id, client_brief, md_path, pdf_path, args.deadline))
+    
+    print(f"Generating {len(jobs)} proposals with {args.workers} workers ({skipped} already done)")
+    start = time.perf_counter()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_batch_worker,
+        initargs=(not args.no_cache, args.cache_path)
+    ) as executor:
+        futures = [executor.submit(_run_batch_brief, job) for job in jobs]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            status = 'done' if result['ok'] else 'FAILED'
+            print(f"[{done}/{len(jobs)}] {result['id']}: {status} in {result['elapsed']:.1f}s")
+            if result.get('cut_stages'):
+                print(f"  Cut by the deadline: {', '.join(result['cut_stages'])}")
+            if result.get('pdf_error'):
+                print(f"  Could not generate PDF: {result['pdf_error']}")
+    
+    _print_batch_summary(results, skipped, time.perf_counter() - start)
+
 def main():
     parser = argparse.ArgumentParser(description='AI-Driven Proposal Generator')
     parser.add_argument(
@@ -33,9 +216,65 @@ def main():
         default='.',
         help='Directory to save the proposal and mockups'
     )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Run every analysis from scratch without reading or writing the analysis cache'
+    )
+    parser.add_argument(
+        '--purge-cache',
+        action='store_true',
+        help='Delete all cached analyses and exit'
+    )
+    parser.add_argument(
+        '--cache-path',
+        type=str,
+        default=None,
+        help=f'Location of the analysis cache (default: {default_cache_path()})'
+    )
+    parser.add_argument(
+        '--batch',
+        type=str,
+        help='Path to a JSON Lines file with one client brief per line; writes <id>.md and <id>.pdf per brief'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Number of worker processes for --batch (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        help='Time budget in seconds for each proposal; analyses that run out of time are cut and noted in the proposal'
+    )
+    parser.add_argument(
+        '--trace',
+        type=str,
+        help='Write a trace of the run to this file: JSON lines for .jsonl, otherwise Chrome trace-event JSON'
+    )
+    parser.add_argument(
+        '--analyze-har',
+        type=str,
+        metavar='PATH',
+        help='Analyze a saved HAR file (critical path, blocking chains, compression, caching, third parties) and exit'
+    )
     
     args = parser.parse_args()
     
+    if args.purge_cache:
+        removed = AnalysisCache(args.cache_path).purge()
+        print(f"Removed {removed} cached analyses")
+        return
+    
+    if args.analyze_har:
+        _print_har_analysis(har.analyze_har(har.load_har(args.analyze_har)))
+        return
+    
+    if args.batch:
+        run_batch(args)
+        return
+    
     if args.input:
         # Read client brief from JSON file
         with open(args.input, 'r') as f:
@@ -83,32 +322,30 @@ def main():
     
     print("\nGenerating proposal... This may take a few minutes.")
     
-    # Generate proposal
-    generator = ProposalGenerator(template_name=args.template)
-    result = generator.create_proposal(client_brief)
+    # Generate proposal, reporting each section as soon as it is ready
+    generator = ProposalGenerator(use_cache=not args.no_cache, cache_path=args.cache_path)
+    sections = {}
+    start = time.perf_counter()
+    for name, markdown in generator.stream_proposal(client_brief, deadline=args.deadline):
+        sections[name] = markdown
+        print(f"[{time.perf_counter() - start:6.1f}s] {name.replace('_', ' ').capitalize()} ready")
+    proposal = ProposalGenerator.assemble_proposal(sections)
+    
+    if args.trace:
+        generator.last_trace.export(args.trace)
+        print(f"Trace has been saved to {args.trace}")
     
     # Save the proposal to a file
     proposal_file = os.path.join(args.output_dir, "proposal.txt")
     with open(proposal_file, 'w') as f:
-        f.write(str(result.get('proposal', '')))
+        f.write(proposal)
     
     print(f"\nProposal has been generated and saved to {proposal_file}")
     
-    # Handle mockups if they were generated
-    mockups = result.get('mockups')
-    if mockups:
-        print("\nGenerated mockups:")
-        for page_name, mockup_path in mockups.items():
-            if os.path.exists(mockup_path):
-                target_path = os.path.join(args.output_dir, os.path.basename(mockup_path))
-                if mockup_path != target_path:
-                    os.rename(mockup_path, target_path)
-                print(f"- {page_name}: {target_path}")
-    
     # Generate PDF if possible
     try:
         pdf_file = os.path.join(args.output_dir, "proposal.pdf")
-        generator.generate_pdf(str(result.get('proposal', '')), pdf_file)
+        generator.generate_pdf(proposal, pdf_file)
         print(f"PDF version has been saved to {pdf_file}")
     except Exception as e:
         print(f"Could not generate PDF: {str(e)}")
@@ -0,0 +1,157 @@
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+# Seconds an entry stays fresh, per entry type
+DEFAULT_TTLS = {
+    'website': 24 * 3600,
+    'seo': 24 * 3600,
+    'competitor': 7 * 24 * 3600,
+    'market_trends': 24 * 3600,
+    'financial': 12 * 3600
+}
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_path() -> str:
+    """Cache location, overridable with the PROPOSAL_GENERATOR_CACHE environment variable."""
+    return os.getenv('PROPOSAL_GENERATOR_CACHE') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'proposal_generator', 'analysis_cache.sqlite3'
+    )
+
+
+class AnalysisCache:
+    """Persistent SQLite cache for analysis results.
+
+    Keys combine the entry type, the analyzer's cache version and the
+    analysis input, so bumping an analyzer's ``CACHE_VERSION`` invalidates
+    its old entries. Entries expire after a per-type TTL and the least
+    recently used ones are evicted once the cache grows past ``max_bytes``.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(kind: str, version: int, key_input: Any) -> str:
+        """Hash an entry type, analyzer version and input into a cache key."""
+        payload = json.dumps([kind, version, key_input], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, kind: str, version: int, key_input: Any) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss."""
+        key = self.make_key(kind, version, key_input)
+        now = time.time()
+        with tracing.span('cache.get', 'cache', kind=kind, hit=False) as span:
+            try:
+                with self._lock:
+                    conn = self._connection()
+                    row = conn.execute(
+                        'SELECT value, expires_at FROM entries WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row is None or row[1] < now:
+                        self.misses += 1
+                        return None
+                    conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+                    conn.commit()
+                    self.hits += 1
+                logger.debug(f"Cache hit for {kind}")
+                span.set(hit=True, bytes=len(row[0]))
+                return json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Error reading analysis cache: {str(e)}")
+                span.record_error(e)
+                return None
+
+    def set(self, kind: str, version: int, key_input: Any, value: Any) -> None:
+        """Store a value and evict old entries if the cache is over its size limit."""
+        key = self.make_key(kind, version, key_input)
+        now = time.time()
+        with tracing.span('cache.set', 'cache', kind=kind) as span:
+            try:
+                data = json.dumps(value, default=str)
+                span.set(bytes=len(data))
+                with self._lock:
+                    conn = self._connection()
+                    conn.execute(
+                        'INSERT OR REPLACE INTO entries (key, kind, value, size, expires_at, last_access) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, kind, data, len(data), now + self.ttls.get(kind, 24 * 3600), now)
+                    )
+                    self._evict(conn, now)
+                    conn.commit()
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Error writing analysis cache: {str(e)}")
+                span.record_error(e)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        conn.execute('DELETE FROM entries WHERE expires_at < ?', (now,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def purge(self) -> int:
+        """Delete every entry and return how many were removed."""
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute('DELETE FROM entries').rowcount
+            conn.commit()
+            conn.execute('VACUUM')
+        logger.info(f"Purged {removed} cached analyses")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries, size = self._connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
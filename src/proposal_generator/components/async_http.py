@@ -0,0 +1,57 @@
+from typing import Dict, Optional
+from datetime import timedelta
+import asyncio
+import time
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Errors a non-blocking fetch may raise, including ``raise_for_status``
+FETCH_ERRORS = (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncResponse:
+    """A fully-read HTTP response from a non-blocking fetch.
+
+    Exposes the subset of the ``requests.Response`` interface used by the
+    analyzers so the same parsing code works for sync and async fetches.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: CaseInsensitiveDict,
+                 content: bytes, elapsed: timedelta, encoding: Optional[str] = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        """Decode the response body."""
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self) -> None:
+        """Raise ``requests.HTTPError`` for 4xx/5xx responses, like requests does."""
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> aiohttp.ClientSession:
+    """Create a client session for non-blocking requests."""
+    return aiohttp.ClientSession(headers=dict(headers or {}))
+
+
+async def fetch(session: aiohttp.ClientSession, url: str, timeout: float = 10) -> AsyncResponse:
+    """Fetch a URL and read the whole body without blocking the event loop."""
+    start = time.perf_counter()
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        content = await response.read()
+        return AsyncResponse(
+            url=str(response.url),
+            status_code=response.status,
+            headers=CaseInsensitiveDict(response.headers),
+            content=content,
+            elapsed=timedelta(seconds=time.perf_counter() - start),
+            encoding=response.charset
+        )
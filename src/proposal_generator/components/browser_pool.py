@@ -0,0 +1,278 @@
+from typing import Dict, Any, List, Optional, Set
+import atexit
+import contextlib
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from . import network_profiles
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+# Drivers a process keeps at most, overridable with PROPOSAL_GENERATOR_BROWSERS
+DEFAULT_POOL_SIZE = 2
+# Page loads after which a driver is replaced
+DEFAULT_MAX_PAGES = 50
+# Resident memory of a driver's Chrome processes after which it is replaced
+DEFAULT_MAX_RSS_MB = 1024
+
+WINDOW_SIZE = (1920, 1080)
+# Selenium's default page load timeout, restored when a driver is returned
+DEFAULT_PAGE_LOAD_TIMEOUT = 300
+
+
+def _origin(url: str) -> str:
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ('http', 'https') and parts.netloc else ''
+
+
+class PooledDriver:
+    """A Chrome driver leased from the pool.
+
+    Attribute access is forwarded to the Selenium driver, so components use
+    it like ``webdriver.Chrome``. Page loads are counted for recycling,
+    ``prepared`` records setup of the current tab (such as stealth
+    patches), ``network_profile`` is the request blocking profile in
+    effect in it, and ``origins`` are the sites loaded during the current
+    lease.
+    """
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.pages = 0
+        self.created = time.monotonic()
+        self.prepared: Set[str] = set()
+        self.network_profile = network_profiles.FULL_FIDELITY
+        self.origins: Set[str] = set()
+
+    def get(self, url: str) -> None:
+        self.pages += 1
+        self.origins.add(_origin(url))
+        self.driver.get(url)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.driver, name)
+
+
+class BrowserPool:
+    """Bounded pool of warm headless Chrome drivers.
+
+    Starting Chrome takes seconds and hundreds of MB, so drivers are kept
+    running and handed out one lease at a time. A driver is health-checked
+    before each lease and reset afterwards (cookies and site storage of
+    every site visited cleared, a fresh blank tab, default window size and
+    timeouts, performance log drained), so no state passes between leases.
+    It is replaced after ``max_pages`` page loads, once its Chrome processes
+    use more than ``max_rss_mb`` (measured with psutil when installed), or
+    when a lease ends with an error. ``close`` quits every driver; the
+    shared pool does so at exit.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_pages: int = DEFAULT_MAX_PAGES,
+                 max_rss_mb: Optional[float] = DEFAULT_MAX_RSS_MB):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: List[PooledDriver] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.launched = 0
+        self.reused = 0
+        self.recycled = 0
+
+    @staticmethod
+    def _chrome_options() -> Any:
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument(f'--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+        # DevTools network events, read by PerformanceAnalyzer to record HAR files
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+        return options
+
+    def _launch(self) -> PooledDriver:
+        from selenium import webdriver
+
+        with tracing.span('browser.launch', 'browser'):
+            driver = PooledDriver(webdriver.Chrome(options=self._chrome_options()))
+        with self._lock:
+            self.launched += 1
+        return driver
+
+    @contextlib.contextmanager
+    def driver(self, timeout: Optional[float] = None, profile: str = network_profiles.FULL_FIDELITY):
+        """Lease a driver, waiting up to ``timeout`` seconds for a free one.
+
+        ``profile`` names the ``network_profiles`` profile whose requests
+        are blocked during the lease. Raises TimeoutError if every driver
+        stays busy for that long.
+        """
+        with tracing.span('browser.acquire', 'browser', profile=profile) as span:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed")
+            if profile not in network_profiles.PROFILES:
+                raise ValueError(f"Unknown network profile '{profile}'")
+            if not self._slots.acquire(timeout=timeout):
+                raise TimeoutError(f"No browser became free within {timeout:g} seconds")
+            try:
+                driver = self._take_idle()
+                span.set(reused=driver is not None)
+                if driver is None:
+                    driver = self._launch()
+                network_profiles.apply_profile(driver, profile)
+            except BaseException:
+                self._slots.release()
+                raise
+
+        healthy = True
+        try:
+            yield driver
+        except BaseException:
+            # The page may be left in any state, so don't hand it out again
+            healthy = False
+            raise
+        finally:
+            self._release(driver, healthy)
+            self._slots.release()
+
+    def _take_idle(self) -> Optional[PooledDriver]:
+        """Pop an idle driver that still responds, quitting dead ones."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                driver = self._idle.pop()
+            if self._is_alive(driver):
+                with self._lock:
+                    self.reused += 1
+                return driver
+            logger.info("Replacing unresponsive browser")
+            self._quit(driver)
+
+    def _release(self, driver: PooledDriver, healthy: bool) -> None:
+        """Reset a driver for the next lease, or quit it if it should be replaced."""
+        if healthy and not self._closed and not self._needs_recycling(driver):
+            try:
+                self._clear_browsing_data(driver)
+                driver.set_window_size(*WINDOW_SIZE)
+                driver.set_page_load_timeout(DEFAULT_PAGE_LOAD_TIMEOUT)
+                # Chrome buffers performance log entries until they are read
+                driver.get_log('performance')
+            except Exception as e:
+                logger.info(f"Could not reset browser, replacing it: {str(e)}")
+            else:
+                with self._lock:
+                    self._idle.append(driver)
+                return
+        with self._lock:
+            self.recycled += 1
+        self._quit(driver)
+
+    @staticmethod
+    def _clear_browsing_data(driver: PooledDriver) -> None:
+        """Delete the cookies, storage and tabs a lease left behind.
+
+        ``delete_all_cookies`` only reaches the current page's domain, so
+        cookies are cleared browser-wide over DevTools, and local storage,
+        IndexedDB, caches and service workers for every origin the lease
+        loaded or holds cookies for. Session storage belongs to the tab,
+        so the lease's tabs are closed in favour of a new blank one.
+        """
+        origins = set(driver.origins)
+        origins.add(_origin(driver.current_url))
+        for cookie in driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', []):
+            domain = cookie['domain'].lstrip('.')
+            origins.update((f'http://{domain}', f'https://{domain}'))
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        for origin in sorted(filter(None, origins)):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.origins.clear()
+
+        old_handles = list(driver.window_handles)
+        driver.switch_to.new_window('tab')
+        fresh = driver.current_window_handle
+        for handle in old_handles:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(fresh)
+        # DevTools setup belonged to the closed tab
+        driver.prepared.clear()
+        driver.network_profile = network_profiles.FULL_FIDELITY
+
+    def _needs_recycling(self, driver: PooledDriver) -> bool:
+        if driver.pages >= self.max_pages:
+            logger.debug(f"Recycling browser after {driver.pages} pages")
+            return True
+        rss_mb = self._rss_mb(driver)
+        if self.max_rss_mb is not None and rss_mb is not None and rss_mb > self.max_rss_mb:
+            logger.debug(f"Recycling browser using {rss_mb:.0f} MB")
+            return True
+        return False
+
+    @staticmethod
+    def _is_alive(driver: PooledDriver) -> bool:
+        try:
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _rss_mb(driver: PooledDriver) -> Optional[float]:
+        """Memory used by the driver's chromedriver and Chrome processes, if psutil is available."""
+        try:
+            import psutil
+
+            root = psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _quit(driver: PooledDriver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting browser: {str(e)}")
+
+    def close(self) -> None:
+        """Quit all idle drivers. Leased drivers are quit when they are returned."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'launched': self.launched,
+                'reused': self.reused,
+                'recycled': self.recycled,
+                'idle': len(self._idle)
+            }
+
+
+_shared_pool: Optional[BrowserPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    """The process-wide pool shared by all Selenium-based components."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            size = int(os.getenv('PROPOSAL_GENERATOR_BROWSERS') or DEFAULT_POOL_SIZE)
+            _shared_pool = BrowserPool(size=size)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -1,31 +1,64 @@
-from typing import Dict, List, Any
-from pytrends.request import TrendReq
-import yfinance as yf
-from newsapi import NewsApiClient
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 import os
 import logging
 from .website_analyzer import WebsiteAnalyzer
 from .base_agent import BaseAgent
+from .analysis_cache import AnalysisCache
+from .. import tracing
+from ..deadline import Deadline
 from urllib.parse import urlparse
-import time
+import threading
+import asyncio
+
+if TYPE_CHECKING:
+    from pytrends.request import TrendReq
+    from newsapi import NewsApiClient
 
 logger = logging.getLogger(__name__)
 
+# Delays (in seconds) before each Google Trends attempt
+TRENDS_BACKOFF_DELAYS = (10, 20)
+
 class CompetitiveAnalyzer(BaseAgent):
     """Analyzes competitors and market data."""
     
+    # Bump when the analysis output changes to invalidate cached results
+    CACHE_VERSION = 1
+    
     def __init__(self):
         super().__init__()
         self.website_analyzer = WebsiteAnalyzer()
-        self.pytrends = TrendReq(hl='en-US', tz=360)
-        self.news_api = NewsApiClient(api_key=os.getenv('NEWS_API_KEY'))
+        self._pytrends = None
+        self._news_api = None
+        self._trends_lock = threading.Lock()
+        self._clients_lock = threading.Lock()
+
+    @property
+    def pytrends(self) -> 'TrendReq':
+        """Google Trends client, created on first use since it contacts Google when built."""
+        with self._clients_lock:
+            if self._pytrends is None:
+                from pytrends.request import TrendReq
+                self._pytrends = TrendReq(hl='en-US', tz=360)
+            return self._pytrends
 
-    def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def news_api(self) -> 'NewsApiClient':
+        """News API client, created on first use."""
+        with self._clients_lock:
+            if self._news_api is None:
+                from newsapi import NewsApiClient
+                self._news_api = NewsApiClient(api_key=os.getenv('NEWS_API_KEY'))
+            return self._news_api
+
+    @tracing.traced()
+    def process(self, data: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Process competitive analysis request.
         
         Args:
             data: Dictionary containing company name, competitors, and industry
+            context: Optional run context holding a shared ``page_store``
             
         Returns:
             Dictionary containing analysis results
@@ -38,11 +71,27 @@ class CompetitiveAnalyzer(BaseAgent):
             if not competitors and not industry:
                 return self._handle_error(ValueError("No competitors or industry provided"), "competitive analysis")
             
-            return self.analyze(company_name, competitors, industry)
+            return self.analyze(company_name, competitors, industry, context)
+        except Exception as e:
+            return self._handle_error(e, "competitive analysis")
+
+    @tracing.traced()
+    async def process_async(self, data: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Process competitive analysis request without blocking the event loop."""
+        try:
+            company_name = data.get('company_name', '')
+            competitors = data.get('competitors', [])
+            industry = data.get('industry', '')
+            
+            if not competitors and not industry:
+                return self._handle_error(ValueError("No competitors or industry provided"), "competitive analysis")
+            
+            return await self.analyze_async(company_name, competitors, industry, context)
         except Exception as e:
             return self._handle_error(e, "competitive analysis")
 
-    def analyze(self, company_name: str, competitors: List[str], industry: str) -> Dict[str, Any]:
+    def analyze(self, company_name: str, competitors: List[str], industry: str,
+                context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Perform comprehensive competitive analysis.
         
@@ -50,30 +99,25 @@ class CompetitiveAnalyzer(BaseAgent):
             company_name: Name of the client's company
             competitors: List of competitor URLs
             industry: Industry sector
+            context: Optional run context passed on to the website analyzer
             
         Returns:
             Dict containing analysis results
         """
         try:
-            # Validate inputs
-            if not isinstance(competitors, list):
-                logger.warning("Competitors is not a list, converting to list")
-                if isinstance(competitors, str):
-                    competitors = [competitors]
-                else:
-                    competitors = []
-
-            # Ensure all competitors are strings
-            competitors = [str(comp) for comp in competitors if comp]
+            competitors = self._normalize_competitors(competitors)
+            cache = (context or {}).get('analysis_cache')
+            # Steps that have not started when the deadline passes are skipped
+            deadline = Deadline.of(context)
             
             # Get market trends (with fallback data)
-            market_trends = self._analyze_market_trends(industry)
+            market_trends = self._analyze_market_trends(industry, cache, deadline)
             
             # Analyze competitors
             competitor_analysis = {}
-            if competitors:
+            if competitors and not deadline.expired():
                 try:
-                    competitor_analysis = self._analyze_competitors(competitors)
+                    competitor_analysis = self._analyze_competitors(competitors, context)
                 except Exception as e:
                     logger.warning(f"Error analyzing competitors: {str(e)}")
                     competitor_analysis = {}
@@ -83,7 +127,7 @@ class CompetitiveAnalyzer(BaseAgent):
                 'industry_news': {'articles': []},
                 'competitor_news': {}
             }
-            if company_name and industry:
+            if company_name and industry and not deadline.expired():
                 try:
                     news_analysis = self._analyze_news(company_name, competitors, industry)
                 except Exception as e:
@@ -91,49 +135,126 @@ class CompetitiveAnalyzer(BaseAgent):
             
             # Get financial analysis
             financial_analysis = {}
-            if competitors:
+            if competitors and not deadline.expired():
                 try:
-                    financial_analysis = self._analyze_financial_data(competitors)
+                    financial_analysis = self._analyze_financial_data(competitors, cache)
                 except Exception as e:
                     logger.warning(f"Error in financial analysis: {str(e)}")
             
-            # Combine all analyses
-            results = {
-                'market_trends': market_trends,
-                'competitor_analysis': competitor_analysis,
-                'news_analysis': news_analysis,
-                'financial_analysis': financial_analysis,
-                'summary': {
-                    'total_competitors': len(competitors),
-                    'analyzed_competitors': len(competitor_analysis),
-                    'has_financial_data': bool(financial_analysis),
-                    'has_news_data': bool(news_analysis.get('industry_news', {}).get('articles')),
-                    'industry': industry
-                }
-            }
-            
-            return results
+            return self._combine_results(
+                competitors, industry, market_trends, competitor_analysis, news_analysis, financial_analysis,
+                partial=deadline.expired()
+            )
             
         except Exception as e:
             logger.error(f"Error in competitive analysis: {str(e)}")
-            # Return a valid data structure even on error
-            return {
-                'market_trends': self._get_fallback_trends(industry),
-                'competitor_analysis': {},
-                'news_analysis': {
+            return self._error_result(industry, e)
+
+    async def analyze_async(self, company_name: str, competitors: List[str], industry: str,
+                            context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Perform comprehensive competitive analysis without blocking the event loop.
+        
+        Market trends, competitor websites, news and financial data are
+        gathered concurrently. The news and financial clients are blocking
+        libraries, so they run in worker threads.
+        """
+        try:
+            competitors = self._normalize_competitors(competitors)
+            cache = (context or {}).get('analysis_cache')
+            deadline = Deadline.of(context)
+
+            async def empty(value):
+                return value
+
+            results = await asyncio.gather(
+                self._analyze_market_trends_async(industry, cache, deadline),
+                self._analyze_competitors_async(competitors, context) if competitors else empty({}),
+                asyncio.to_thread(self._analyze_news, company_name, competitors, industry)
+                if company_name and industry else empty(None),
+                asyncio.to_thread(self._analyze_financial_data, competitors, cache) if competitors else empty({}),
+                return_exceptions=True
+            )
+            market_trends, competitor_analysis, news_analysis, financial_analysis = results
+            
+            if isinstance(market_trends, Exception):
+                logger.warning(f"Error analyzing market trends: {str(market_trends)}")
+                market_trends = self._get_fallback_trends(industry)
+            if isinstance(competitor_analysis, Exception):
+                logger.warning(f"Error analyzing competitors: {str(competitor_analysis)}")
+                competitor_analysis = {}
+            if isinstance(news_analysis, Exception) or news_analysis is None:
+                if news_analysis is not None:
+                    logger.warning(f"Error in news analysis: {str(news_analysis)}")
+                news_analysis = {
                     'industry_news': {'articles': []},
                     'competitor_news': {}
-                },
-                'financial_analysis': {},
-                'summary': {
-                    'total_competitors': 0,
-                    'analyzed_competitors': 0,
-                    'has_financial_data': False,
-                    'has_news_data': False,
-                    'industry': industry,
-                    'error': str(e)
                 }
+            if isinstance(financial_analysis, Exception):
+                logger.warning(f"Error in financial analysis: {str(financial_analysis)}")
+                financial_analysis = {}
+            
+            return self._combine_results(
+                competitors, industry, market_trends, competitor_analysis, news_analysis, financial_analysis,
+                partial=deadline.expired()
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in competitive analysis: {str(e)}")
+            return self._error_result(industry, e)
+
+    def _normalize_competitors(self, competitors: Any) -> List[str]:
+        """Validate the competitor list and coerce entries to strings."""
+        if not isinstance(competitors, list):
+            logger.warning("Competitors is not a list, converting to list")
+            if isinstance(competitors, str):
+                competitors = [competitors]
+            else:
+                competitors = []
+
+        # Ensure all competitors are strings
+        return [str(comp) for comp in competitors if comp]
+
+    def _combine_results(self, competitors: List[str], industry: str, market_trends: Dict[str, Any],
+                         competitor_analysis: Dict[str, Any], news_analysis: Dict[str, Any],
+                         financial_analysis: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """Combine all analyses into the final result, flagging one cut short by the deadline."""
+        result = {
+            'market_trends': market_trends,
+            'competitor_analysis': competitor_analysis,
+            'news_analysis': news_analysis,
+            'financial_analysis': financial_analysis,
+            'summary': {
+                'total_competitors': len(competitors),
+                'analyzed_competitors': len(competitor_analysis),
+                'has_financial_data': bool(financial_analysis),
+                'has_news_data': bool(news_analysis.get('industry_news', {}).get('articles')),
+                'industry': industry
+            }
+        }
+        if partial:
+            result['partial'] = True
+        return result
+
+    def _error_result(self, industry: str, error: Exception) -> Dict[str, Any]:
+        """Return a valid data structure even on error."""
+        return {
+            'market_trends': self._get_fallback_trends(industry),
+            'competitor_analysis': {},
+            'news_analysis': {
+                'industry_news': {'articles': []},
+                'competitor_news': {}
+            },
+            'financial_analysis': {},
+            'summary': {
+                'total_competitors': 0,
+                'analyzed_competitors': 0,
+                'has_financial_data': False,
+                'has_news_data': False,
+                'industry': industry,
+                'error': str(error)
             }
+        }
 
     def _get_fallback_trends(self, industry: str) -> Dict[str, Any]:
         """Get static fallback data for market trends."""
@@ -167,7 +288,9 @@ class CompetitiveAnalyzer(BaseAgent):
             }
         }
 
-    def _analyze_market_trends(self, industry: str) -> Dict[str, Any]:
+    @tracing.traced()
+    def _analyze_market_trends(self, industry: str, cache: Optional[AnalysisCache] = None,
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Analyze market trends using Google Trends."""
         try:
             # Add error checking for empty industry
@@ -177,126 +300,149 @@ class CompetitiveAnalyzer(BaseAgent):
             # Clean up industry term for better results
             industry_term = f"{industry} law firm"  # Make it more specific for law firms
             
-            # Initialize trends data structure
-            trends_data = {
-                'related_queries': {'rising': [], 'top': []},
-                'interest_over_time': [],
-                'trend_summary': {
-                    'average_interest': 0,
-                    'max_interest': 0,
-                    'min_interest': 0,
-                    'current_interest': 0
-                }
-            }
+            cached = self._cached_trends(industry_term, cache)
+            if cached:
+                return self._summarize_trends(cached, industry)
             
-            # Helper function for exponential backoff
-            def make_request_with_backoff(request_func, max_retries=2, initial_delay=10):
-                for attempt in range(max_retries):
-                    try:
-                        # Add increasing delay between attempts
-                        delay = initial_delay * (2 ** attempt)  # 10, 20 seconds
-                        logger.info(f"Waiting {delay} seconds before Google Trends request...")
-                        time.sleep(delay)
-                        
-                        result = request_func()
-                        if result is not None:
-                            return result
-                    except Exception as e:
-                        if "429" in str(e):
-                            logger.warning("Rate limit hit, using fallback data")
-                            return None
-                        logger.warning(f"Error in request: {str(e)}")
-                        if attempt == max_retries - 1:
-                            return None
-                return None
+            # Execute single request with exponential backoff
+            interest_over_time = None
+            deadline = deadline or Deadline()
+            for delay in TRENDS_BACKOFF_DELAYS:
+                logger.info(f"Waiting {delay} seconds before Google Trends request...")
+                with tracing.span('trends.backoff', 'wait', delay=delay):
+                    if not deadline.sleep(delay):
+                        logger.warning("Deadline reached, giving up on Google Trends")
+                        break
+                interest_over_time = self._request_trends(industry_term)
+                if interest_over_time is not None:
+                    break
             
-            # Build payload with conservative settings
-            def build_payload():
-                try:
-                    self.pytrends.build_payload(
-                        [industry_term],
-                        timeframe='today 1-m',  # Reduce to 1 month for less data
-                        geo='US'
-                    )
-                    return True
-                except Exception as e:
-                    logger.warning(f"Error building payload: {str(e)}")
-                    return None
-
-            # Execute single request with backoff
-            success = False
-            try:
-                if make_request_with_backoff(build_payload):
-                    # Try to get at least one type of data
-                    try:
-                        interest_df = self.pytrends.interest_over_time()
-                        if interest_df is not None and not interest_df.empty and industry_term in interest_df.columns:
-                            # Sample every 7 days
-                            sampled_data = interest_df[industry_term].iloc[::7]
-                            trends_data['interest_over_time'] = [
-                                {
-                                    'date': index.strftime('%Y-%m-%d'),
-                                    'value': int(value)
-                                }
-                                for index, value in sampled_data.items()
-                            ]
-                            success = True
-                    except Exception as e:
-                        logger.warning(f"Error getting interest data: {str(e)}")
+            self._cache_trends(industry_term, interest_over_time, cache)
+            return self._summarize_trends(interest_over_time, industry)
+            
+        except Exception as e:
+            logger.warning(f"Error analyzing market trends: {str(e)}")
+            return self._get_fallback_trends(industry)
 
-                if not success:
-                    logger.warning("Using fallback data due to Google Trends limitations")
-                    return self._get_fallback_trends(industry)
-                    
-            except Exception as e:
-                logger.warning(f"Error during Google Trends request: {str(e)}")
+    @tracing.traced()
+    async def _analyze_market_trends_async(self, industry: str, cache: Optional[AnalysisCache] = None,
+                                           deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Analyze market trends using Google Trends without blocking the event loop."""
+        try:
+            if not industry:
                 return self._get_fallback_trends(industry)
+
+            industry_term = f"{industry} law firm"
             
-            # Calculate trend summary if we have real data
-            if trends_data['interest_over_time']:
-                values = [point['value'] for point in trends_data['interest_over_time']]
-                trends_data['trend_summary'] = {
-                    'average_interest': round(sum(values) / len(values), 2),
-                    'max_interest': max(values),
-                    'min_interest': min(values),
-                    'current_interest': values[-1]
-                }
-                return trends_data
-            else:
-                return self._get_fallback_trends(industry)
+            cached = self._cached_trends(industry_term, cache)
+            if cached:
+                return self._summarize_trends(cached, industry)
+            
+            interest_over_time = None
+            deadline = deadline or Deadline()
+            for delay in TRENDS_BACKOFF_DELAYS:
+                logger.info(f"Waiting {delay} seconds before Google Trends request...")
+                with tracing.span('trends.backoff', 'wait', delay=delay):
+                    if not await deadline.sleep_async(delay):
+                        logger.warning("Deadline reached, giving up on Google Trends")
+                        break
+                interest_over_time = await asyncio.to_thread(self._request_trends, industry_term)
+                if interest_over_time is not None:
+                    break
+            
+            self._cache_trends(industry_term, interest_over_time, cache)
+            return self._summarize_trends(interest_over_time, industry)
             
         except Exception as e:
             logger.warning(f"Error analyzing market trends: {str(e)}")
             return self._get_fallback_trends(industry)
 
-    def _analyze_competitors(self, competitors: List[str]) -> Dict[str, Any]:
+    def _cached_trends(self, industry_term: str, cache: Optional[AnalysisCache]) -> Optional[List[Dict[str, Any]]]:
+        """Return cached interest samples for a search term, if any."""
+        if cache is None:
+            return None
+        cached = cache.get('market_trends', self.CACHE_VERSION, industry_term)
+        if cached:
+            logger.info(f"Using cached Google Trends data for '{industry_term}'")
+        return cached
+
+    def _cache_trends(self, industry_term: str, interest_over_time: Optional[List[Dict[str, Any]]],
+                      cache: Optional[AnalysisCache]) -> None:
+        """Cache interest samples; empty results are not cached so the fallback is retried next run."""
+        if cache is not None and interest_over_time:
+            cache.set('market_trends', self.CACHE_VERSION, industry_term, interest_over_time)
+
+    @tracing.traced('http', name='pytrends.request')
+    def _request_trends(self, industry_term: str) -> Optional[List[Dict[str, Any]]]:
+        """Request interest-over-time data from Google Trends.
+        
+        Returns None if the request payload could not be built (worth retrying),
+        otherwise the weekly interest samples, which may be empty.
+        """
+        # The pytrends client keeps the payload between calls, so requests must not interleave
+        with self._trends_lock:
+            # Build payload with conservative settings
+            try:
+                self.pytrends.build_payload(
+                    [industry_term],
+                    timeframe='today 1-m',  # Reduce to 1 month for less data
+                    geo='US'
+                )
+            except Exception as e:
+                logger.warning(f"Error building payload: {str(e)}")
+                return None
+
+            try:
+                interest_df = self.pytrends.interest_over_time()
+                if interest_df is not None and not interest_df.empty and industry_term in interest_df.columns:
+                    # Sample every 7 days
+                    sampled_data = interest_df[industry_term].iloc[::7]
+                    return [
+                        {
+                            'date': index.strftime('%Y-%m-%d'),
+                            'value': int(value)
+                        }
+                        for index, value in sampled_data.items()
+                    ]
+            except Exception as e:
+                logger.warning(f"Error getting interest data: {str(e)}")
+            return []
+
+    def _summarize_trends(self, interest_over_time: Optional[List[Dict[str, Any]]], industry: str) -> Dict[str, Any]:
+        """Build the trends result, falling back to static data when no samples were returned."""
+        if not interest_over_time:
+            logger.warning("Using fallback data due to Google Trends limitations")
+            return self._get_fallback_trends(industry)
+        
+        # Calculate trend summary from real data
+        values = [point['value'] for point in interest_over_time]
+        return {
+            'related_queries': {'rising': [], 'top': []},
+            'interest_over_time': interest_over_time,
+            'trend_summary': {
+                'average_interest': round(sum(values) / len(values), 2),
+                'max_interest': max(values),
+                'min_interest': min(values),
+                'current_interest': values[-1]
+            }
+        }
+
+    def _analyze_competitors(self, competitors: List[str], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Analyze competitor websites."""
         results = {}
+        deadline = Deadline.of(context)
         
         for competitor_url in competitors:
+            if deadline.expired():
+                logger.warning("Deadline reached, skipping remaining competitor websites")
+                break
             try:
                 if not isinstance(competitor_url, str):
                     continue
                     
                 # Get website info
-                website_data = self.website_analyzer.process(competitor_url)
-                
-                if website_data and not website_data.get('error'):
-                    results[competitor_url] = {
-                        'website_analysis': website_data,
-                        'technologies': website_data.get('technologies', []),
-                        'content_analysis': website_data.get('content_analysis', {}),
-                        'performance': website_data.get('performance_metrics', {})
-                    }
-                else:
-                    logger.warning(f"No valid analysis data for {competitor_url}")
-                    results[competitor_url] = {
-                        'error': website_data.get('error', 'No analysis data available'),
-                        'website_analysis': {},
-                        'technologies': [],
-                        'content_analysis': {},
-                        'performance': {}
-                    }
+                website_data = self.website_analyzer.process(competitor_url, context)
+                results[competitor_url] = self._competitor_entry(competitor_url, website_data)
             except Exception as e:
                 logger.warning(f"Error analyzing competitor {competitor_url}: {str(e)}")
                 results[competitor_url] = {
@@ -309,6 +455,41 @@ class CompetitiveAnalyzer(BaseAgent):
         
         return results
 
+    def _competitor_entry(self, competitor_url: str, website_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Summarize a competitor website analysis."""
+        if website_data and not website_data.get('error'):
+            return {
+                'website_analysis': website_data,
+                'technologies': website_data.get('technologies', []),
+                'content_analysis': website_data.get('content_analysis', {}),
+                'performance': website_data.get('performance_metrics', {})
+            }
+        logger.warning(f"No valid analysis data for {competitor_url}")
+        return {
+            'error': website_data.get('error', 'No analysis data available'),
+            'website_analysis': {},
+            'technologies': [],
+            'content_analysis': {},
+            'performance': {}
+        }
+
+    async def _analyze_competitors_async(self, competitors: List[str], context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Analyze competitor websites concurrently."""
+        competitor_urls = [url for url in competitors if isinstance(url, str)]
+        analyses = await asyncio.gather(
+            *(self.website_analyzer.process_async(url, context) for url in competitor_urls),
+            return_exceptions=True
+        )
+        
+        results = {}
+        for competitor_url, website_data in zip(competitor_urls, analyses):
+            if isinstance(website_data, Exception):
+                logger.warning(f"Error analyzing competitor {competitor_url}: {str(website_data)}")
+                website_data = {'error': str(website_data)}
+            results[competitor_url] = self._competitor_entry(competitor_url, website_data)
+        return results
+
+    @tracing.traced()
     def _analyze_news(self, company_name: str, competitors: List[str], industry: str) -> Dict[str, Any]:
         """Analyze news coverage."""
         try:
@@ -324,12 +505,13 @@ class CompetitiveAnalyzer(BaseAgent):
             
             # Get industry news
             try:
-                industry_news = self.news_api.get_everything(
-                    q=f"{industry} law firm",
-                    language='en',
-                    sort_by='relevancy',
-                    page_size=10
-                )
+                with tracing.span('newsapi.get_everything', 'http', query=f"{industry} law firm"):
+                    industry_news = self.news_api.get_everything(
+                        q=f"{industry} law firm",
+                        language='en',
+                        sort_by='relevancy',
+                        page_size=10
+                    )
                 
                 if industry_news and 'articles' in industry_news:
                     news_data['industry_news'] = industry_news
@@ -355,12 +537,13 @@ class CompetitiveAnalyzer(BaseAgent):
                     domain = urlparse(competitor_url).netloc
                     company = domain.split('.')[-2]
                     
-                    news = self.news_api.get_everything(
-                        q=f"{company} law firm",
-                        language='en',
-                        sort_by='relevancy',
-                        page_size=5
-                    )
+                    with tracing.span('newsapi.get_everything', 'http', query=f"{company} law firm"):
+                        news = self.news_api.get_everything(
+                            q=f"{company} law firm",
+                            language='en',
+                            sort_by='relevancy',
+                            page_size=5
+                        )
                     
                     if news and 'articles' in news:
                         news_data['competitor_news'][competitor_url] = news
@@ -396,8 +579,17 @@ class CompetitiveAnalyzer(BaseAgent):
                 }
             }
 
-    def _analyze_financial_data(self, competitors: List[str]) -> Dict[str, Any]:
+    @tracing.traced()
+    def _analyze_financial_data(self, competitors: List[str], cache: Optional[AnalysisCache] = None) -> Dict[str, Any]:
         """Analyze financial data for public companies."""
+        if cache is not None:
+            cached = cache.get('financial', self.CACHE_VERSION, competitors)
+            if cached is not None:
+                logger.info("Using cached financial data")
+                return cached
+        
+        import yfinance as yf
+        
         financial_data = {}
         
         for competitor_url in competitors:
@@ -419,8 +611,9 @@ class CompetitiveAnalyzer(BaseAgent):
                         continue
                         
                     # Try to get financial info
-                    ticker = yf.Ticker(company)
-                    info = ticker.info
+                    with tracing.span('yfinance.info', 'http', ticker=company):
+                        ticker = yf.Ticker(company)
+                        info = ticker.info
                     
                     if info and isinstance(info, dict):
                         financial_data[competitor_url] = {
@@ -461,4 +654,6 @@ class CompetitiveAnalyzer(BaseAgent):
                 
             financial_data['summary'] = summary
         
+        if cache is not None:
+            cache.set('financial', self.CACHE_VERSION, competitors, financial_data)
         return financial_data 
\ No newline at end of file
@@ -1,19 +1,25 @@
-import time
+import asyncio
 from typing import List, Dict, Any, Optional
 import logging
-import random
 from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
-import whois
 from .base_agent import BaseAgent
+from .page_store import PageStore
+from .analysis_cache import AnalysisCache
+from . import rate_limiter
+from .. import tracing
+from ..deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
 class CompetitorAnalyzer(BaseAgent):
     """Analyzes competitors and their market positioning."""
 
+    # Bump when the analysis output changes to invalidate cached results
+    CACHE_VERSION = 1
+
     def __init__(self):
         """Initialize the competitor analyzer."""
         super().__init__()
@@ -22,12 +28,7 @@ class CompetitorAnalyzer(BaseAgent):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
 
-    def _wait_between_requests(self):
-        """Add delay between requests."""
-        delay = random.uniform(3, 5)
-        logger.info(f"Waiting {delay:.1f} seconds between requests...")
-        time.sleep(delay)
-
+    @tracing.traced()
     def process(self, competitors: List[Dict[str, Any]], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Analyze the competitors and generate insights."""
         if not competitors:
@@ -35,9 +36,13 @@ class CompetitorAnalyzer(BaseAgent):
             return self._empty_analysis_result()
 
         try:
+            page_store = self._page_store(context)
+            deadline = Deadline.of(context)
             analyzed_competitors = []
             for competitor in competitors:
-                analysis = self._analyze_competitor(competitor)
+                analysis = self._analyze_competitor(
+                    competitor, page_store, (context or {}).get('analysis_cache'), deadline
+                )
                 if analysis:
                     analyzed_competitors.append(analysis)
 
@@ -45,64 +50,183 @@ class CompetitorAnalyzer(BaseAgent):
                 logger.warning("No competitor analysis results generated")
                 return self._empty_analysis_result()
 
-            return {
-                'competitors': analyzed_competitors,
-                'market_insights': self._generate_market_insights(analyzed_competitors),
-                'keyword_trends': self._analyze_keyword_trends(analyzed_competitors),
-                'market_positioning': self._analyze_market_positioning(analyzed_competitors)
-            }
+            return self._build_analysis_result(analyzed_competitors, partial=deadline.expired())
+        except Exception as e:
+            logger.error(f"Error during competitor analysis: {str(e)}")
+            return self._empty_analysis_result()
+
+    @tracing.traced()
+    async def process_async(self, competitors: List[Dict[str, Any]], context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Analyze the competitors concurrently without blocking the event loop."""
+        if not competitors:
+            logger.warning("No competitors provided for analysis")
+            return self._empty_analysis_result()
+
+        try:
+            from . import async_http
+            
+            page_store = self._page_store(context)
+            cache = (context or {}).get('analysis_cache')
+            deadline = Deadline.of(context)
+            async with async_http.create_session(self.session.headers) as session:
+                analyses = await asyncio.gather(
+                    *(self._analyze_competitor_async(session, competitor, page_store, cache, deadline)
+                      for competitor in competitors)
+                )
+            analyzed_competitors = [analysis for analysis in analyses if analysis]
+
+            if not analyzed_competitors:
+                logger.warning("No competitor analysis results generated")
+                return self._empty_analysis_result()
+
+            return self._build_analysis_result(analyzed_competitors, partial=deadline.expired())
         except Exception as e:
             logger.error(f"Error during competitor analysis: {str(e)}")
             return self._empty_analysis_result()
 
-    def _analyze_competitor(self, competitor: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Analyze a single competitor."""
+    def _page_store(self, context: Dict[str, Any] = None) -> PageStore:
+        """Use the run's shared page store, or a private one for standalone calls."""
+        page_store = (context or {}).get('page_store')
+        return page_store if page_store is not None else PageStore(session=self.session)
+
+    def _cache_key(self, competitor: Dict[str, Any]) -> Dict[str, Any]:
+        """The competitor fields that determine its analysis."""
+        return {field: competitor.get(field) for field in ('name', 'website', 'description', 'source')}
+
+    def _build_analysis_result(self, analyzed_competitors: List[Dict[str, Any]], partial: bool = False) -> Dict[str, Any]:
+        """Combine per-competitor analyses into the final result.
+        
+        ``partial`` marks a result cut short by the run's deadline.
+        """
+        result = {
+            'competitors': analyzed_competitors,
+            'market_insights': self._generate_market_insights(analyzed_competitors),
+            'keyword_trends': self._analyze_keyword_trends(analyzed_competitors),
+            'market_positioning': self._analyze_market_positioning(analyzed_competitors)
+        }
+        if partial:
+            result['partial'] = True
+        return result
+
+    @tracing.traced()
+    def _analyze_competitor(self, competitor: Dict[str, Any], page_store: PageStore,
+                            cache: Optional[AnalysisCache] = None,
+                            deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Analyze a single competitor, skipping it once the deadline has passed."""
+        deadline = deadline or Deadline()
         try:
             website = competitor.get('website', '')
             if not website:
                 return None
 
-            self._wait_between_requests()
+            if cache is not None:
+                cached = cache.get('competitor', self.CACHE_VERSION, self._cache_key(competitor))
+                if cached is not None:
+                    logger.info(f"Using cached analysis of competitor {website}")
+                    return cached
+
+            # Pages another analyzer already fetched cost no request
+            limiter = rate_limiter.get_rate_limiter()
+            fetching = website not in page_store
+            if fetching:
+                limiter.acquire(website, deadline)
+            if deadline.expired():
+                logger.warning(f"Deadline reached, skipping competitor {website}")
+                return None
             
             # Get website info
             try:
-                response = self.session.get(website, timeout=30)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract meta description
-                meta_desc = soup.find('meta', attrs={'name': 'description'})
-                description = meta_desc['content'] if meta_desc else competitor.get('description', '')
-                
-                # Extract services
-                services = self._extract_services(soup)
-                
-                # Get domain info
-                domain_info = self._get_domain_info(website)
-                
-                return {
-                    'name': competitor['name'],
-                    'website': website,
-                    'description': description,
-                    'services': services,
-                    'domain_info': domain_info,
-                    'source': competitor.get('source', 'Unknown')
-                }
+                page = page_store.get(website, timeout=deadline.timeout(30))
+                if fetching:
+                    limiter.observe(website, page.response)
+                result = self._build_competitor_result(competitor, website, page.soup, self._get_domain_info(website))
+                if cache is not None:
+                    cache.set('competitor', self.CACHE_VERSION, self._cache_key(competitor), result)
+                return result
+            except Exception as e:
+                logger.error(f"Error analyzing competitor website {website}: {str(e)}")
+                return self._fallback_competitor_result(competitor, website)
                 
+        except Exception as e:
+            logger.error(f"Error analyzing competitor: {str(e)}")
+            return None
+
+    @tracing.traced()
+    async def _analyze_competitor_async(self, session, competitor: Dict[str, Any], page_store: PageStore,
+                                        cache: Optional[AnalysisCache] = None,
+                                        deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Analyze a single competitor without blocking the event loop."""
+        deadline = deadline or Deadline()
+        try:
+            website = competitor.get('website', '')
+            if not website:
+                return None
+
+            if cache is not None:
+                cached = cache.get('competitor', self.CACHE_VERSION, self._cache_key(competitor))
+                if cached is not None:
+                    logger.info(f"Using cached analysis of competitor {website}")
+                    return cached
+
+            # Pages another analyzer already fetched cost no request
+            limiter = rate_limiter.get_rate_limiter()
+            fetching = website not in page_store
+            if fetching:
+                await limiter.acquire_async(website, deadline)
+            if deadline.expired():
+                logger.warning(f"Deadline reached, skipping competitor {website}")
+                return None
+            
+            # Get website info; WHOIS lookups are blocking so run them in a worker thread
+            try:
+                page = await page_store.get_async(website, session, timeout=deadline.timeout(30))
+                if fetching:
+                    limiter.observe(website, page.response)
+                domain_info = await asyncio.to_thread(self._get_domain_info, website)
+                result = await asyncio.to_thread(
+                    lambda: self._build_competitor_result(competitor, website, page.soup, domain_info)
+                )
+                if cache is not None:
+                    cache.set('competitor', self.CACHE_VERSION, self._cache_key(competitor), result)
+                return result
             except Exception as e:
                 logger.error(f"Error analyzing competitor website {website}: {str(e)}")
-                return {
-                    'name': competitor['name'],
-                    'website': website,
-                    'description': competitor.get('description', ''),
-                    'services': [],
-                    'domain_info': {},
-                    'source': competitor.get('source', 'Unknown')
-                }
+                return self._fallback_competitor_result(competitor, website)
                 
         except Exception as e:
             logger.error(f"Error analyzing competitor: {str(e)}")
             return None
 
+    def _build_competitor_result(self, competitor: Dict[str, Any], website: str, soup: BeautifulSoup,
+                                 domain_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a competitor analysis from its parsed homepage."""
+        # Extract meta description
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        description = meta_desc['content'] if meta_desc else competitor.get('description', '')
+        
+        # Extract services
+        services = self._extract_services(soup)
+        
+        return {
+            'name': competitor['name'],
+            'website': website,
+            'description': description,
+            'services': services,
+            'domain_info': domain_info,
+            'source': competitor.get('source', 'Unknown')
+        }
+
+    def _fallback_competitor_result(self, competitor: Dict[str, Any], website: str) -> Dict[str, Any]:
+        """Basic competitor entry used when its website could not be analyzed."""
+        return {
+            'name': competitor['name'],
+            'website': website,
+            'description': competitor.get('description', ''),
+            'services': [],
+            'domain_info': {},
+            'source': competitor.get('source', 'Unknown')
+        }
+
     def _extract_services(self, soup: BeautifulSoup) -> List[str]:
         """Extract services from website content."""
         services = set()
@@ -129,8 +253,11 @@ class CompetitorAnalyzer(BaseAgent):
     def _get_domain_info(self, url: str) -> Dict[str, Any]:
         """Get domain registration information."""
         try:
+            import whois
+            
             domain = url.split('/')[2]
-            w = whois.whois(domain)
+            with tracing.span('whois', 'http', domain=domain):
+                w = whois.whois(domain)
             return {
                 'creation_date': str(w.creation_date[0] if isinstance(w.creation_date, list) else w.creation_date),
                 'registrar': w.registrar,
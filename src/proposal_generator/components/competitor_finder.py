@@ -1,50 +1,16 @@
 from typing import Dict, List, Any, Optional
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from duckduckgo_search import DDGS
-import whois
-from datetime import datetime, timedelta
+from datetime import datetime
 from .base_agent import BaseAgent
+from . import browser_pool, network_profiles, page_readiness, rate_limiter
+from .. import tracing
+from ..deadline import Deadline
 import logging
-import time
-import random
 from urllib.parse import quote_plus, urljoin
 
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
-    def __init__(self, requests_per_hour: int = 20):
-        self.requests_per_hour = requests_per_hour
-        self.request_timestamps = []
-        
-    def wait_if_needed(self):
-        """Implement aggressive rate limiting."""
-        now = datetime.now()
-        # Remove timestamps older than 1 hour
-        self.request_timestamps = [ts for ts in self.request_timestamps 
-                                 if now - ts < timedelta(hours=1)]
-        
-        # If we've made too many requests in the last hour, wait
-        if len(self.request_timestamps) >= self.requests_per_hour:
-            oldest_timestamp = min(self.request_timestamps)
-            wait_seconds = (oldest_timestamp + timedelta(hours=1) - now).total_seconds()
-            if wait_seconds > 0:
-                logger.info(f"Rate limit approaching, waiting {wait_seconds:.1f} seconds...")
-                time.sleep(wait_seconds)
-        
-        # Add random delay between 20-40 seconds
-        delay = random.uniform(20, 40)
-        logger.info(f"Adding delay of {delay:.1f} seconds between requests...")
-        time.sleep(delay)
-        
-        # Record this request
-        self.request_timestamps.append(now)
-
 class CompetitorFinder(BaseAgent):
     """Discovers and analyzes competitors in the market."""
     
@@ -56,12 +22,17 @@ class CompetitorFinder(BaseAgent):
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
 
-    def _wait_between_requests(self):
-        """Add delay between requests."""
-        delay = random.uniform(3, 5)
-        logger.info(f"Waiting {delay:.1f} seconds between requests...")
-        time.sleep(delay)
+    def _fetch(self, url: str, timeout: float, deadline: Optional[Deadline] = None) -> requests.Response:
+        """GET a URL once the host's rate limit allows it."""
+        limiter = rate_limiter.get_rate_limiter()
+        limiter.acquire(url, deadline)
+        with tracing.span('http.get', 'http', url=url) as span:
+            response = self.session.get(url, timeout=timeout)
+            tracing.record_response(span, response)
+        limiter.observe(url, response)
+        return response
 
+    @tracing.traced()
     def process(self, client_brief: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process the client brief to find competitors."""
         business_name = client_brief.get('client_name', '')
@@ -73,20 +44,24 @@ class CompetitorFinder(BaseAgent):
             return {'competitors': []}
 
         try:
-            competitors = self._discover_competitors(business_name, industry, location)
+            deadline = Deadline.of(context)
+            competitors = self._discover_competitors(business_name, industry, location, deadline)
+            if deadline.expired():
+                return {'competitors': competitors, 'partial': True}
             return {'competitors': competitors}
         except Exception as e:
             logger.error(f"Error finding competitors: {str(e)}")
             return {'competitors': []}
 
-    def _discover_competitors(self, business_name: str, industry: str, location: str) -> List[Dict[str, Any]]:
+    def _discover_competitors(self, business_name: str, industry: str, location: str,
+                              deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Discover competitors using various methods."""
         logger.info(f"Starting competitor search for {business_name} in {location}")
         competitors = []
 
         # Try direct directory scraping first
         try:
-            directory_competitors = self._scrape_legal_directories(location)
+            directory_competitors = self._scrape_legal_directories(location, deadline or Deadline())
             competitors.extend(directory_competitors)
         except Exception as e:
             logger.error(f"Error during directory scraping: {str(e)}")
@@ -96,37 +71,34 @@ class CompetitorFinder(BaseAgent):
         logger.info(f"Found {len(unique_competitors)} unique competitors")
         return unique_competitors[:5]
 
-    def _scrape_legal_directories(self, location: str) -> List[Dict[str, Any]]:
-        """Scrape legal directories directly."""
+    def _scrape_legal_directories(self, location: str, deadline: Deadline) -> List[Dict[str, Any]]:
+        """Scrape legal directories directly, stopping once the deadline has passed."""
         competitors = []
         
         # Try Martindale
         try:
             logger.info("Searching Martindale directory...")
-            self._wait_between_requests()  # Add delay before request
-            martindale_results = self._scrape_martindale(location)
+            martindale_results = self._scrape_martindale(location, deadline.timeout(30), deadline)
             if martindale_results:
                 competitors.extend(martindale_results)
                 logger.info(f"Found {len(martindale_results)} results from Martindale")
         except Exception as e:
             logger.error(f"Error scraping Martindale: {str(e)}")
 
-        if len(competitors) < 5:
+        if len(competitors) < 5 and not deadline.expired():
             try:
                 logger.info("Searching Justia directory...")
-                self._wait_between_requests()  # Add delay before request
-                justia_results = self._scrape_justia(location)
+                justia_results = self._scrape_justia(location, deadline.timeout(30), deadline)
                 if justia_results:
                     competitors.extend(justia_results)
                     logger.info(f"Found {len(justia_results)} results from Justia")
             except Exception as e:
                 logger.error(f"Error scraping Justia: {str(e)}")
 
-        if len(competitors) < 5:
+        if len(competitors) < 5 and not deadline.expired():
             try:
                 logger.info("Searching FindLaw directory...")
-                self._wait_between_requests()  # Add delay before request
-                findlaw_results = self._scrape_findlaw(location)
+                findlaw_results = self._scrape_findlaw(location, deadline.timeout(30), deadline)
                 if findlaw_results:
                     competitors.extend(findlaw_results)
                     logger.info(f"Found {len(findlaw_results)} results from FindLaw")
@@ -135,7 +107,8 @@ class CompetitorFinder(BaseAgent):
 
         return competitors
 
-    def _scrape_martindale(self, location: str) -> List[Dict[str, Any]]:
+    def _scrape_martindale(self, location: str, timeout: float = 30,
+                        deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Scrape Martindale directory."""
         results = []
         try:
@@ -145,7 +118,7 @@ class CompetitorFinder(BaseAgent):
             
             url = f"https://www.martindale.com/search/attorneys/{state}/{city}/"
             
-            response = self.session.get(url, timeout=30)
+            response = self._fetch(url, timeout, deadline)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -179,7 +152,8 @@ class CompetitorFinder(BaseAgent):
             
         return results[:5]
 
-    def _scrape_justia(self, location: str) -> List[Dict[str, Any]]:
+    def _scrape_justia(self, location: str, timeout: float = 30,
+                       deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Scrape Justia directory."""
         results = []
         location_parts = location.lower().split(',')
@@ -189,8 +163,7 @@ class CompetitorFinder(BaseAgent):
         url = f"https://www.justia.com/lawyers/{state}/{city}"
         
         try:
-            self._wait_between_requests()
-            response = self.session.get(url, timeout=30)
+            response = self._fetch(url, timeout, deadline)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -224,7 +197,8 @@ class CompetitorFinder(BaseAgent):
             
         return results[:5]
 
-    def _scrape_findlaw(self, location: str) -> List[Dict[str, Any]]:
+    def _scrape_findlaw(self, location: str, timeout: float = 30,
+                        deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """Scrape FindLaw directory."""
         results = []
         location_parts = location.lower().split(',')
@@ -234,8 +208,7 @@ class CompetitorFinder(BaseAgent):
         url = f"https://lawyers.findlaw.com/{state}/{city}/law-firms-all"
         
         try:
-            self._wait_between_requests()
-            response = self.session.get(url, timeout=30)
+            response = self._fetch(url, timeout, deadline)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
                 
@@ -352,7 +325,10 @@ class CompetitorFinder(BaseAgent):
     def _get_domain_info(self, domain: str) -> Dict[str, Any]:
         """Get domain registration information."""
         try:
-            w = whois.whois(domain)
+            import whois
+            
+            with tracing.span('whois', 'http', domain=domain):
+                w = whois.whois(domain)
             creation_date = w.creation_date
             if isinstance(creation_date, list):
                 creation_date = creation_date[0]
@@ -374,16 +350,16 @@ class CompetitorFinder(BaseAgent):
     def _analyze_website_content(self, url: str) -> Dict[str, Any]:
         """Analyze website content using Selenium."""
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Get page content
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            # Only the DOM is analyzed, so images, styles, fonts and third parties are blocked
+            with browser_pool.get_pool().driver(profile=network_profiles.DOM_ONLY) as driver:
+                with tracing.span('browser.get', 'browser', url=url):
+                    driver.get(url)
+                
+                # Wait for page to load
+                page_readiness.wait_for_page_ready(driver)
+                
+                # Get page content
+                soup = BeautifulSoup(driver.page_source, 'html.parser')
             
             # Extract meta keywords
             meta_keywords = soup.find('meta', {'name': 'keywords'})
@@ -409,8 +385,6 @@ class CompetitorFinder(BaseAgent):
             # Analyze features
             features = self._detect_features(soup)
             
-            driver.quit()
-            
             return {
                 'keywords': list(set(keywords)),
                 'technologies': technologies,
@@ -463,7 +437,13 @@ class CompetitorFinder(BaseAgent):
         try:
             # This is a simplified version. In a real implementation,
             # you would use a service like Alexa API or similar
-            response = requests.get(f"http://{domain}")
+            url = f"http://{domain}"
+            limiter = rate_limiter.get_rate_limiter()
+            limiter.acquire(url)
+            with tracing.span('http.get', 'http', url=url) as span:
+                response = requests.get(url)
+                tracing.record_response(span, response)
+            limiter.observe(url, response)
             return response.status_code
         except:
             return 999999
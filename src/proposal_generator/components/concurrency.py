@@ -0,0 +1,211 @@
+"""Adaptive per-host concurrency for outbound page fetches.
+
+Each host gets a window: the number of requests that may be in flight to
+it at once. The window grows while the host answers quickly and without
+errors, and is halved when it answers 429 or 5xx, times out or starts
+responding much slower than it did when idle (additive increase,
+multiplicative decrease). Fast sites are crawled with more parallel
+requests, fragile ones with fewer, instead of a fixed pool size.
+"""
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator
+from urllib.parse import urlparse
+import asyncio
+import logging
+import os
+import threading
+import time
+import requests
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+INITIAL_WINDOW = 2
+MIN_WINDOW = 1
+MAX_WINDOW = 16
+# Share of the window kept after an overload signal
+BACKOFF_FACTOR = 0.5
+# Responses slower than this multiple of the host's fastest response count as overload
+LATENCY_TOLERANCE = 3.0
+# Responses faster than this never count as slow, however fast the host was before
+MIN_SLOW_LATENCY = 0.5
+
+
+def _is_overload_error(error: BaseException) -> bool:
+    """Whether an exception means the host is struggling rather than the request being wrong."""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    try:
+        import aiohttp
+    except ImportError:
+        return False
+    return isinstance(error, aiohttp.ClientConnectionError)
+
+
+class _HostWindow:
+    def __init__(self, window: float, limit: int):
+        self.window = float(window)
+        self.limit = limit
+        # Below this the window grows by one per success (slow start), above it by one per window
+        self.threshold = float(limit)
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self.backoffs = 0
+        self.fastest: Optional[float] = None
+        # Responses to requests sent before this time do not trigger another backoff
+        self.backed_off_at = 0.0
+        self.async_waiters: List[asyncio.Future] = []
+
+    def has_room(self) -> bool:
+        return self.in_flight < int(self.window)
+
+
+class Slot:
+    """A request's place in its host's window; report the response with ``record``."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.started = time.monotonic()
+        self.status: Optional[int] = None
+
+    def record(self, response: Any) -> None:
+        # ``status_code`` for requests and fetched pages, ``status`` for streamed aiohttp responses
+        self.status = getattr(response, 'status_code', getattr(response, 'status', None))
+
+
+class HostConcurrencyLimiter:
+    """AIMD concurrency windows keyed by host, shared by threads and event loops."""
+
+    def __init__(self, initial_window: int = INITIAL_WINDOW, max_window: int = MAX_WINDOW):
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self._hosts: Dict[str, _HostWindow] = {}
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+
+    def _host(self, url: str) -> str:
+        return (urlparse(url).hostname or url).lower()
+
+    def _window(self, host: str) -> _HostWindow:
+        """The window for a host; call with the lock held."""
+        if host not in self._hosts:
+            self._hosts[host] = _HostWindow(min(self.initial_window, self.max_window), self.max_window)
+        return self._hosts[host]
+
+    def _take(self, state: _HostWindow) -> None:
+        state.in_flight += 1
+        state.requests += 1
+        state.peak = max(state.peak, state.in_flight)
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[Slot]:
+        """Hold one of the host's slots while the block sends a request."""
+        host = self._host(url)
+        with tracing.span('ConcurrencyLimiter.acquire', 'wait', host=host) as span:
+            with self._room:
+                state = self._window(host)
+                while not state.has_room():
+                    self._room.wait()
+                self._take(state)
+                span.set(window=int(state.window), in_flight=state.in_flight)
+        current = Slot(host)
+        try:
+            yield current
+        except BaseException as e:
+            self._release(current, e)
+            raise
+        self._release(current)
+
+    @asynccontextmanager
+    async def slot_async(self, url: str) -> AsyncIterator[Slot]:
+        """Non-blocking ``slot``."""
+        host = self._host(url)
+        loop = asyncio.get_running_loop()
+        with tracing.span('ConcurrencyLimiter.acquire', 'wait', host=host) as span:
+            while True:
+                with self._lock:
+                    state = self._window(host)
+                    if state.has_room():
+                        self._take(state)
+                        span.set(window=int(state.window), in_flight=state.in_flight)
+                        break
+                    waiter = loop.create_future()
+                    state.async_waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    with self._lock:
+                        if waiter in state.async_waiters:
+                            state.async_waiters.remove(waiter)
+        current = Slot(host)
+        try:
+            yield current
+        except BaseException as e:
+            self._release(current, e)
+            raise
+        self._release(current)
+
+    def _release(self, current: Slot, error: Optional[BaseException] = None) -> None:
+        """Free the slot and adjust the host's window from how the request went."""
+        now = time.monotonic()
+        latency = now - current.started
+        overloaded = (
+            (error is not None and _is_overload_error(error))
+            or current.status == 429 or (current.status or 0) >= 500
+        )
+        with self._lock:
+            state = self._hosts[current.host]
+            state.in_flight -= 1
+            if error is None and not overloaded:
+                state.fastest = latency if state.fastest is None else min(state.fastest, latency)
+                overloaded = latency > max(MIN_SLOW_LATENCY, LATENCY_TOLERANCE * state.fastest)
+            if overloaded:
+                # Requests that were already in flight report the same congestion
+                if current.started >= state.backed_off_at:
+                    state.window = max(MIN_WINDOW, state.window * BACKOFF_FACTOR)
+                    state.threshold = state.window
+                    state.backed_off_at = now
+                    state.backoffs += 1
+                    logger.info(f"Backing off {current.host} to {int(state.window)} concurrent requests")
+            elif error is None:
+                step = 1.0 if state.window < state.threshold else 1.0 / state.window
+                state.window = min(state.limit, state.window + step)
+            tracing.current_span().set(concurrency_window=int(state.window))
+            self._room.notify_all()
+            waiters, state.async_waiters = state.async_waiters, []
+        for waiter in waiters:
+            waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current window, peak concurrency and backoffs per host."""
+        with self._lock:
+            return {
+                host: {
+                    'window': int(state.window),
+                    'in_flight': state.in_flight,
+                    'peak': state.peak,
+                    'requests': state.requests,
+                    'backoffs': state.backoffs
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+_shared_limiter: Optional[HostConcurrencyLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> HostConcurrencyLimiter:
+    """The process-wide limiter, so every crawler shares one window per host."""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            max_window = int(os.getenv('PROPOSAL_GENERATOR_MAX_CONNECTIONS_PER_HOST') or MAX_WINDOW)
+            _shared_limiter = HostConcurrencyLimiter(max_window=max_window)
+        return _shared_limiter
@@ -0,0 +1,204 @@
+"""Priority-ordered crawling of a single site.
+
+``AsyncCrawler`` keeps a frontier of discovered URLs ordered by how useful
+the page is likely to be (service, about and contact pages first, shallow
+pages before deep ones) and fetches from it with a bounded number of
+concurrent tasks. Results are yielded as pages finish, so callers can
+aggregate them without holding every page in memory; per-host parallelism
+is left to the shared concurrency limiter behind the page store.
+"""
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, AsyncIterator, Iterable
+from urllib.parse import urlparse
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+from . import concurrency
+from .urls import canonicalize_url, resolve_url
+from .visited_set import VisitedSet
+from ..deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Paths of the pages that say most about a business
+IMPORTANT_PATTERNS = [
+    r'/about',
+    r'/services',
+    r'/contact',
+    r'/team',
+    r'/portfolio',
+    r'/products',
+    r'/features',
+    r'/pricing',
+    r'/faq',
+    r'/support',
+    r'/blog'
+]
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_DEPTH = 3
+# Discovered URLs kept waiting; the lowest-priority ones are dropped beyond this
+MAX_FRONTIER = 5000
+# Links to these are files, not pages
+SKIPPED_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.zip', '.gz',
+    '.mp3', '.mp4', '.mov', '.avi', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.css', '.js', '.xml', '.json', '.txt'
+)
+
+
+def score_url(url: str, depth: int = 0) -> float:
+    """Crawl priority of a URL; higher is fetched first.
+
+    Pages matching ``IMPORTANT_PATTERNS`` come first, earlier patterns
+    slightly ahead of later ones. Shallow links and short paths beat deep
+    ones, and URLs with a query string (filters, pagination) come last.
+    """
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+    score = -float(depth) - 0.1 * path.rstrip('/').count('/')
+    for rank, pattern in enumerate(IMPORTANT_PATTERNS):
+        if re.search(pattern, path):
+            score += 10 - 0.1 * rank
+            break
+    if parsed.query:
+        score -= 2
+    return score
+
+
+class CrawlFrontier:
+    """URLs waiting to be crawled, best first, each URL accepted once."""
+
+    def __init__(self, max_size: int = MAX_FRONTIER):
+        self.max_size = max_size
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._order = itertools.count()
+        self._seen = VisitedSet()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def mark_seen(self, url: str) -> None:
+        """Never queue this URL, e.g. because it was analyzed before the crawl."""
+        self._seen.add(canonicalize_url(url))
+
+    def add(self, url: str, depth: int = 0, score: Optional[float] = None) -> bool:
+        """Queue a URL unless it was seen before or is not a page; return whether it was queued.
+
+        URLs are compared in canonical form but queued as given, since the
+        canonical form is not always the address the server expects.
+        """
+        url = resolve_url(url)
+        if urlparse(url).path.lower().endswith(SKIPPED_EXTENSIONS) or not self._seen.add(canonicalize_url(url)):
+            return False
+        priority = score_url(url, depth) if score is None else score
+        heapq.heappush(self._heap, (-priority, next(self._order), url, depth))
+        if len(self._heap) > 2 * self.max_size:
+            # Trimming in batches keeps pushes cheap
+            self.dropped += len(self._heap) - self.max_size
+            self._heap = heapq.nsmallest(self.max_size, self._heap)
+            heapq.heapify(self._heap)
+        return True
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """The best waiting URL and its depth, or None when the frontier is empty."""
+        if not self._heap:
+            return None
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def close(self) -> None:
+        self._seen.close()
+
+
+class AsyncCrawler:
+    """Crawl one site from a set of seed URLs.
+
+    ``analyze_page(url)`` fetches and analyzes a page and returns a dict; its
+    ``links`` are added to the frontier. A page whose ``canonical_url`` was
+    already analyzed under another URL is not yielded again. At most
+    ``max_pages`` pages are analyzed, following links up to ``max_depth``
+    clicks from the seeds. Links for which ``allowed(url)`` is false (e.g.
+    disallowed by robots.txt) are never queued.
+    """
+
+    def __init__(self, analyze_page: Callable[[str], Awaitable[Dict[str, Any]]],
+                 max_pages: int = DEFAULT_MAX_PAGES, max_depth: int = DEFAULT_MAX_DEPTH,
+                 workers: int = concurrency.MAX_WINDOW, deadline: Optional[Deadline] = None,
+                 allowed: Optional[Callable[[str], bool]] = None):
+        self.analyze_page = analyze_page
+        self.allowed = allowed or (lambda url: True)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.workers = workers
+        self.deadline = deadline or Deadline()
+        self.frontier = CrawlFrontier()
+        self.pages_crawled = 0
+        # Canonical URLs of the pages yielded, so aliases of one page count once
+        self._analyzed = VisitedSet()
+        self.duplicates = 0
+        # Set when the deadline stopped the crawl with pages left to fetch
+        self.partial = False
+
+    def _same_site(self, url: str, hosts: set) -> bool:
+        return urlparse(canonicalize_url(url)).netloc in hosts
+
+    async def crawl(self, seeds: Iterable[Tuple],
+                    visited: Iterable[str] = ()) -> AsyncIterator[Dict[str, Any]]:
+        """Yield page analyses as they finish, in no particular order.
+
+        ``seeds`` are ``(url, depth)`` pairs, or ``(url, depth, score)`` to
+        override the URL's priority. Their pages' links are followed on the
+        seeds' hosts only. ``visited`` URLs were analyzed already and are not
+        fetched again.
+        """
+        seeds = list(seeds)
+        hosts = {urlparse(canonicalize_url(seed[0])).netloc for seed in seeds}
+        for url in visited:
+            self.frontier.mark_seen(url)
+            self._analyzed.add(canonicalize_url(url))
+        for seed in seeds:
+            if self.allowed(seed[0]):
+                self.frontier.add(*seed)
+
+        pending: Dict[asyncio.Task, Tuple[str, int]] = {}
+        try:
+            while True:
+                while len(pending) < self.workers and self.pages_crawled < self.max_pages:
+                    entry = self.frontier.pop()
+                    if entry is None:
+                        break
+                    self.pages_crawled += 1
+                    pending[asyncio.ensure_future(self.analyze_page(entry[0]))] = entry
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=self.deadline.remaining(),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.warning(f"Deadline reached, stopping crawl after {self.pages_crawled} pages")
+                    self.partial = True
+                    break
+                for task in done:
+                    url, depth = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = {'error': str(e), 'url': url}
+                    if depth < self.max_depth:
+                        for link in result.get('links', []):
+                            if self._same_site(link, hosts) and self.allowed(link):
+                                self.frontier.add(link, depth + 1)
+                    canonical = result.get('canonical_url') or url
+                    self.frontier.mark_seen(canonical)
+                    if not result.get('error') and not self._analyzed.add(canonicalize_url(canonical)):
+                        self.duplicates += 1
+                        continue
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            self.frontier.close()
+            self._analyzed.close()
@@ -0,0 +1,412 @@
+from typing import Dict, Any, List, Optional, Callable
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qsl
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Text responses larger than this should be sent compressed
+COMPRESSIBLE_MIN_BYTES = 1024
+# Scripts and stylesheets smaller than this are not checked for minification
+MINIFY_MIN_BYTES = 2048
+# Static assets should be cacheable for at least this many seconds
+MIN_CACHE_SECONDS = 24 * 3600
+
+_TEXT_MIME_TYPES = ('text/', 'javascript', 'json', 'xml', 'svg', 'ecmascript')
+_STATIC_TYPES = ('script', 'stylesheet', 'image', 'font')
+
+
+def _headers(headers: Dict[str, Any]) -> List[Dict[str, str]]:
+    return [{'name': name, 'value': str(value)} for name, value in (headers or {}).items()]
+
+
+def _header(entry_part: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive header lookup on a HAR request or response."""
+    name = name.lower()
+    for header in entry_part.get('headers', []):
+        if header['name'].lower() == name:
+            return header['value']
+    return None
+
+
+def _iso(wall_time: float) -> str:
+    return datetime.fromtimestamp(wall_time, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def har_from_performance_log(log_entries: List[Dict[str, Any]], page_url: str, title: str = '',
+                             page_timings: Optional[Dict[str, Any]] = None,
+                             fetch_content: Optional[Callable[[str], Optional[str]]] = None) -> Dict[str, Any]:
+    """Build a HAR 1.2 log from Chrome's performance log.
+
+    ``log_entries`` are the entries returned by ``driver.get_log('performance')``,
+    each wrapping one DevTools Network event. ``fetch_content`` is called
+    with the request id of each script and stylesheet and may return its
+    response body, which lets ``analyze_har`` check minification. Chrome's resource type, priority and
+    initiator are kept in the ``_resourceType``, ``_priority`` and
+    ``_initiator`` fields, as in DevTools' own HAR export.
+    """
+    requests: Dict[str, Dict[str, Any]] = {}
+    finished: List[Dict[str, Any]] = []
+
+    def finish(record: Dict[str, Any], end: Optional[float]) -> None:
+        record['end'] = end
+        finished.append(record)
+
+    for log_entry in log_entries:
+        try:
+            message = json.loads(log_entry['message'])['message']
+        except (KeyError, TypeError, ValueError):
+            continue
+        method, params = message.get('method', ''), message.get('params', {})
+        request_id = params.get('requestId')
+
+        if method == 'Network.requestWillBeSent':
+            previous = requests.pop(request_id, None)
+            if previous is not None and params.get('redirectResponse'):
+                # The same request id continues after a redirect
+                previous['response'] = params['redirectResponse']
+                finish(previous, params['timestamp'])
+            initiator = params.get('initiator') or {}
+            frames = (initiator.get('stack') or {}).get('callFrames') or []
+            requests[request_id] = {
+                'id': request_id,
+                'request': params['request'],
+                'start': params['timestamp'],
+                'wall_time': params.get('wallTime'),
+                'type': params.get('type'),
+                'initiator': initiator.get('url') or (frames[0].get('url') if frames else None),
+                'response': None,
+                'data_length': 0,
+                'encoded_length': None,
+                'error': None
+            }
+        elif request_id not in requests:
+            continue
+        elif method == 'Network.responseReceived':
+            requests[request_id]['response'] = params['response']
+            requests[request_id]['type'] = params.get('type') or requests[request_id]['type']
+        elif method == 'Network.dataReceived':
+            requests[request_id]['data_length'] += params.get('dataLength', 0)
+        elif method == 'Network.loadingFinished':
+            record = requests.pop(request_id)
+            record['encoded_length'] = params.get('encodedDataLength')
+            finish(record, params['timestamp'])
+        elif method == 'Network.loadingFailed':
+            record = requests.pop(request_id)
+            record['error'] = params.get('errorText')
+            finish(record, params['timestamp'])
+
+    # Requests still open when the log was read
+    for record in requests.values():
+        finish(record, None)
+
+    finished.sort(key=lambda record: record['start'])
+    entries = []
+    for record in finished:
+        content_text = None
+        redirected = 300 <= (record['response'] or {}).get('status', 0) < 400
+        if (fetch_content and record['error'] is None and not redirected
+                and (record['type'] or '').lower() in ('script', 'stylesheet')):
+            content_text = fetch_content(record['id'])
+        entries.append(_har_entry(record, content_text))
+    started = entries[0]['startedDateTime'] if entries else _iso(datetime.now(timezone.utc).timestamp())
+    return {
+        'log': {
+            'version': '1.2',
+            'creator': {'name': 'proposal_generator', 'version': '1.0'},
+            'pages': [{
+                'startedDateTime': started,
+                'id': 'page_1',
+                'title': title or page_url,
+                'pageTimings': {
+                    'onContentLoad': (page_timings or {}).get('domContentLoaded', -1),
+                    'onLoad': (page_timings or {}).get('loadTime', -1)
+                }
+            }],
+            'entries': entries
+        }
+    }
+
+
+def _har_entry(record: Dict[str, Any], content_text: Optional[str]) -> Dict[str, Any]:
+    """Convert one tracked request to a HAR entry."""
+    request = record['request']
+    response = record['response'] or {}
+    timing = response.get('timing')
+    end = record['end']
+    total = (end - record['start']) * 1000 if end is not None else -1
+
+    timings = {'blocked': -1, 'dns': -1, 'connect': -1, 'ssl': -1, 'send': 0, 'wait': 0, 'receive': 0}
+    if timing:
+        def span(start_key: str, end_key: str) -> float:
+            return timing[end_key] - timing[start_key] if timing.get(start_key, -1) >= 0 else -1
+
+        queued = (timing['requestTime'] - record['start']) * 1000
+        first_event = next(
+            (timing[key] for key in ('dnsStart', 'connectStart', 'sendStart') if timing.get(key, -1) >= 0), 0
+        )
+        timings.update({
+            'blocked': queued + first_event,
+            'dns': span('dnsStart', 'dnsEnd'),
+            'connect': span('connectStart', 'connectEnd'),
+            'ssl': span('sslStart', 'sslEnd'),
+            'send': span('sendStart', 'sendEnd'),
+            'wait': timing['receiveHeadersEnd'] - timing['sendEnd'],
+            'receive': ((end - timing['requestTime']) * 1000 - timing['receiveHeadersEnd']) if end is not None else 0
+        })
+
+    transfer_size = record['encoded_length']
+    if transfer_size is None:
+        transfer_size = response.get('encodedDataLength', -1)
+    response_headers = _headers(response.get('headers'))
+    content = {'size': record['data_length'], 'mimeType': response.get('mimeType', '')}
+    if content_text is not None:
+        content['text'] = content_text
+
+    url = request['url']
+    protocol = response.get('protocol', '')
+    entry = {
+        'pageref': 'page_1',
+        'startedDateTime': _iso(record['wall_time']) if record['wall_time'] else '',
+        'time': total,
+        'request': {
+            'method': request.get('method', 'GET'),
+            'url': url,
+            'httpVersion': protocol,
+            'headers': _headers(request.get('headers')),
+            'queryString': [{'name': name, 'value': value} for name, value in parse_qsl(urlparse(url).query)],
+            'cookies': [],
+            'headersSize': -1,
+            'bodySize': len(request.get('postData') or '')
+        },
+        'response': {
+            'status': response.get('status', 0),
+            'statusText': response.get('statusText', ''),
+            'httpVersion': protocol,
+            'headers': response_headers,
+            'cookies': [],
+            'content': content,
+            'redirectURL': _header({'headers': response_headers}, 'location') or '',
+            'headersSize': -1,
+            'bodySize': transfer_size,
+            '_transferSize': transfer_size
+        },
+        'cache': {},
+        'timings': timings,
+        '_resourceType': (record['type'] or '').lower(),
+        '_priority': request.get('initialPriority'),
+        '_initiator': record['initiator']
+    }
+    if record['error']:
+        entry['_error'] = record['error']
+    return entry
+
+
+def load_har(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_har(har: Dict[str, Any], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(har, f)
+
+
+def _start_ms(entry: Dict[str, Any], origin: datetime) -> float:
+    started = datetime.fromisoformat(entry['startedDateTime'].replace('Z', '+00:00'))
+    return (started - origin).total_seconds() * 1000
+
+
+def _initiator_url(entry: Dict[str, Any]) -> Optional[str]:
+    """The URL that triggered a request, in our format or DevTools' export format."""
+    initiator = entry.get('_initiator')
+    if isinstance(initiator, dict):
+        frames = (initiator.get('stack') or {}).get('callFrames') or []
+        return initiator.get('url') or (frames[0].get('url') if frames else None)
+    return initiator
+
+
+def _resource_type(entry: Dict[str, Any]) -> str:
+    """Chrome's resource type, or one guessed from the MIME type for other tools' HARs."""
+    resource_type = (entry.get('_resourceType') or '').lower()
+    if resource_type:
+        return resource_type
+    mime_type = entry['response']['content'].get('mimeType', '')
+    for guess, marker in (('script', 'javascript'), ('stylesheet', 'css'), ('image', 'image/'),
+                          ('font', 'font'), ('document', 'html')):
+        if marker in mime_type:
+            return guess
+    return 'other'
+
+
+def _transfer_size(entry: Dict[str, Any]) -> int:
+    response = entry['response']
+    for size in (response.get('_transferSize'), response.get('bodySize'), response['content'].get('size')):
+        if size is not None and size >= 0:
+            return size
+    return 0
+
+
+def _site(host: str) -> str:
+    """Approximate registrable domain: the last two labels of the host."""
+    return '.'.join(host.split('.')[-2:])
+
+
+def _looks_unminified(text: str) -> bool:
+    """Readable formatting: short lines and plenty of whitespace."""
+    lines = text.count('\n') + 1
+    whitespace = sum(1 for char in text if char.isspace())
+    return len(text) / lines < 80 and whitespace / len(text) > 0.15
+
+
+def _cache_problem(entry: Dict[str, Any]) -> Optional[str]:
+    """Why a static asset can't be cached for long, or None if it can."""
+    cache_control = (_header(entry['response'], 'cache-control') or '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return f"Cache-Control: {cache_control}"
+    for directive in cache_control.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name in ('max-age', 's-maxage') and value.isdigit():
+            return None if int(value) >= MIN_CACHE_SECONDS else f"max-age={value} is under a day"
+    if _header(entry['response'], 'expires'):
+        return None
+    return "no Cache-Control max-age or Expires header"
+
+
+def analyze_har(har: Dict[str, Any]) -> Dict[str, Any]:
+    """Explain where a page load's time and bytes went, from a HAR file alone.
+
+    Reports the critical request chain, chains of render-blocking scripts
+    and stylesheets, text assets sent uncompressed, scripts and stylesheets
+    that look unminified (when the HAR includes content), static assets
+    without long-lived cache headers, and the cost of third-party hosts.
+    """
+    entries = [entry for entry in har['log']['entries'] if entry.get('startedDateTime')]
+    if not entries:
+        return {'requests': 0, 'total_bytes': 0, 'recommendations': []}
+    origin = min(datetime.fromisoformat(entry['startedDateTime'].replace('Z', '+00:00')) for entry in entries)
+    page_url = entries[0]['request']['url']
+    page_site = _site(urlparse(page_url).netloc)
+    pages = har['log'].get('pages') or [{}]
+    on_content_load = (pages[0].get('pageTimings') or {}).get('onContentLoad')
+
+    # Request graph: each request's parent is the latest earlier request for its initiator URL
+    starts = [_start_ms(entry, origin) for entry in entries]
+    ends = [start + max(entry.get('time', 0), 0) for start, entry in zip(starts, entries)]
+    index_by_url: Dict[str, int] = {}
+    parents: List[Optional[int]] = []
+    for i, entry in enumerate(entries):
+        parents.append(index_by_url.get(_initiator_url(entry)))
+        index_by_url[entry['request']['url']] = i
+
+    def chain(i: int) -> List[int]:
+        path = [i]
+        while parents[path[-1]] is not None and parents[path[-1]] not in path:
+            path.append(parents[path[-1]])
+        return list(reversed(path))
+
+    # Critical path: the dependency chain that finishes last
+    last = max(range(len(entries)), key=lambda i: ends[i])
+    critical = chain(last)
+    critical_path = {
+        'length_ms': round(ends[last] - starts[critical[0]], 1),
+        'depth': len(critical),
+        'requests': [entries[i]['request']['url'] for i in critical]
+    }
+
+    # Render-blocking: high-priority scripts and stylesheets requested before DOMContentLoaded
+    blocking = {
+        i for i, entry in enumerate(entries)
+        if _resource_type(entry) in ('script', 'stylesheet')
+        and entry.get('_priority') in ('VeryHigh', 'High', None)
+        and (on_content_load is None or on_content_load < 0 or starts[i] < on_content_load)
+    }
+    blocking_chains = []
+    for i in blocking:
+        path = [j for j in chain(i) if j in blocking]
+        if len(path) > 1 and path[-1] == i:
+            blocking_chains.append({
+                'length_ms': round(ends[i] - starts[path[0]], 1),
+                'requests': [entries[j]['request']['url'] for j in path]
+            })
+    blocking_chains.sort(key=lambda found: found['length_ms'], reverse=True)
+
+    uncompressed, unminified, cache_issues = [], [], []
+    third_party: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        url = entry['request']['url']
+        response = entry['response']
+        content = response['content']
+        resource_type = _resource_type(entry)
+        mime_type = content.get('mimeType', '')
+        size = content.get('size') or 0
+
+        if (response.get('status') == 200 and size > COMPRESSIBLE_MIN_BYTES
+                and any(marker in mime_type for marker in _TEXT_MIME_TYPES)
+                and not _header(response, 'content-encoding')):
+            uncompressed.append({'url': url, 'bytes': size})
+
+        text = content.get('text')
+        if resource_type in ('script', 'stylesheet') and text and len(text) > MINIFY_MIN_BYTES and _looks_unminified(text):
+            unminified.append({'url': url, 'bytes': len(text)})
+
+        if response.get('status') == 200 and resource_type in _STATIC_TYPES:
+            problem = _cache_problem(entry)
+            if problem:
+                cache_issues.append({'url': url, 'reason': problem})
+
+        host = urlparse(url).netloc
+        if host and _site(host) != page_site:
+            cost = third_party.setdefault(host, {'requests': 0, 'bytes': 0, 'time_ms': 0.0})
+            cost['requests'] += 1
+            cost['bytes'] += _transfer_size(entry)
+            cost['time_ms'] += max(entry.get('time', 0), 0)
+
+    total_bytes = sum(_transfer_size(entry) for entry in entries)
+    third_party_bytes = sum(cost['bytes'] for cost in third_party.values())
+    analysis = {
+        'requests': len(entries),
+        'total_bytes': total_bytes,
+        'critical_path': critical_path,
+        'render_blocking': {
+            'requests': len(blocking),
+            'chains': blocking_chains[:5]
+        },
+        'uncompressed': uncompressed,
+        'unminified': unminified,
+        'cache_issues': cache_issues,
+        'third_party': {
+            'requests': sum(cost['requests'] for cost in third_party.values()),
+            'bytes': third_party_bytes,
+            'share_of_bytes': round(third_party_bytes / total_bytes, 3) if total_bytes else 0.0,
+            'hosts': dict(sorted(third_party.items(), key=lambda item: item[1]['bytes'], reverse=True)[:10])
+        }
+    }
+    analysis['recommendations'] = _har_recommendations(analysis)
+    return analysis
+
+
+def _har_recommendations(analysis: Dict[str, Any]) -> List[str]:
+    recommendations = []
+    if analysis['critical_path']['depth'] > 3:
+        recommendations.append(
+            f"Shorten the critical request chain ({analysis['critical_path']['depth']} dependent requests, "
+            f"{analysis['critical_path']['length_ms'] / 1000:.1f}s); preload late-discovered resources"
+        )
+    if analysis['render_blocking']['chains']:
+        recommendations.append(
+            f"Flatten {len(analysis['render_blocking']['chains'])} chains of render-blocking scripts and stylesheets"
+        )
+    if analysis['uncompressed']:
+        kilobytes = sum(item['bytes'] for item in analysis['uncompressed']) / 1024
+        recommendations.append(f"Enable gzip or Brotli for {len(analysis['uncompressed'])} text assets ({kilobytes:.0f} KB)")
+    if analysis['unminified']:
+        recommendations.append(f"Minify {len(analysis['unminified'])} scripts and stylesheets")
+    if analysis['cache_issues']:
+        recommendations.append(f"Add long-lived cache headers to {len(analysis['cache_issues'])} static assets")
+    if analysis['third_party']['share_of_bytes'] > 0.3:
+        recommendations.append(
+            f"Review third-party scripts and embeds ({analysis['third_party']['share_of_bytes']:.0%} of downloaded bytes)"
+        )
+    return recommendations
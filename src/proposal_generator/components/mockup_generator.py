@@ -1,24 +1,33 @@
 from typing import Dict, List, Any
 import os
-from PIL import Image, ImageDraw, ImageFont
 import platform
 import logging
 from .base_agent import BaseAgent
+from . import palette
+from .. import tracing
 
 logger = logging.getLogger(__name__)
 
+
+def _rgb(hex_color: str) -> tuple:
+    return tuple(int(hex_color[i:i + 2], 16) for i in (1, 3, 5))
+
+
 class MockupGenerator(BaseAgent):
     """Generates website mockups based on analysis."""
     
     def __init__(self):
         super().__init__()
+        # Created when mockups are first generated
         self.mockups_dir = os.path.join(os.getcwd(), 'src', 'mockups')
-        os.makedirs(self.mockups_dir, exist_ok=True)
-        logger.info(f"Mockups will be saved to: {self.mockups_dir}")
 
+    @tracing.traced()
     def process(self, client_brief: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generate mockups based on client brief and analysis."""
         try:
+            os.makedirs(self.mockups_dir, exist_ok=True)
+            logger.info(f"Mockups will be saved to: {self.mockups_dir}")
+            
             # Extract relevant information
             website_analysis = context.get('website_analysis', {}) if context else {}
             competitive_analysis = context.get('competitive_analysis', {}) if context else {}
@@ -226,15 +235,25 @@ class MockupGenerator(BaseAgent):
         }
 
     def _generate_design_system(self, client_brief: Dict[str, Any], website_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate design system specifications."""
+        """Generate design system specifications.
+
+        Colors found in the screenshots of the client's current site replace
+        the defaults for the roles they fill, so the mockups keep its brand.
+        """
+        colors = {
+            'primary': '#0066CC',
+            'secondary': '#2E3B4E',
+            'accent': '#FF6B35',
+            'background': '#FFFFFF',
+            'text': '#333333'
+        }
+        site_colors = palette.palette_roles((website_analysis or {}).get('color_scheme') or [])
+        colors.update({role: color for role, color in site_colors.items() if color})
+        on_primary = '#FFFFFF' if palette.contrast_ratio(_rgb(colors['primary']), (255, 255, 255)) >= 3 else '#000000'
+        on_secondary = '#FFFFFF' if palette.contrast_ratio(_rgb(colors['secondary']), (255, 255, 255)) >= 3 else '#000000'
+        
         return {
-            'colors': {
-                'primary': '#0066CC',
-                'secondary': '#2E3B4E',
-                'accent': '#FF6B35',
-                'background': '#FFFFFF',
-                'text': '#333333'
-            },
+            'colors': colors,
             'typography': {
                 'headings': 'Montserrat',
                 'body': 'Open Sans',
@@ -247,9 +266,9 @@ class MockupGenerator(BaseAgent):
             },
             'components': {
                 'buttons': {
-                    'primary': {'background': '#0066CC', 'text': '#FFFFFF'},
-                    'secondary': {'background': '#2E3B4E', 'text': '#FFFFFF'},
-                    'outline': {'border': '#0066CC', 'text': '#0066CC'}
+                    'primary': {'background': colors['primary'], 'text': on_primary},
+                    'secondary': {'background': colors['secondary'], 'text': on_secondary},
+                    'outline': {'border': colors['primary'], 'text': colors['primary']}
                 },
                 'cards': {
                     'shadow': '0 2px 4px rgba(0,0,0,0.1)',
@@ -0,0 +1,81 @@
+"""Request blocking for analysis-only browser sessions.
+
+Each profile lists URL patterns (in the wildcard syntax of the DevTools
+``Network.setBlockedURLs`` command) that a browser session does not need:
+
+- ``dom-only``: the HTML and scripts that build the DOM. Images, fonts,
+  stylesheets, media, ads, trackers and third-party widgets are blocked.
+- ``visual``: everything that affects layout and appearance. Only media,
+  ads, trackers and third-party widgets are blocked.
+- ``full-fidelity``: nothing is blocked. Used for performance measurements,
+  which must see the page as visitors do.
+"""
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+DOM_ONLY = 'dom-only'
+VISUAL = 'visual'
+FULL_FIDELITY = 'full-fidelity'
+
+
+def _extensions(*extensions: str) -> List[str]:
+    """Patterns matching files with the given extensions, with or without a query string."""
+    patterns = []
+    for extension in extensions:
+        patterns.extend([f'*.{extension}', f'*.{extension}?*'])
+    return patterns
+
+
+def _hosts(*hosts: str) -> List[str]:
+    return [f'*://*.{host}/*' for host in hosts] + [f'*://{host}/*' for host in hosts]
+
+
+IMAGES = _extensions('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp')
+FONTS = _extensions('woff', 'woff2', 'ttf', 'otf', 'eot')
+STYLESHEETS = _extensions('css')
+MEDIA = _extensions('mp4', 'webm', 'ogg', 'mp3', 'wav', 'm3u8', 'ts', 'mov')
+
+# Ad, analytics and tag-manager hosts
+TRACKERS = _hosts(
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'googletagservices.com', 'adservice.google.com', 'facebook.net',
+    'analytics.twitter.com', 'ads-twitter.com', 'snap.licdn.com',
+    'bat.bing.com', 'clarity.ms', 'hotjar.com', 'segment.com', 'segment.io', 'mixpanel.com',
+    'amplitude.com', 'quantserve.com', 'scorecardresearch.com', 'taboola.com', 'outbrain.com',
+    'criteo.com', 'adnxs.com', 'amazon-adsystem.com', 'newrelic.com', 'nr-data.net'
+)
+
+# Chat, video and social embeds that load large bundles of their own
+WIDGETS = _hosts(
+    'intercom.io', 'intercomcdn.com', 'drift.com', 'driftt.com', 'zopim.com', 'zendesk.com',
+    'tawk.to', 'livechatinc.com', 'crisp.chat', 'hs-scripts.com', 'hs-analytics.net',
+    'youtube.com', 'ytimg.com', 'vimeo.com', 'vimeocdn.com', 'platform.twitter.com',
+    'disqus.com', 'addthis.com', 'sharethis.com'
+)
+
+PROFILES: Dict[str, List[str]] = {
+    DOM_ONLY: IMAGES + FONTS + STYLESHEETS + MEDIA + TRACKERS + WIDGETS,
+    VISUAL: MEDIA + TRACKERS + WIDGETS,
+    FULL_FIDELITY: []
+}
+
+
+def apply_profile(driver: Any, profile: str) -> None:
+    """Block the requests ``profile`` does not need in a pooled driver's session.
+
+    The profile stays in effect until another one is applied, so a driver
+    leased with the same profile again needs no DevTools calls.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown network profile '{profile}'")
+    if driver.network_profile == profile:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': PROFILES[profile]})
+        driver.network_profile = profile
+    except Exception as e:
+        # Without DevTools access the page simply loads everything
+        logger.debug(f"Could not apply network profile {profile}: {str(e)}")
@@ -0,0 +1,79 @@
+from typing import Any, Dict
+import logging
+import time
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+# Longest a page is given to settle before it is analyzed anyway
+DEFAULT_MAX_WAIT = 10.0
+# Seconds without a new network request before the page counts as idle
+DEFAULT_IDLE_WINDOW = 0.5
+DEFAULT_POLL_INTERVAL = 0.1
+
+# Resource Timing entries kept per page instead of the browser's default 250
+RESOURCE_BUFFER_SIZE = 10000
+
+# Resource Timing only lists finished requests, so a count that stops
+# growing means the page has stopped loading things. The first poll
+# enlarges the timing buffer and starts counting with an observer, which
+# sees every later entry even if the buffer filled before the poll
+_READINESS_SCRIPT = """
+    if (window.__readinessResources === undefined) {
+        performance.setResourceTimingBufferSize(RESOURCE_BUFFER_SIZE);
+        window.__readinessResources = performance.getEntriesByType('resource').length;
+        if (window.PerformanceObserver) {
+            new PerformanceObserver(function (list) {
+                window.__readinessResources += list.getEntries().length;
+            }).observe({type: 'resource'});
+        } else {
+            window.__readinessResources = null;
+        }
+    }
+    return {
+        readyState: document.readyState,
+        fontsReady: !document.fonts || document.fonts.status === 'loaded',
+        resources: window.__readinessResources === null
+            ? performance.getEntriesByType('resource').length : window.__readinessResources
+    };
+""".replace('RESOURCE_BUFFER_SIZE', str(RESOURCE_BUFFER_SIZE))
+
+
+def wait_for_page_ready(driver: Any, max_wait: float = DEFAULT_MAX_WAIT,
+                        idle_window: float = DEFAULT_IDLE_WINDOW,
+                        poll_interval: float = DEFAULT_POLL_INTERVAL) -> bool:
+    """Wait until the loaded page is ready to be captured or measured.
+
+    A page is ready once ``document.readyState`` is ``complete``, web fonts
+    have loaded and no network request has finished for ``idle_window``
+    seconds. Returns True when the page became ready and False when
+    ``max_wait`` ran out first, in which case the page is used as it is.
+    """
+    start = time.monotonic()
+    give_up = start + max_wait
+    with tracing.span('browser.wait_ready', 'wait', max_wait=max_wait) as span:
+        last_count = None
+        idle_since = start
+        while True:
+            now = time.monotonic()
+            try:
+                state: Dict[str, Any] = driver.execute_script(_READINESS_SCRIPT) or {}
+            except Exception as e:
+                # The document may be replaced mid-poll by a redirect
+                logger.debug(f"Readiness check failed: {str(e)}")
+                state = {}
+
+            count = state.get('resources')
+            if count != last_count:
+                last_count = count
+                idle_since = now
+            loaded = state.get('readyState') == 'complete' and state.get('fontsReady', True)
+            if loaded and now - idle_since >= idle_window:
+                span.set(ready=True, waited=now - start)
+                return True
+
+            if now >= give_up:
+                logger.debug(f"Page not ready after {max_wait:g} seconds, continuing")
+                span.set(ready=False, waited=now - start)
+                return False
+            time.sleep(min(poll_interval, give_up - now))
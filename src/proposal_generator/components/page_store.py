@@ -0,0 +1,184 @@
+from typing import Dict, Any, Optional
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import requests
+from bs4 import BeautifulSoup
+from . import concurrency
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class StoredPage:
+    """A fetched page shared between analyzers.
+
+    Holds the response, its raw bytes and a lazily parsed BeautifulSoup
+    tree. Analyzers must treat the tree as read-only since it is shared.
+    """
+
+    def __init__(self, url: str, response: Any):
+        self.url = url
+        self.response = response
+        self._soup: Optional[BeautifulSoup] = None
+        self._soup_lock = threading.Lock()
+
+    @property
+    def content(self) -> bytes:
+        return self.response.content
+
+    @property
+    def text(self) -> str:
+        return self.response.text
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Parse the page on first access and reuse the tree afterwards."""
+        with self._soup_lock:
+            if self._soup is None:
+                self._soup = BeautifulSoup(self.response.text, 'html.parser')
+            return self._soup
+
+
+class _FetchAbandoned(Exception):
+    """The fetch a caller was waiting for was cancelled or interrupted."""
+
+
+class PageStore:
+    """Fetches each URL at most once per proposal run.
+
+    Concurrent requests for the same URL wait for the first fetch instead of
+    issuing their own. Failed fetches are remembered too, so every analyzer
+    sees the same error without retrying the request. A fetch that is
+    cancelled is forgotten, and the next caller fetches the page again.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout: float = 30):
+        self.session = session or requests.Session()
+        if session is None:
+            self.session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+        self.timeout = timeout
+        self._entries: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_fetched = 0
+
+    def __contains__(self, url: str) -> bool:
+        """Whether the URL has been fetched or is being fetched."""
+        with self._lock:
+            return url in self._entries
+
+    def _claim(self, url: str):
+        """Return the entry for a URL and whether the caller must fetch it."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self.hits += 1
+                return entry, False
+            entry = concurrent.futures.Future()
+            self._entries[url] = entry
+            self.misses += 1
+            return entry, True
+
+    def _abandon(self, entry: concurrent.futures.Future, url: str) -> None:
+        """Forget a cancelled fetch and let its waiters fetch the page again."""
+        with self._lock:
+            if self._entries.get(url) is entry:
+                del self._entries[url]
+        entry.set_exception(_FetchAbandoned(url))
+
+    def _record(self, entry: concurrent.futures.Future, url: str, response: Any) -> StoredPage:
+        page = StoredPage(url, response)
+        with self._lock:
+            self.bytes_fetched += len(response.content)
+        entry.set_result(page)
+        return page
+
+    def get(self, url: str, timeout: Optional[float] = None) -> StoredPage:
+        """Return the page for a URL, fetching it if no analyzer has yet."""
+        while True:
+            entry, should_fetch = self._claim(url)
+            with tracing.span('http.get', 'http', url=url, reused=not should_fetch) as span:
+                if not should_fetch:
+                    try:
+                        return entry.result()
+                    except _FetchAbandoned:
+                        continue
+
+                try:
+                    logger.debug(f"Fetching {url}")
+                    with concurrency.get_limiter().slot(url) as slot:
+                        response = self.session.get(url, timeout=timeout or self.timeout)
+                        slot.record(response)
+                except Exception as e:
+                    entry.set_exception(e)
+                    raise
+                except BaseException:
+                    self._abandon(entry, url)
+                    raise
+                tracing.record_response(span, response)
+                return self._record(entry, url, response)
+
+    async def get_async(self, url: str, session, timeout: Optional[float] = None,
+                        keep: bool = True) -> StoredPage:
+        """Return the page for a URL without blocking the event loop.
+
+        With ``keep=False`` a page no analyzer has fetched yet is fetched for
+        the caller alone and not stored, so crawls of many pages do not hold
+        every response for the rest of the run.
+        """
+        from . import async_http
+        
+        while True:
+            if keep:
+                entry, should_fetch = self._claim(url)
+            else:
+                with self._lock:
+                    entry = self._entries.get(url)
+                    if entry is None:
+                        self.misses += 1
+                    else:
+                        self.hits += 1
+                should_fetch = entry is None
+            with tracing.span('http.get', 'http', url=url, reused=not should_fetch) as span:
+                if not should_fetch:
+                    try:
+                        # Shielded so a cancelled waiter does not cancel the shared fetch
+                        return await asyncio.shield(asyncio.wrap_future(entry))
+                    except _FetchAbandoned:
+                        continue
+
+                try:
+                    logger.debug(f"Fetching {url}")
+                    async with concurrency.get_limiter().slot_async(url) as slot:
+                        response = await async_http.fetch(session, url, timeout=timeout or self.timeout)
+                        slot.record(response)
+                except Exception as e:
+                    if keep:
+                        entry.set_exception(e)
+                    raise
+                except BaseException:
+                    # A cancelled caller must not fail the other callers waiting for this page
+                    if keep:
+                        self._abandon(entry, url)
+                    raise
+                tracing.record_response(span, response)
+                if not keep:
+                    with self._lock:
+                        self.bytes_fetched += len(response.content)
+                    return StoredPage(url, response)
+                return self._record(entry, url, response)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this store."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'pages': len(self._entries),
+                'bytes_fetched': self.bytes_fetched
+            }
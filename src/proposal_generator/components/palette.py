@@ -0,0 +1,220 @@
+from typing import Dict, Any, List, Optional
+import colorsys
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PALETTE_SIZE = 6
+# Screenshots are downsampled to at most this many pixels before quantizing
+SAMPLE_PIXELS = 64 * 1024
+# Bits kept per channel when grouping pixels into a color histogram
+HISTOGRAM_BITS = 5
+KMEANS_ITERATIONS = 20
+# Clusters closer than this (Euclidean RGB distance) are shades of one color and are merged
+MERGE_DISTANCE = 24
+# Colors with at least this HSV saturation count as brand colors rather than neutrals
+MIN_BRAND_SATURATION = 0.25
+
+
+def _load_pixels(image: Any, max_pixels: int) -> Any:
+    """Decode an image (a path or a PIL image) into an (n, 3) array of sampled RGB pixels."""
+    import numpy as np
+    from PIL import Image
+
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    # Nearest-neighbour sampling keeps real page colors; averaging would
+    # invent blends along every edge
+    factor = int((image.width * image.height / max_pixels) ** 0.5) + 1
+    if factor > 1:
+        size = (max(1, image.width // factor), max(1, image.height // factor))
+        image = image.resize(size, Image.Resampling.NEAREST)
+    if image.mode != 'RGB':
+        # Transparent areas are shown over white
+        if 'A' in image.getbands() or 'transparency' in image.info:
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    return np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+
+def _histogram(pixels: Any) -> Any:
+    """Group pixels by color at ``HISTOGRAM_BITS`` per channel.
+
+    Returns each pixel's bin, and the center and pixel count of every
+    non-empty bin.
+    """
+    import numpy as np
+
+    shift = 8 - HISTOGRAM_BITS
+    quantized = (pixels >> shift).astype(np.int32)
+    keys = (quantized[:, 0] << (2 * HISTOGRAM_BITS)) | (quantized[:, 1] << HISTOGRAM_BITS) | quantized[:, 2]
+    present, pixel_bins, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    mask = (1 << HISTOGRAM_BITS) - 1
+    bins = np.stack([present >> (2 * HISTOGRAM_BITS), (present >> HISTOGRAM_BITS) & mask, present & mask], axis=1)
+    centers = (bins << shift) + (1 << shift) / 2
+    return pixel_bins.reshape(-1), centers.astype(np.float64), counts.astype(np.float64)
+
+
+def _kmeans(colors: Any, weights: Any, k: int, seed: int = 0) -> Any:
+    """Weighted k-means with k-means++ seeding; returns cluster labels per color."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = [colors[np.argmax(weights)]]
+    distances = ((colors - centers[0]) ** 2).sum(axis=1)
+    while len(centers) < k:
+        probabilities = distances * weights
+        if probabilities.sum() == 0:
+            # Fewer distinct colors than clusters
+            break
+        center = colors[rng.choice(len(colors), p=probabilities / probabilities.sum())]
+        centers.append(center)
+        distances = np.minimum(distances, ((colors - center) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        sums = np.stack([np.bincount(labels, weights=weights * colors[:, channel], minlength=len(centers))
+                         for channel in range(3)], axis=1)
+        updated = np.where(totals[:, None] > 0, sums / np.maximum(totals, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=0.5):
+            break
+        centers = updated
+    return ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+
+
+def extract_palette(image: Any, colors: int = DEFAULT_PALETTE_SIZE,
+                    max_pixels: int = SAMPLE_PIXELS) -> List[Dict[str, Any]]:
+    """Find the dominant colors of a screenshot as users see them.
+
+    ``image`` is a file path or a PIL image. The image is downsampled to
+    ``max_pixels``, grouped into a color histogram and clustered with
+    weighted k-means, and clusters that are shades of one color are merged.
+    Returns up to ``colors`` entries with ``hex``, ``rgb``
+    and ``coverage`` (the share of the image, 0-1), most common first.
+    """
+    import numpy as np
+
+    pixels = _load_pixels(image, max_pixels)
+    if not len(pixels):
+        return []
+    pixel_bins, bins, counts = _histogram(pixels)
+    # Cluster the distinct colors, weighted by their pixel counts
+    pixel_labels = _kmeans(bins, counts, min(colors, len(bins)))[pixel_bins]
+
+    # The mean of each cluster's actual pixels, not of histogram bin centers
+    clusters = []
+    for label in np.unique(pixel_labels):
+        members = pixels[pixel_labels == label]
+        clusters.append([members.mean(axis=0), len(members)])
+    clusters = _merge_shades(clusters)
+
+    palette = []
+    for mean, count in sorted(clusters, key=lambda cluster: cluster[1], reverse=True):
+        rgb = tuple(int(round(value)) for value in mean)
+        palette.append({
+            'hex': '#{:02X}{:02X}{:02X}'.format(*rgb),
+            'rgb': rgb,
+            'coverage': round(count / len(pixels), 4)
+        })
+    return palette
+
+
+def _merge_shades(clusters: List[list]) -> List[list]:
+    """Merge ``[mean, count]`` clusters closer than ``MERGE_DISTANCE``, closest pair first."""
+    import numpy as np
+
+    while len(clusters) > 1:
+        pairs = [
+            (np.linalg.norm(first[0] - second[0]), i, j)
+            for i, first in enumerate(clusters) for j, second in enumerate(clusters) if i < j
+        ]
+        distance, i, j = min(pairs)
+        if distance >= MERGE_DISTANCE:
+            break
+        (first_mean, first_count), (second_mean, second_count) = clusters[i], clusters[j]
+        total = first_count + second_count
+        clusters[i] = [(first_mean * first_count + second_mean * second_count) / total, total]
+        del clusters[j]
+    return clusters
+
+
+def combine_palettes(palettes: List[List[Dict[str, Any]]], colors: int = 5) -> List[Dict[str, Any]]:
+    """Combine the palettes of several pages into one site-wide palette.
+
+    Shades of one color are merged and coverage is averaged over the pages,
+    so a color covering half of every page has a coverage of 0.5.
+    """
+    import numpy as np
+
+    palettes = [page_palette for page_palette in palettes if page_palette]
+    if not palettes:
+        return []
+    clusters = [
+        [np.array(color['rgb'], dtype=np.float64), color['coverage'] / len(palettes)]
+        for page_palette in palettes for color in page_palette
+    ]
+    combined = []
+    for mean, coverage in sorted(_merge_shades(clusters), key=lambda cluster: cluster[1], reverse=True)[:colors]:
+        rgb = tuple(int(round(value)) for value in mean)
+        combined.append({
+            'hex': '#{:02X}{:02X}{:02X}'.format(*rgb),
+            'rgb': rgb,
+            'coverage': round(float(coverage), 4)
+        })
+    return combined
+
+
+def _luminance(rgb: tuple) -> float:
+    """WCAG relative luminance."""
+    def channel(value: int) -> float:
+        value /= 255
+        return value / 12.92 if value <= 0.03928 else ((value + 0.055) / 1.055) ** 2.4
+    red, green, blue = (channel(value) for value in rgb)
+    return 0.2126 * red + 0.7152 * green + 0.0722 * blue
+
+
+def contrast_ratio(first: tuple, second: tuple) -> float:
+    lighter, darker = sorted((_luminance(first), _luminance(second)), reverse=True)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def _saturation(rgb: tuple) -> float:
+    return colorsys.rgb_to_hsv(*(value / 255 for value in rgb))[1]
+
+
+def palette_roles(palette: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """Assign design roles to the colors of a palette.
+
+    The most common color is the background and the color contrasting most
+    with it is the text. Saturated colors become primary, secondary and
+    accent in order of coverage, the accent being the most saturated of
+    what remains. Roles without a suitable color are None.
+    """
+    roles: Dict[str, Optional[str]] = dict.fromkeys(('background', 'text', 'primary', 'secondary', 'accent'))
+    if not palette:
+        return roles
+    background = palette[0]
+    roles['background'] = background['hex']
+    rest = palette[1:]
+    if rest:
+        text = max(rest, key=lambda color: contrast_ratio(color['rgb'], background['rgb']))
+        if contrast_ratio(text['rgb'], background['rgb']) >= 3:
+            roles['text'] = text['hex']
+            rest = [color for color in rest if color is not text]
+
+    brand = [color for color in rest if _saturation(color['rgb']) >= MIN_BRAND_SATURATION]
+    if brand:
+        roles['primary'] = brand.pop(0)['hex']
+    if brand:
+        accent = max(brand, key=lambda color: _saturation(color['rgb']))
+        brand.remove(accent)
+        roles['accent'] = accent['hex']
+    if brand:
+        roles['secondary'] = brand[0]['hex']
+    return roles
@@ -1,31 +1,133 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium_stealth import stealth
-import time
+import statistics
+from urllib.parse import urlparse
 from .base_agent import BaseAgent
+from . import browser_pool, har, network_profiles, page_readiness
+from .. import tracing
 
 logger = logging.getLogger(__name__)
 
+# Network and CPU conditions for throttled measurements, after Lighthouse's presets
+THROTTLING_PROFILES = {
+    'slow-4g': {'latency_ms': 150, 'download_kbps': 1638.4, 'upload_kbps': 750, 'cpu_slowdown': 4},
+    'fast-3g': {'latency_ms': 562.5, 'download_kbps': 1474.56, 'upload_kbps': 675, 'cpu_slowdown': 4},
+    'desktop': {'latency_ms': 40, 'download_kbps': 10240, 'upload_kbps': 10240, 'cpu_slowdown': 1}
+}
+
+# Per-run metrics summarized across runs. All are in milliseconds except
+# cumulativeLayoutShift, which is unitless.
+TIMING_METRICS = [
+    'loadTime', 'domContentLoaded', 'firstPaint', 'firstContentfulPaint',
+    'domInteractive', 'serverResponseTime', 'largestContentfulPaint',
+    'cumulativeLayoutShift', 'totalBlockingTime'
+]
+
+# Decimal places kept for stored samples
+SAMPLE_PRECISION = {'cumulativeLayoutShift': 4}
+
+# Core Web Vitals thresholds: (good up to, poor above)
+WEB_VITALS_THRESHOLDS = {
+    'largestContentfulPaint': (2500, 4000),
+    'cumulativeLayoutShift': (0.1, 0.25),
+    'totalBlockingTime': (200, 600)
+}
+
+# Main-thread time beyond this in a task counts as blocking
+LONG_TASK_BLOCKING_MS = 50
+
+# Navigation Timing Level 2 entries are relative to the start of navigation.
+# Paint entries are looked up by name, since pages that never paint have none.
+_NAVIGATION_TIMING_SCRIPT = """
+    const nav = performance.getEntriesByType('navigation')[0];
+    const paint = name => {
+        const entry = performance.getEntriesByName(name, 'paint')[0];
+        return entry ? entry.startTime : null;
+    };
+    return {
+        loadTime: nav ? nav.loadEventEnd : null,
+        domContentLoaded: nav ? nav.domContentLoadedEventEnd : null,
+        firstPaint: paint('first-paint'),
+        firstContentfulPaint: paint('first-contentful-paint'),
+        domInteractive: nav ? nav.domInteractive : null,
+        serverResponseTime: nav ? nav.responseEnd - nav.requestStart : null,
+        pageSize: document.documentElement.innerHTML.length,
+        resourceCount: performance.getEntriesByType('resource').length
+    };
+"""
+
+# Installed before any page script runs. Layout shifts are grouped into
+# session windows (at most 5 s long, with gaps under 1 s) and CLS is the
+# largest window, as in Chrome's definition.
+_WEB_VITALS_COLLECTOR = """
+    (() => {
+        const vitals = window.__webVitals = {lcp: null, cls: 0, longTasks: [], inp: null};
+        const observe = (type, callback, options) => {
+            try {
+                new PerformanceObserver(list => list.getEntries().forEach(callback))
+                    .observe(Object.assign({type: type, buffered: true}, options));
+            } catch (e) {}
+        };
+        observe('largest-contentful-paint', entry => { vitals.lcp = entry.startTime; });
+        let windowValue = 0, windowStart = 0, windowEnd = 0;
+        observe('layout-shift', entry => {
+            if (entry.hadRecentInput) return;
+            if (windowValue && entry.startTime - windowEnd < 1000 && entry.startTime - windowStart < 5000) {
+                windowValue += entry.value;
+            } else {
+                windowValue = entry.value;
+                windowStart = entry.startTime;
+            }
+            windowEnd = entry.startTime;
+            vitals.cls = Math.max(vitals.cls, windowValue);
+        });
+        observe('longtask', entry => { vitals.longTasks.push([entry.startTime, entry.duration]); });
+        observe('event', entry => {
+            if (entry.interactionId) vitals.inp = Math.max(vitals.inp || 0, entry.duration);
+        }, {durationThreshold: 16});
+    })();
+"""
+
+_WEB_VITALS_SCRIPT = "return window.__webVitals || null;"
+
+_RESOURCE_TIMING_SCRIPT = """
+    return performance.getEntriesByType('resource').map(resource => ({
+        name: resource.name,
+        type: resource.initiatorType,
+        duration: resource.duration,
+        size: resource.transferSize || resource.encodedBodySize || 0
+    }));
+"""
+
+_PAGE_METRICS_SCRIPT = """
+    return {
+        images: document.getElementsByTagName('img').length,
+        scripts: document.getElementsByTagName('script').length,
+        stylesheets: document.getElementsByTagName('link').length,
+        iframes: document.getElementsByTagName('iframe').length,
+        totalElements: document.getElementsByTagName('*').length
+    };
+"""
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
 class PerformanceAnalyzer(BaseAgent):
     """Analyzes website performance metrics."""
     
-    def __init__(self):
-        super().__init__()
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
-        self.chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        self.chrome_options.add_experimental_option('useAutomationExtension', False)
-
+    @tracing.traced()
     def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze website performance.
         
         Args:
-            data: Dictionary containing website URL and analysis options
+            data: Dictionary containing website URL and analysis options.
+                ``runs``, ``throttling`` and ``har_path`` are passed to
+                ``analyze_performance``.
             
         Returns:
             Dictionary containing performance analysis results
@@ -35,104 +137,273 @@ class PerformanceAnalyzer(BaseAgent):
             if not url:
                 return {'error': 'No website URL provided'}
             
-            return self.analyze_performance(url)
+            return self.analyze_performance(url, runs=data.get('runs', 1), throttling=data.get('throttling'),
+                                            har_path=data.get('har_path'))
         except Exception as e:
             return self._handle_error(e, "performance analysis")
 
-    def analyze_performance(self, url: str) -> Dict[str, Any]:
-        """Perform comprehensive performance analysis of a website."""
-        driver = None
+    def analyze_performance(self, url: str, runs: int = 1, throttling: Optional[str] = None,
+                            har_path: Optional[str] = None) -> Dict[str, Any]:
+        """Perform comprehensive performance analysis of a website.
+        
+        The page is loaded ``runs`` times with an empty browser cache and, if
+        ``runs`` is more than one, ``runs`` more times with a warm cache.
+        ``timing_metrics`` holds the cold-cache medians, and ``measurement``
+        the median, p75, p95 and variance of each metric per cache state along
+        with the raw samples. ``throttling`` names a ``THROTTLING_PROFILES``
+        entry to emulate; use the same settings for the client and its
+        competitors so their results are comparable.
+
+        With ``har_path``, the network requests of the last cold-cache load
+        are recorded from DevTools events and saved there as a HAR file, and
+        ``har_analysis`` holds the results of ``har.analyze_har`` for it.
+        """
+        if throttling is not None and throttling not in THROTTLING_PROFILES:
+            return {'error': f"Unknown throttling profile '{throttling}'"}
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
+            # Measurements must include every request a visitor's browser makes
+            with browser_pool.get_pool().driver(profile=network_profiles.FULL_FIDELITY) as driver:
+                # Apply stealth mode to avoid detection, once per pooled driver
+                if 'stealth' not in driver.prepared:
+                    from selenium_stealth import stealth
+                    
+                    stealth(driver.driver,
+                        languages=["en-US", "en"],
+                        vendor="Google Inc.",
+                        platform="Win32",
+                        webgl_vendor="Intel Inc.",
+                        renderer="Intel Iris OpenGL Engine",
+                        fix_hairline=True,
+                    )
+                    driver.prepared.add('stealth')
+                
+                # Observe Web Vitals from the start of every page this driver loads
+                if 'web_vitals' not in driver.prepared:
+                    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': _WEB_VITALS_COLLECTOR})
+                    driver.prepared.add('web_vitals')
+                
+                self._set_throttling(driver, THROTTLING_PROFILES.get(throttling))
+                try:
+                    samples = {'cold': [], 'warm': []}
+                    for run in range(runs):
+                        if har_path and run == runs - 1:
+                            # Discard events from earlier loads
+                            driver.get_log('performance')
+                        samples['cold'].append(self._measure_load(driver, url, cold=True))
+                    
+                    if har_path:
+                        recording = self._record_har(driver, url, samples['cold'][-1])
+                    
+                    # Resources and content as loaded with an empty cache
+                    resource_timing = self._summarize_resources(driver.execute_script(_RESOURCE_TIMING_SCRIPT))
+                    page_metrics = driver.execute_script(_PAGE_METRICS_SCRIPT)
+                    
+                    for _ in range(runs if runs > 1 else 0):
+                        samples['warm'].append(self._measure_load(driver, url, cold=False))
+                finally:
+                    # The driver goes back to the pool, so it must not stay throttled
+                    self._set_throttling(driver, None)
             
-            # Apply stealth mode to avoid detection
-            stealth(driver,
-                languages=["en-US", "en"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True,
-            )
-            
-            # Start performance measurement
-            start_time = time.time()
+            if har_path:
+                har.save_har(recording, har_path)
             
-            # Navigate to the URL
-            driver.get(url)
-            
-            # Get performance metrics using Navigation Timing API
-            navigation_timing = driver.execute_script("""
-                const performance = window.performance;
-                const timing = performance.timing;
-                return {
-                    loadTime: timing.loadEventEnd - timing.navigationStart,
-                    domContentLoaded: timing.domContentLoadedEventEnd - timing.navigationStart,
-                    firstPaint: performance.getEntriesByType('paint')[0].startTime,
-                    firstContentfulPaint: performance.getEntriesByType('paint')[1].startTime,
-                    domInteractive: timing.domInteractive - timing.navigationStart,
-                    serverResponseTime: timing.responseEnd - timing.requestStart,
-                    pageSize: document.documentElement.innerHTML.length,
-                    resourceCount: performance.getEntriesByType('resource').length
-                };
-            """)
-            
-            # Get resource timing data
-            resource_timing = driver.execute_script("""
-                return performance.getEntriesByType('resource').map(resource => ({
-                    name: resource.name,
-                    type: resource.initiatorType,
-                    duration: resource.duration,
-                    size: resource.transferSize || 0
-                }));
-            """)
-            
-            # Analyze page content
-            page_metrics = driver.execute_script("""
-                return {
-                    images: document.getElementsByTagName('img').length,
-                    scripts: document.getElementsByTagName('script').length,
-                    stylesheets: document.getElementsByTagName('link').length,
-                    iframes: document.getElementsByTagName('iframe').length,
-                    totalElements: document.getElementsByTagName('*').length
-                };
-            """)
+            measurement = self._summarize_runs(samples, throttling)
+            navigation_timing = dict(samples['cold'][-1])
+            navigation_timing.update({
+                metric: stats['median'] for metric, stats in measurement['statistics']['cold'].items()
+            })
             
             # Calculate scores and recommendations
             scores = self._calculate_performance_scores(navigation_timing, page_metrics)
             recommendations = self._generate_recommendations(navigation_timing, page_metrics, resource_timing)
             
-            return {
+            result = {
                 'timing_metrics': navigation_timing,
+                'web_vitals': self._rate_web_vitals(navigation_timing),
                 'page_metrics': page_metrics,
                 'resource_timing': resource_timing,
                 'performance_scores': scores,
-                'recommendations': recommendations
+                'recommendations': recommendations,
+                'measurement': measurement
             }
+            if har_path:
+                result['har_analysis'] = har.analyze_har(recording)
+            return result
             
         except Exception as e:
             logger.warning(f"Error analyzing performance for {url}: {str(e)}")
             return {'error': str(e)}
-        finally:
-            if driver:
-                driver.quit()
+
+    def _measure_load(self, driver: Any, url: str, cold: bool) -> Dict[str, Any]:
+        """Load the page once and return its navigation timing."""
+        # Leave the page first, so the next load is a navigation rather than a reload
+        driver.driver.get('about:blank')
+        if cold:
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        
+        with tracing.span('browser.get', 'browser', url=url, cache='cold' if cold else 'warm'):
+            driver.get(url)
+        # Let late resources and paints finish so they are included
+        page_readiness.wait_for_page_ready(driver)
+        sample = driver.execute_script(_NAVIGATION_TIMING_SCRIPT)
+        sample.update(self._web_vitals_sample(driver.execute_script(_WEB_VITALS_SCRIPT), sample.get('firstContentfulPaint')))
+        return sample
+
+    @staticmethod
+    def _record_har(driver: Any, url: str, timing: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a HAR log from the DevTools network events of the last load."""
+        def fetch_content(request_id: str) -> Optional[str]:
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            except Exception:
+                # Chrome only keeps recent bodies
+                return None
+            return None if body.get('base64Encoded') else body.get('body')
+        
+        with tracing.span('har.record', 'browser', url=url) as span:
+            log_entries = driver.get_log('performance')
+            recording = har.har_from_performance_log(
+                log_entries, url, title=driver.title, page_timings=timing, fetch_content=fetch_content
+            )
+            span.set(events=len(log_entries), requests=len(recording['log']['entries']))
+        return recording
+
+    @staticmethod
+    def _web_vitals_sample(vitals: Optional[Dict[str, Any]], first_contentful_paint: Optional[float]) -> Dict[str, Any]:
+        """Turn the collector's observations into per-run metrics.
+
+        Headless loads have no user input, so INP is usually missing and Total
+        Blocking Time (long-task time past 50 ms after first contentful paint)
+        stands in for responsiveness.
+        """
+        if not vitals:
+            return {}
+        long_tasks = vitals.get('longTasks') or []
+        start = first_contentful_paint or 0
+        return {
+            'largestContentfulPaint': vitals.get('lcp'),
+            'cumulativeLayoutShift': vitals.get('cls'),
+            'totalBlockingTime': sum(
+                max(0, duration - LONG_TASK_BLOCKING_MS) for task_start, duration in long_tasks if task_start >= start
+            ),
+            'interactionToNextPaint': vitals.get('inp'),
+            'longTasks': len(long_tasks),
+            'longTaskTime': sum(duration for _, duration in long_tasks)
+        }
+
+    @staticmethod
+    def _rate_web_vitals(timing: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Rate each Core Web Vital as good, needs-improvement or poor."""
+        ratings = {}
+        for metric, (good, poor) in WEB_VITALS_THRESHOLDS.items():
+            value = timing.get(metric)
+            if value is None:
+                continue
+            rating = 'good' if value <= good else 'poor' if value > poor else 'needs-improvement'
+            ratings[metric] = {'value': value, 'rating': rating}
+        return ratings
+
+    @staticmethod
+    def _summarize_resources(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Aggregate resource timing entries per initiator type and per host.
+
+        Hosts are limited to the ten that transferred the most bytes.
+        """
+        def summarize(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+            durations = [entry['duration'] for entry in group]
+            return {
+                'count': len(group),
+                'bytes': sum(entry['size'] for entry in group),
+                'total_duration': round(sum(durations), 1),
+                'p95_duration': round(_percentile(durations, 95), 1)
+            }
+        
+        by_type: Dict[str, List[Dict[str, Any]]] = {}
+        by_host: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_type.setdefault(entry['type'] or 'other', []).append(entry)
+            by_host.setdefault(urlparse(entry['name']).netloc or 'other', []).append(entry)
+        
+        hosts = {host: summarize(group) for host, group in by_host.items()}
+        return {
+            'count': len(entries),
+            'bytes': sum(entry['size'] for entry in entries),
+            'by_type': {kind: summarize(group) for kind, group in sorted(by_type.items())},
+            'by_host': dict(sorted(hosts.items(), key=lambda item: item[1]['bytes'], reverse=True)[:10]),
+            'large_images': sum(1 for entry in by_type.get('img', []) if entry['size'] > 200000)
+        }
+
+    @staticmethod
+    def _set_throttling(driver: Any, conditions: Optional[Dict[str, float]]) -> None:
+        """Emulate network and CPU conditions, or remove the emulation."""
+        if conditions is None:
+            network = {'offline': False, 'latency': 0, 'downloadThroughput': -1, 'uploadThroughput': -1}
+            cpu_slowdown = 1
+        else:
+            network = {
+                'offline': False,
+                'latency': conditions['latency_ms'],
+                'downloadThroughput': conditions['download_kbps'] * 1024 / 8,
+                'uploadThroughput': conditions['upload_kbps'] * 1024 / 8
+            }
+            cpu_slowdown = conditions['cpu_slowdown']
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.emulateNetworkConditions', network)
+        driver.execute_cdp_cmd('Emulation.setCPUThrottlingRate', {'rate': cpu_slowdown})
+
+    @staticmethod
+    def _summarize_runs(samples: Dict[str, List[Dict[str, Any]]], throttling: Optional[str]) -> Dict[str, Any]:
+        """Summarize per-run timings as statistics plus compact columns of samples."""
+        summary = {
+            'runs': len(samples['cold']),
+            'throttling': throttling,
+            'statistics': {},
+            'samples': {}
+        }
+        for state, runs in samples.items():
+            columns = {
+                metric: [
+                    round(run[metric], SAMPLE_PRECISION.get(metric)) for run in runs
+                    if run.get(metric) is not None
+                ]
+                for metric in TIMING_METRICS
+            }
+            summary['samples'][state] = columns
+            summary['statistics'][state] = {
+                metric: {
+                    'median': statistics.median(values),
+                    'p75': _percentile(values, 75),
+                    'p95': _percentile(values, 95),
+                    'variance': statistics.variance(values) if len(values) > 1 else 0.0
+                }
+                for metric, values in columns.items() if values
+            }
+        return summary
 
     def _calculate_performance_scores(self, timing: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate performance scores based on metrics."""
+        """Calculate performance scores based on metrics.
+
+        Timings the page did not report are left out, and the overall score
+        is weighted over the scores that remain.
+        """
         scores = {}
+        weights = {'resource_efficiency': 0.3}
         
         # Load Time Score (0-100)
-        load_time = timing['loadTime']
-        if load_time < 2000:
-            scores['load_time'] = 100
-        elif load_time < 3000:
-            scores['load_time'] = 90
-        elif load_time < 4000:
-            scores['load_time'] = 75
-        elif load_time < 5000:
-            scores['load_time'] = 60
-        else:
-            scores['load_time'] = max(0, 100 - (load_time - 5000) / 100)
+        load_time = timing.get('loadTime')
+        if load_time is not None:
+            weights['load_time'] = 0.4
+            if load_time < 2000:
+                scores['load_time'] = 100
+            elif load_time < 3000:
+                scores['load_time'] = 90
+            elif load_time < 4000:
+                scores['load_time'] = 75
+            elif load_time < 5000:
+                scores['load_time'] = 60
+            else:
+                scores['load_time'] = max(0, 100 - (load_time - 5000) / 100)
         
         # Resource Efficiency Score
         resource_count = metrics['scripts'] + metrics['stylesheets'] + metrics['images']
@@ -145,32 +416,34 @@ class PerformanceAnalyzer(BaseAgent):
         else:
             scores['resource_efficiency'] = max(0, 100 - (resource_count - 60))
         
-        # First Paint Score
-        first_paint = timing['firstPaint']
-        if first_paint < 1000:
-            scores['first_paint'] = 100
-        elif first_paint < 2000:
-            scores['first_paint'] = 85
-        elif first_paint < 3000:
-            scores['first_paint'] = 70
-        else:
-            scores['first_paint'] = max(0, 100 - (first_paint - 3000) / 50)
+        # First Paint Score, from first contentful paint if the browser reported no first paint
+        first_paint = timing.get('firstPaint')
+        if first_paint is None:
+            first_paint = timing.get('firstContentfulPaint')
+        if first_paint is not None:
+            weights['first_paint'] = 0.3
+            if first_paint < 1000:
+                scores['first_paint'] = 100
+            elif first_paint < 2000:
+                scores['first_paint'] = 85
+            elif first_paint < 3000:
+                scores['first_paint'] = 70
+            else:
+                scores['first_paint'] = max(0, 100 - (first_paint - 3000) / 50)
         
         # Overall Score (weighted average)
         scores['overall'] = int(
-            (scores['load_time'] * 0.4) +
-            (scores['resource_efficiency'] * 0.3) +
-            (scores['first_paint'] * 0.3)
+            sum(scores[name] * weight for name, weight in weights.items()) / sum(weights.values())
         )
         
         return scores
 
-    def _generate_recommendations(self, timing: Dict[str, Any], metrics: Dict[str, Any], resources: List[Dict[str, Any]]) -> List[str]:
+    def _generate_recommendations(self, timing: Dict[str, Any], metrics: Dict[str, Any], resources: Dict[str, Any]) -> List[str]:
         """Generate performance recommendations based on analysis."""
         recommendations = []
         
         # Load time recommendations
-        if timing['loadTime'] > 3000:
+        if (timing.get('loadTime') or 0) > 3000:
             recommendations.append("Improve page load time (current: {:.1f}s, target: < 3s)".format(timing['loadTime'] / 1000))
         
         # Resource count recommendations
@@ -180,16 +453,23 @@ class PerformanceAnalyzer(BaseAgent):
             recommendations.append(f"Reduce number of CSS files (current: {metrics['stylesheets']}, recommended: < 5)")
         
         # Image optimization recommendations
-        large_images = [r for r in resources if r['type'] == 'img' and r['size'] > 200000]
-        if large_images:
-            recommendations.append(f"Optimize {len(large_images)} large images (size > 200KB)")
+        if resources['large_images']:
+            recommendations.append(f"Optimize {resources['large_images']} large images (size > 200KB)")
         
         # Server response time
-        if timing['serverResponseTime'] > 200:
+        if (timing.get('serverResponseTime') or 0) > 200:
             recommendations.append("Improve server response time (current: {:.1f}ms, target: < 200ms)".format(timing['serverResponseTime']))
         
         # First paint recommendations
-        if timing['firstPaint'] > 1000:
+        if (timing.get('firstPaint') or 0) > 1000:
             recommendations.append("Improve First Paint time (current: {:.1f}s, target: < 1s)".format(timing['firstPaint'] / 1000))
         
-        return recommendations 
\ No newline at end of file
+        # Core Web Vitals recommendations
+        if (timing.get('largestContentfulPaint') or 0) > WEB_VITALS_THRESHOLDS['largestContentfulPaint'][0]:
+            recommendations.append("Improve Largest Contentful Paint (current: {:.1f}s, target: < 2.5s)".format(timing['largestContentfulPaint'] / 1000))
+        if (timing.get('cumulativeLayoutShift') or 0) > WEB_VITALS_THRESHOLDS['cumulativeLayoutShift'][0]:
+            recommendations.append("Reduce layout shifts (current CLS: {:.2f}, target: < 0.1)".format(timing['cumulativeLayoutShift']))
+        if (timing.get('totalBlockingTime') or 0) > WEB_VITALS_THRESHOLDS['totalBlockingTime'][0]:
+            recommendations.append("Break up long JavaScript tasks (total blocking time: {:.0f}ms, target: < 200ms)".format(timing['totalBlockingTime']))
+        
+        return recommendations
@@ -0,0 +1,174 @@
+"""Per-host politeness shared by every component that scrapes the web.
+
+Each host gets a token bucket: a few requests may go out back to back,
+after which requests are spaced at the host's rate. A ``Retry-After``
+header (or a bare 429) pauses that host alone, so waiting on a slow
+directory never holds up requests to unrelated competitor sites.
+"""
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import logging
+import os
+import threading
+import time
+from .. import tracing
+from ..deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUESTS_PER_SECOND = 0.5
+DEFAULT_BURST = 2
+# Directories that block scrapers get a stricter (requests per second, burst);
+# subdomains share their parent's bucket
+HOST_LIMITS = {
+    'martindale.com': (0.2, 1),
+    'justia.com': (0.2, 1),
+    'findlaw.com': (0.2, 1),
+}
+# Longest Retry-After honored; anything longer would outlast the run anyway
+MAX_RETRY_AFTER = 300.0
+# Pause after a 429 that did not say how long to wait
+DEFAULT_BACKOFF = 30.0
+
+
+def _host(url: str) -> str:
+    """The lower-cased host of a URL, or the string itself if it is a bare host."""
+    host = urlparse(url if '//' in url else f"//{url}").hostname or url
+    host = host.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Monotonic time before which the host asked not to be contacted
+        self.blocked_until = 0.0
+        self.requests = 0
+        self.waited = 0.0
+
+
+class HostRateLimiter:
+    """Token buckets keyed by host.
+
+    ``acquire`` reserves a token under the lock and sleeps outside it, so
+    callers for different hosts never wait on each other, and concurrent
+    callers for the same host are spaced out rather than released together.
+    """
+
+    def __init__(self, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: int = DEFAULT_BURST,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.host_limits = HOST_LIMITS if host_limits is None else host_limits
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> Tuple[str, _Bucket]:
+        """The bucket key and bucket for a host; call with the lock held."""
+        key, limits = host, (self.requests_per_second, self.burst)
+        for domain, domain_limits in self.host_limits.items():
+            if host == domain or host.endswith('.' + domain):
+                key, limits = domain, domain_limits
+                break
+        if key not in self._buckets:
+            self._buckets[key] = _Bucket(*limits)
+        return key, self._buckets[key]
+
+    def _reserve(self, url: str) -> Tuple[str, float]:
+        """Take a token for the URL's host; return the host and the seconds to wait for it."""
+        with self._lock:
+            key, bucket = self._bucket(_host(url))
+            now = time.monotonic()
+            bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            # Tokens go negative while requests are queued, which spaces out later callers
+            bucket.tokens -= 1
+            wait = max(0.0, -bucket.tokens / bucket.rate, bucket.blocked_until - now)
+            bucket.requests += 1
+            bucket.waited += wait
+        return key, wait
+
+    def acquire(self, url: str, deadline: Optional[Deadline] = None) -> float:
+        """Block until a request to ``url`` is allowed; return the seconds waited.
+
+        The wait is cut short if the deadline passes, so callers should check
+        ``deadline.expired()`` before sending the request.
+        """
+        host, wait = self._reserve(url)
+        if wait > 0:
+            logger.info(f"Waiting {wait:.1f} seconds before requesting {host}...")
+            with tracing.span('RateLimiter.wait', 'wait', host=host, delay=round(wait, 3)):
+                (deadline or Deadline()).sleep(wait)
+        return wait
+
+    async def acquire_async(self, url: str, deadline: Optional[Deadline] = None) -> float:
+        """Non-blocking ``acquire``."""
+        host, wait = self._reserve(url)
+        if wait > 0:
+            logger.info(f"Waiting {wait:.1f} seconds before requesting {host}...")
+            with tracing.span('RateLimiter.wait', 'wait', host=host, delay=round(wait, 3)):
+                await (deadline or Deadline()).sleep_async(wait)
+        return wait
+
+    def observe(self, url: str, response: Any) -> None:
+        """Pause the host if the response asked for it (429/503 with ``Retry-After``)."""
+        status = getattr(response, 'status_code', None)
+        if status not in (429, 503):
+            return
+        delay = parse_retry_after((getattr(response, 'headers', None) or {}).get('Retry-After'))
+        if delay is None:
+            if status != 429:
+                return
+            delay = DEFAULT_BACKOFF
+        delay = min(delay, MAX_RETRY_AFTER)
+        host = _host(url)
+        with self._lock:
+            _, bucket = self._bucket(host)
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+        logger.warning(f"{host} answered {status}, pausing requests to it for {delay:.0f} seconds")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Requests and total wait per host."""
+        with self._lock:
+            return {
+                host: {'requests': bucket.requests, 'waited': round(bucket.waited, 3)}
+                for host, bucket in self._buckets.items()
+            }
+
+
+_shared_limiter: Optional[HostRateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """The process-wide limiter, so all components share one budget per host."""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            rate = float(os.getenv('PROPOSAL_GENERATOR_REQUESTS_PER_SECOND') or DEFAULT_REQUESTS_PER_SECOND)
+            _shared_limiter = HostRateLimiter(requests_per_second=rate)
+        return _shared_limiter
@@ -0,0 +1,462 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from contextlib import contextmanager
+import atexit
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+from .. import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Thumbnail widths in pixels
+THUMBNAIL_SIZES = {'small': 320, 'medium': 640, 'large': 1280}
+# Thumbnails of taller screenshots show only the top of the page, at this height/width ratio
+MAX_THUMBNAIL_ASPECT = 1.5
+# Screenshots look the same when their difference hashes (512 bits) differ in at most
+# this many bits and the average colors of their 4x4 grid cells differ by at most
+# NEAR_DUPLICATE_COLOR_DIFFERENCE per channel on average
+NEAR_DUPLICATE_BITS = 12
+NEAR_DUPLICATE_COLOR_DIFFERENCE = 8
+# Difference hashes are indexed by this many equal bands. With more bands than
+# NEAR_DUPLICATE_BITS, two hashes that differ in at most that many bits share
+# at least one band exactly, so only images in a shared bucket are compared
+NEAR_DUPLICATE_BANDS = 16
+DIFFERENCE_HASH_BITS = 512
+# Screenshots accessed since a run started are not evicted while the run lasts
+# (at most RUN_LEASE_SECONDS), nor for RUN_RETENTION_SECONDS after it ends, so
+# the PDF and the web interface can still read them
+RUN_LEASE_SECONDS = 3600
+RUN_RETENTION_SECONDS = 900
+
+
+def default_store_path() -> str:
+    """Store location, overridable with the PROPOSAL_GENERATOR_SCREENSHOTS environment variable."""
+    return os.getenv('PROPOSAL_GENERATOR_SCREENSHOTS') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'proposal_generator', 'screenshots'
+    )
+
+
+def difference_hash(image: Any, hash_size: int = 16) -> int:
+    """Perceptual hash of a PIL image.
+
+    Each bit says whether a pixel of a small grayscale copy is brighter than
+    its right or lower neighbour, so both horizontal and vertical structure
+    count. Page screenshots are mostly horizontal bands, which a row-only
+    hash can't tell apart.
+    """
+    from PIL import Image
+
+    small = image.convert('L').resize((hash_size + 1, hash_size + 1), Image.Resampling.BOX)
+    width = hash_size + 1
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for column in range(hash_size):
+            pixel = pixels[row * width + column]
+            brighter_than_right = pixel > pixels[row * width + column + 1]
+            brighter_than_below = pixel > pixels[(row + 1) * width + column]
+            value = (value << 2) | (brighter_than_right << 1) | brighter_than_below
+    return value
+
+
+def color_signature(image: Any) -> bytes:
+    """Average RGB color of each cell of a 4x4 grid, which gradient hashes ignore."""
+    from PIL import Image
+
+    return image.convert('RGB').resize((4, 4), Image.Resampling.BOX).tobytes()
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count('1')
+
+
+def _looks_alike(first: tuple, second: tuple) -> bool:
+    """Whether two (difference hash, color signature) pairs belong to near-identical images."""
+    if hamming_distance(first[0], second[0]) > NEAR_DUPLICATE_BITS:
+        return False
+    color_difference = sum(abs(a - b) for a, b in zip(first[1], second[1])) / len(first[1])
+    return color_difference <= NEAR_DUPLICATE_COLOR_DIFFERENCE
+
+
+def _bands(dhash: int) -> List[Tuple[int, int]]:
+    """(band number, band value) keys of a difference hash."""
+    width = DIFFERENCE_HASH_BITS // NEAR_DUPLICATE_BANDS
+    mask = (1 << width) - 1
+    return [(band, (dhash >> (band * width)) & mask) for band in range(NEAR_DUPLICATE_BANDS)]
+
+
+class _LooksIndex:
+    """In-memory index of stored screenshots by difference hash bands."""
+
+    def __init__(self):
+        self._looks: Dict[str, Tuple[tuple, Optional[str]]] = {}
+        self._buckets: Dict[Tuple[int, int], Set[str]] = {}
+
+    def add(self, content_hash: str, looks: tuple, url: Optional[str]) -> None:
+        self._looks[content_hash] = (looks, url)
+        for key in _bands(looks[0]):
+            self._buckets.setdefault(key, set()).add(content_hash)
+
+    def remove(self, content_hash: str) -> None:
+        entry = self._looks.pop(content_hash, None)
+        if entry is None:
+            return
+        for key in _bands(entry[0][0]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(content_hash)
+                if not bucket:
+                    del self._buckets[key]
+
+    def candidates(self, looks: tuple) -> List[Tuple[str, tuple, Optional[str]]]:
+        """Stored screenshots sharing at least one band with ``looks``."""
+        hashes = set()
+        for key in _bands(looks[0]):
+            hashes.update(self._buckets.get(key, ()))
+        return [(content_hash, *self._looks[content_hash]) for content_hash in hashes]
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+class ScreenshotStore:
+    """Content-addressed store for screenshots and their thumbnails.
+
+    Screenshots are stored once per distinct PNG content, under the SHA-256
+    of their bytes. A screenshot that looks like one already stored (by
+    difference hash and average colors) is still stored, and recorded as a
+    ``near_duplicate_of`` that one, preferring a match from the same URL.
+    Thumbnails at ``THUMBNAIL_SIZES`` are created on first use and kept, as
+    WebP when Pillow supports it and as optimized PNG otherwise. Once the
+    store grows past ``max_bytes`` the least recently used screenshots are
+    evicted together with their thumbnails, except those accessed during
+    a run holding a ``lease``.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or default_store_path()
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Near-duplicate lookups use this index instead of the database, and
+        # never hold the database lock while comparing
+        self._index: Optional[_LooksIndex] = None
+        self._index_lock = threading.Lock()
+        self.stored = 0
+        self.duplicates = 0
+        self.near_duplicates = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the index on first use."""
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS screenshots ('
+                'hash TEXT PRIMARY KEY, dhash TEXT NOT NULL, colors BLOB NOT NULL, url TEXT, width INTEGER NOT NULL, '
+                'height INTEGER NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL, near_duplicate_of TEXT)'
+            )
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(screenshots)')]
+            if 'near_duplicate_of' not in columns:
+                conn.execute('ALTER TABLE screenshots ADD COLUMN near_duplicate_of TEXT')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS thumbnails ('
+                'hash TEXT NOT NULL, name TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, '
+                'PRIMARY KEY (hash, name))'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS leases ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, expires REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS screenshots_last_access ON screenshots (last_access)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _original_path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.png")
+
+    def put(self, png: bytes, url: Optional[str] = None, near_duplicates: bool = True) -> Dict[str, Any]:
+        """Store a PNG screenshot unless it is already stored.
+
+        Returns the ``hash`` and ``path`` of the stored screenshot, whether
+        it was a ``duplicate`` of an identical one, and the hash of a stored
+        screenshot it looks the same as in ``near_duplicate_of`` (or None).
+        With ``near_duplicates`` False no lookalikes are searched for.
+        """
+        from PIL import Image
+
+        content_hash = hashlib.sha256(png).hexdigest()
+        now = time.time()
+        with tracing.span('screenshots.put', 'image', bytes=len(png)) as span:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    'SELECT near_duplicate_of FROM screenshots WHERE hash = ?', (content_hash,)
+                ).fetchone()
+                if row:
+                    conn.execute('UPDATE screenshots SET last_access = ? WHERE hash = ?', (now, content_hash))
+                    conn.commit()
+                    self.duplicates += 1
+                    span.set(duplicate=True)
+                    return {
+                        'hash': content_hash,
+                        'path': self._original_path(content_hash),
+                        'duplicate': True,
+                        'near_duplicate_of': row[0]
+                    }
+
+            image = Image.open(io.BytesIO(png))
+            looks = (difference_hash(image), color_signature(image))
+            near_duplicate_of = self._find_lookalike(looks, url) if near_duplicates else None
+
+            path = self._original_path(content_hash)
+            _write_atomic(path, png)
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    'INSERT OR REPLACE INTO screenshots '
+                    '(hash, dhash, colors, url, width, height, size, last_access, near_duplicate_of) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (content_hash, f'{looks[0]:x}', looks[1], url, image.width, image.height, len(png), now,
+                     near_duplicate_of)
+                )
+                evicted = self._evict(conn, keep=content_hash)
+                conn.commit()
+                self.stored += 1
+                if near_duplicate_of:
+                    self.near_duplicates += 1
+            with self._index_lock:
+                if self._index is not None:
+                    self._index.add(content_hash, looks, url)
+            self._unindex(evicted)
+            span.set(duplicate=False, near_duplicate=bool(near_duplicate_of))
+            return {'hash': content_hash, 'path': path, 'duplicate': False, 'near_duplicate_of': near_duplicate_of}
+
+    def _find_lookalike(self, looks: tuple, url: Optional[str]) -> Optional[str]:
+        """Hash of a stored screenshot that looks like ``looks``, preferring one of ``url``."""
+        with self._index_lock:
+            if self._index is None:
+                # Screenshots stored by other processes later are not indexed,
+                # which only means fewer near duplicates are reported
+                with self._lock:
+                    rows = self._connection().execute('SELECT hash, dhash, colors, url FROM screenshots').fetchall()
+                self._index = _LooksIndex()
+                for existing, existing_dhash, existing_colors, existing_url in rows:
+                    self._index.add(existing, (int(existing_dhash, 16), existing_colors), existing_url)
+            candidates = self._index.candidates(looks)
+
+        match = None
+        for existing, existing_looks, existing_url in candidates:
+            if _looks_alike(looks, existing_looks):
+                if url is not None and existing_url == url:
+                    return existing
+                match = match or existing
+        return match
+
+    def _unindex(self, hashes: List[str]) -> None:
+        with self._index_lock:
+            if self._index is not None:
+                for content_hash in hashes:
+                    self._index.remove(content_hash)
+
+    @contextmanager
+    def lease(self):
+        """Keep the screenshots a run accesses from being evicted.
+
+        Screenshots stored or read after the lease starts stay until
+        ``RUN_RETENTION_SECONDS`` after it ends, in every process sharing
+        the store.
+        """
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            lease_id = conn.execute(
+                'INSERT INTO leases (started, expires) VALUES (?, ?)', (now, now + RUN_LEASE_SECONDS)
+            ).lastrowid
+            conn.commit()
+        try:
+            yield
+        finally:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    'UPDATE leases SET expires = ? WHERE id = ?', (time.time() + RUN_RETENTION_SECONDS, lease_id)
+                )
+                conn.commit()
+
+    def put_file(self, path: str, url: Optional[str] = None, near_duplicates: bool = True) -> Dict[str, Any]:
+        """Store an image file, converting it to PNG if necessary."""
+        from PIL import Image
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(b'\x89PNG'):
+            buffer = io.BytesIO()
+            Image.open(io.BytesIO(data)).save(buffer, 'PNG')
+            data = buffer.getvalue()
+        return self.put(data, url, near_duplicates)
+
+    def path(self, content_hash: str) -> Optional[str]:
+        """Path of a stored screenshot, or None if it is not (or no longer) stored."""
+        with self._lock:
+            row = self._connection().execute('SELECT 1 FROM screenshots WHERE hash = ?', (content_hash,)).fetchone()
+        return self._original_path(content_hash) if row else None
+
+    def thumbnail(self, content_hash: str, size: str = 'medium') -> Optional[str]:
+        """Path of a thumbnail of a stored screenshot, creating it on first use.
+
+        ``size`` is a ``THUMBNAIL_SIZES`` name. Returns None if the
+        screenshot is not stored.
+        """
+        from PIL import Image, features
+
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Unknown thumbnail size '{size}'")
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            if not conn.execute('SELECT 1 FROM screenshots WHERE hash = ?', (content_hash,)).fetchone():
+                return None
+            conn.execute('UPDATE screenshots SET last_access = ? WHERE hash = ?', (now, content_hash))
+            conn.commit()
+            row = conn.execute(
+                'SELECT path FROM thumbnails WHERE hash = ? AND name = ?', (content_hash, size)
+            ).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+
+        with tracing.span('screenshots.thumbnail', 'image', size=size):
+            image = Image.open(self._original_path(content_hash))
+            width = min(THUMBNAIL_SIZES[size], image.width)
+            # Crop long pages to their top before scaling, which is also far cheaper
+            crop_height = min(image.height, int(image.width * MAX_THUMBNAIL_ASPECT))
+            image = image.crop((0, 0, image.width, crop_height))
+            image = image.resize((width, max(1, round(crop_height * width / image.width))), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            if features.check('webp'):
+                extension = 'webp'
+                image.save(buffer, 'WEBP', quality=80, method=4)
+            else:
+                extension = 'png'
+                image.convert('RGB').quantize(256).save(buffer, 'PNG', optimize=True)
+            path = os.path.join(self.root, 'thumbnails', f"{content_hash}_{size}.{extension}")
+            _write_atomic(path, buffer.getvalue())
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO thumbnails (hash, name, path, size) VALUES (?, ?, ?, ?)',
+                (content_hash, size, path, buffer.tell())
+            )
+            evicted = self._evict(conn, keep=content_hash)
+            conn.commit()
+        self._unindex(evicted)
+        return path
+
+    def _evict(self, conn: sqlite3.Connection, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used screenshots and their thumbnails until under the size limit.
+
+        Screenshots accessed since the start of a lease that has not expired
+        are kept. Returns the hashes of the removed screenshots.
+        """
+        total = conn.execute(
+            'SELECT (SELECT COALESCE(SUM(size), 0) FROM screenshots) + (SELECT COALESCE(SUM(size), 0) FROM thumbnails)'
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return []
+        now = time.time()
+        conn.execute('DELETE FROM leases WHERE expires <= ?', (now,))
+        floor = conn.execute('SELECT MIN(started) FROM leases').fetchone()[0]
+        evicted = []
+        rows = conn.execute(
+            'SELECT hash, size FROM screenshots WHERE last_access < COALESCE(?, last_access + 1) ORDER BY last_access',
+            (floor,)
+        ).fetchall()
+        for content_hash, size in rows:
+            if content_hash == keep:
+                continue
+            thumbnails = conn.execute('SELECT path, size FROM thumbnails WHERE hash = ?', (content_hash,)).fetchall()
+            for path in [self._original_path(content_hash)] + [path for path, _ in thumbnails]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            conn.execute('DELETE FROM thumbnails WHERE hash = ?', (content_hash,))
+            conn.execute('DELETE FROM screenshots WHERE hash = ?', (content_hash,))
+            evicted.append(content_hash)
+            total -= size + sum(thumbnail_size for _, thumbnail_size in thumbnails)
+            if total <= self.max_bytes:
+                break
+        return evicted
+
+    def purge(self) -> int:
+        """Delete every screenshot and thumbnail and return how many screenshots were removed."""
+        with self._lock:
+            conn = self._connection()
+            hashes = [row[0] for row in conn.execute('SELECT hash FROM screenshots')]
+            thumbnails = [row[0] for row in conn.execute('SELECT path FROM thumbnails')]
+            for path in [self._original_path(content_hash) for content_hash in hashes] + thumbnails:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            conn.execute('DELETE FROM thumbnails')
+            conn.execute('DELETE FROM screenshots')
+            conn.commit()
+        with self._index_lock:
+            self._index = None
+        logger.info(f"Purged {len(hashes)} stored screenshots")
+        return len(hashes)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters and current size of the store."""
+        with self._lock:
+            conn = self._connection()
+            screenshots, screenshot_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM screenshots'
+            ).fetchone()
+            thumbnails, thumbnail_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM thumbnails'
+            ).fetchone()
+            return {
+                'stored': self.stored,
+                'duplicates': self.duplicates,
+                'near_duplicates': self.near_duplicates,
+                'screenshots': screenshots,
+                'thumbnails': thumbnails,
+                'bytes': screenshot_bytes + thumbnail_bytes
+            }
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_shared_store: Optional[ScreenshotStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_store() -> ScreenshotStore:
+    """The process-wide screenshot store."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ScreenshotStore()
+            atexit.register(_shared_store.close)
+        return _shared_store
@@ -1,13 +1,8 @@
 from typing import Dict, List, Any
 import requests
 from bs4 import BeautifulSoup
-from textblob import TextBlob
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from .base_agent import BaseAgent
+from .. import tracing
 
 class SentimentAnalyzer(BaseAgent):
     """Analyzes sentiment from various review sites and social media."""
@@ -19,11 +14,8 @@ class SentimentAnalyzer(BaseAgent):
             'yelp': 'https://www.yelp.com/search?find_desc={business_name}',
             'trustpilot': 'https://www.trustpilot.com/search?query={business_name}'
         }
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
 
+    @tracing.traced()
     def process(self, client_brief: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process client brief and gather sentiment analysis."""
         business_name = client_brief.get('client_name', '')
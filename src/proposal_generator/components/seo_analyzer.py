@@ -1,26 +1,35 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import logging
 from .base_agent import BaseAgent
+from .page_store import PageStore
+from .. import tracing
+from ..deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
 class SEOAnalyzer(BaseAgent):
     """Analyzes websites for SEO optimization."""
     
+    # Bump when the analysis output changes to invalidate cached results
+    CACHE_VERSION = 1
+    
     def __init__(self):
         super().__init__()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
-    def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    @tracing.traced()
+    def process(self, data: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Analyze website SEO.
         
         Args:
             data: Dictionary containing website URL and analysis options
+            context: Optional run context holding a shared ``page_store`` and ``analysis_cache``
             
         Returns:
             Dictionary containing SEO analysis results
@@ -30,16 +39,85 @@ class SEOAnalyzer(BaseAgent):
             if not url:
                 return {'error': 'No website URL provided'}
             
-            return self.analyze_seo(url)
+            cached = self._cached_analysis(url, context)
+            if cached is not None:
+                return cached
+            
+            timeout = Deadline.of(context).timeout(30)
+            analysis = self.analyze_seo(url, (context or {}).get('page_store'), timeout)
+            return self._cache_analysis(url, analysis, context)
+        except Exception as e:
+            return self._handle_error(e, "SEO analysis")
+
+    @tracing.traced()
+    async def process_async(self, data: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Analyze website SEO without blocking the event loop."""
+        try:
+            url = data.get('website')
+            if not url:
+                return {'error': 'No website URL provided'}
+            
+            cached = self._cached_analysis(url, context)
+            if cached is not None:
+                return cached
+            
+            timeout = Deadline.of(context).timeout(30)
+            analysis = await self.analyze_seo_async(url, (context or {}).get('page_store'), timeout)
+            return self._cache_analysis(url, analysis, context)
         except Exception as e:
             return self._handle_error(e, "SEO analysis")
 
-    def analyze_seo(self, url: str) -> Dict[str, Any]:
+    def _cached_analysis(self, url: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached SEO analysis, if the run has a cache."""
+        cache = (context or {}).get('analysis_cache')
+        if cache is None:
+            return None
+        cached = cache.get('seo', self.CACHE_VERSION, url)
+        if cached is not None:
+            logger.info(f"Using cached SEO analysis of {url}")
+        return cached
+
+    def _cache_analysis(self, url: str, results: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Store a successful analysis in the run's cache and return it."""
+        cache = (context or {}).get('analysis_cache')
+        if cache is not None and not results.get('error'):
+            cache.set('seo', self.CACHE_VERSION, url, results)
+        return results
+
+    def _page_store(self, page_store: Optional[PageStore]) -> PageStore:
+        """Use the run's shared page store, or a private one for standalone calls."""
+        if page_store is not None:
+            return page_store
+        session = requests.Session()
+        session.headers.update(self.headers)
+        return PageStore(session=session)
+
+    def analyze_seo(self, url: str, page_store: Optional[PageStore] = None, timeout: float = 30) -> Dict[str, Any]:
         """Perform comprehensive SEO analysis of a website."""
         try:
-            response = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            page = self._page_store(page_store).get(url, timeout=timeout)
+            return self._analyze_soup(url, page.soup)
+        except Exception as e:
+            logger.warning(f"Error analyzing SEO for {url}: {str(e)}")
+            return {'error': str(e)}
+
+    async def analyze_seo_async(self, url: str, page_store: Optional[PageStore] = None,
+                                timeout: float = 30) -> Dict[str, Any]:
+        """Perform comprehensive SEO analysis of a website using a non-blocking fetch."""
+        try:
+            from . import async_http
             
+            page_store = self._page_store(page_store)
+            async with async_http.create_session(self.headers) as session:
+                page = await page_store.get_async(url, session, timeout=timeout)
+            return await asyncio.to_thread(lambda: self._analyze_soup(url, page.soup))
+        except Exception as e:
+            logger.warning(f"Error analyzing SEO for {url}: {str(e)}")
+            return {'error': str(e)}
+
+    def _analyze_soup(self, url: str, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Analyze the SEO elements of a parsed page."""
+        try:
             # Basic SEO elements
             title = soup.title.string if soup.title else None
             meta_description = soup.find('meta', {'name': 'description'})
@@ -0,0 +1,295 @@
+"""Page discovery from robots.txt and sitemaps.
+
+``discover`` (or ``discover_async``) reads the site's robots.txt, then walks
+the sitemaps it lists (or the first of ``DEFAULT_SITEMAP_PATHS`` found), following sitemap indexes and
+gunzipping ``.xml.gz`` files. Sitemaps are parsed as they download, one
+``<url>`` element at a time, so a 50,000-URL sitemap is never held in
+memory; only the best ``MAX_DISCOVERED_PAGES`` URLs are kept. URLs are
+ranked like crawl links, with a bonus for recently modified pages, and
+URLs robots.txt disallows are dropped.
+"""
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Iterable
+from datetime import datetime, timezone
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+import heapq
+import itertools
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+from . import concurrency, crawler
+from .urls import canonicalize_url, resolve_url
+from .. import tracing
+from ..deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+# Token matched against robots.txt User-agent lines
+ROBOTS_USER_AGENT = 'WebsiteAnalyzer'
+# Tried in order when robots.txt lists no sitemaps, until one exists
+DEFAULT_SITEMAP_PATHS = ['/sitemap.xml', '/sitemap_index.xml']
+# Sitemap files read per site, including indexes
+MAX_SITEMAP_FILES = 20
+# Sitemap entries read per site by default; the protocol allows 50,000 per file
+MAX_SITEMAP_URLS = 50_000
+# Best-ranked pages kept from the sitemaps
+MAX_DISCOVERED_PAGES = crawler.MAX_FRONTIER
+CHUNK_SIZE = 64 * 1024
+# Priority bonus for a page modified today, halving every LASTMOD_HALF_LIFE_DAYS
+LASTMOD_BONUS = 2.0
+LASTMOD_HALF_LIFE_DAYS = 180
+# Sitemap entries are treated as one click from the homepage
+SITEMAP_DEPTH = 1
+
+
+def _parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a W3C datetime (``2024-05-01`` or ``2024-05-01T10:00:00Z``)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def lastmod_bonus(lastmod: Optional[datetime], now: Optional[datetime] = None) -> float:
+    """Extra crawl priority for recently modified pages."""
+    if lastmod is None:
+        return 0.0
+    age_days = max(0.0, ((now or datetime.now(timezone.utc)) - lastmod).total_seconds() / 86400)
+    return LASTMOD_BONUS * 0.5 ** (age_days / LASTMOD_HALF_LIFE_DAYS)
+
+
+class SitemapParser:
+    """Incremental parser for sitemap and sitemap index files.
+
+    ``feed`` takes raw bytes as they arrive (gzip is detected from the first
+    bytes) and yields the entries they complete as
+    ``{'kind': 'url' or 'sitemap', 'loc': ..., 'lastmod': ...}``. Parsed
+    elements are discarded straight away.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root = None
+        self._gunzip = None
+        self._started = False
+
+    @staticmethod
+    def _name(tag: str) -> str:
+        return tag.rsplit('}', 1)[-1]
+
+    def _entries(self) -> Iterator[Dict[str, Any]]:
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = element
+                continue
+            kind = self._name(element.tag)
+            if kind not in ('url', 'sitemap'):
+                continue
+            fields = {self._name(child.tag): (child.text or '').strip() for child in element}
+            element.clear()
+            if self._root is not None and element in self._root:
+                self._root.remove(element)
+            if fields.get('loc'):
+                yield {'kind': kind, 'loc': fields['loc'], 'lastmod': _parse_lastmod(fields.get('lastmod'))}
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        if not self._started:
+            self._started = True
+            if chunk[:2] == b'\x1f\x8b':
+                self._gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._gunzip is None:
+            self._parser.feed(chunk)
+            yield from self._entries()
+            return
+        # Sitemaps compress well; inflate a bounded piece at a time so one chunk cannot balloon
+        while chunk:
+            self._parser.feed(self._gunzip.decompress(chunk, CHUNK_SIZE))
+            chunk = self._gunzip.unconsumed_tail
+            yield from self._entries()
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        if self._gunzip is not None:
+            self._parser.feed(self._gunzip.flush())
+        self._parser.close()
+        yield from self._entries()
+
+
+class SiteDiscovery:
+    """What robots.txt and the sitemaps say about one site."""
+
+    def __init__(self, base_url: str, max_entries: int = MAX_SITEMAP_URLS, user_agent: str = ROBOTS_USER_AGENT):
+        self.base_url = base_url
+        self.max_entries = max_entries
+        self.user_agent = user_agent
+        self.robots: Optional[RobotFileParser] = None
+        self.sitemaps: List[str] = []
+        self.sitemaps_read = 0
+        self.entries_read = 0
+        host = urlparse(canonicalize_url(base_url)).netloc
+        self._hosts = {host, host[4:] if host.startswith('www.') else f"www.{host}"}
+        self._pages: List[Tuple[float, int, str]] = []
+        self._order = itertools.count()
+        self._now = datetime.now(timezone.utc)
+
+    def robots_url(self) -> str:
+        return urljoin(self.base_url, '/robots.txt')
+
+    def read_robots(self, text: str) -> None:
+        """Use a fetched robots.txt; its Sitemap lines become the sitemaps to read."""
+        self.robots = RobotFileParser(self.robots_url())
+        self.robots.parse(text.splitlines())
+        self.sitemaps = list(self.robots.site_maps() or [])
+
+    def allowed(self, url: str) -> bool:
+        """Whether robots.txt lets us fetch the URL; everything is allowed without one."""
+        return self.robots is None or self.robots.can_fetch(self.user_agent, url)
+
+    def sitemap_urls(self) -> List[str]:
+        return self.sitemaps or [urljoin(self.base_url, path) for path in DEFAULT_SITEMAP_PATHS]
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        """Rank a page from a sitemap, keeping only the best ``MAX_DISCOVERED_PAGES``."""
+        url = resolve_url(entry['loc'], base=self.base_url)
+        if urlparse(canonicalize_url(url)).netloc not in self._hosts or not self.allowed(url):
+            return
+        score = crawler.score_url(url, SITEMAP_DEPTH) + lastmod_bonus(entry['lastmod'], self._now)
+        item = (score, next(self._order), url)
+        if len(self._pages) < MAX_DISCOVERED_PAGES:
+            heapq.heappush(self._pages, item)
+        elif item > self._pages[0]:
+            heapq.heapreplace(self._pages, item)
+
+    def pages(self) -> List[Tuple[str, float]]:
+        """Discovered ``(url, priority)`` pairs, best first."""
+        return [(url, score) for score, _, url in sorted(self._pages, reverse=True)]
+
+
+def _walk_order(discovery: SiteDiscovery) -> Iterator[Tuple[str, List[str]]]:
+    """Yield each sitemap URL to read with a list for the sitemaps it nests, read after it."""
+    queue = list(discovery.sitemap_urls())
+    defaults = set() if discovery.sitemaps else set(queue)
+    seen = set()
+    while queue and discovery.sitemaps_read < MAX_SITEMAP_FILES and discovery.entries_read < discovery.max_entries:
+        url = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        nested: List[str] = []
+        read_before = discovery.sitemaps_read
+        yield url, nested
+        if url in defaults and discovery.sitemaps_read > read_before:
+            # The other default locations are alternatives, not further sitemaps
+            queue = [queued for queued in queue if queued not in defaults]
+        queue.extend(nested)
+
+
+def _handle(discovery: SiteDiscovery, entries: Iterable[Dict[str, Any]], nested: List[str]) -> bool:
+    """Record parsed entries; return False once enough entries have been read."""
+    for entry in entries:
+        if entry['kind'] == 'sitemap':
+            nested.append(entry['loc'])
+            continue
+        discovery.entries_read += 1
+        discovery.add_entry(entry)
+        if discovery.entries_read >= discovery.max_entries:
+            return False
+    return True
+
+
+def _summarize(discovery: SiteDiscovery) -> SiteDiscovery:
+    tracing.current_span().set(robots=discovery.robots is not None, sitemaps=discovery.sitemaps_read,
+                               entries=discovery.entries_read, pages=len(discovery._pages))
+    return discovery
+
+
+@tracing.traced(name='SiteDiscovery.discover')
+def discover(session, base_url: str, deadline: Optional[Deadline] = None,
+             max_entries: int = MAX_SITEMAP_URLS, timeout: float = 10) -> SiteDiscovery:
+    """Read robots.txt and the sitemaps with a ``requests`` session.
+
+    Stops after ``max_entries`` sitemap entries or when the deadline expires.
+    """
+    deadline = deadline or Deadline()
+    discovery = SiteDiscovery(base_url, max_entries)
+    limiter = concurrency.get_limiter()
+    try:
+        with tracing.span('http.get', 'http', url=discovery.robots_url()) as span, \
+                limiter.slot(discovery.robots_url()) as slot:
+            response = session.get(discovery.robots_url(), timeout=deadline.timeout(timeout))
+            slot.record(response)
+            tracing.record_response(span, response)
+        if response.status_code == 200:
+            discovery.read_robots(response.text)
+    except Exception as e:
+        logger.debug(f"Could not read robots.txt of {base_url}: {str(e)}")
+
+    for sitemap_url, nested in _walk_order(discovery):
+        if deadline.expired():
+            break
+        parser = SitemapParser()
+        try:
+            with tracing.span('http.get', 'http', url=sitemap_url, streamed=True) as span, \
+                    limiter.slot(sitemap_url) as slot:
+                with session.get(sitemap_url, timeout=deadline.timeout(timeout), stream=True) as response:
+                    slot.record(response)
+                    span.set(status=response.status_code)
+                    if response.status_code != 200:
+                        continue
+                    discovery.sitemaps_read += 1
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        if deadline.expired() or not _handle(discovery, parser.feed(chunk), nested):
+                            break
+                    else:
+                        _handle(discovery, parser.close(), nested)
+        except Exception as e:
+            logger.warning(f"Error reading sitemap {sitemap_url}: {str(e)}")
+    return _summarize(discovery)
+
+
+@tracing.traced(name='SiteDiscovery.discover')
+async def discover_async(session, base_url: str, deadline: Optional[Deadline] = None,
+                         max_entries: int = MAX_SITEMAP_URLS, timeout: float = 10) -> SiteDiscovery:
+    """Non-blocking ``discover`` with an ``aiohttp`` session."""
+    import aiohttp
+
+    deadline = deadline or Deadline()
+    discovery = SiteDiscovery(base_url, max_entries)
+    limiter = concurrency.get_limiter()
+    try:
+        with tracing.span('http.get', 'http', url=discovery.robots_url()) as span:
+            async with limiter.slot_async(discovery.robots_url()) as slot:
+                async with session.get(discovery.robots_url(),
+                                       timeout=aiohttp.ClientTimeout(total=deadline.timeout(timeout))) as response:
+                    slot.record(response)
+                    span.set(status=response.status)
+                    if response.status == 200:
+                        discovery.read_robots(await response.text(errors='replace'))
+    except Exception as e:
+        logger.debug(f"Could not read robots.txt of {base_url}: {str(e)}")
+
+    for sitemap_url, nested in _walk_order(discovery):
+        if deadline.expired():
+            break
+        parser = SitemapParser()
+        try:
+            with tracing.span('http.get', 'http', url=sitemap_url, streamed=True) as span:
+                async with limiter.slot_async(sitemap_url) as slot:
+                    async with session.get(sitemap_url,
+                                           timeout=aiohttp.ClientTimeout(total=deadline.timeout(timeout))) as response:
+                        slot.record(response)
+                        span.set(status=response.status)
+                        if response.status != 200:
+                            continue
+                        discovery.sitemaps_read += 1
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            if deadline.expired() or not _handle(discovery, parser.feed(chunk), nested):
+                                break
+                        else:
+                            _handle(discovery, parser.close(), nested)
+        except Exception as e:
+            logger.warning(f"Error reading sitemap {sitemap_url}: {str(e)}")
+    return _summarize(discovery)
@@ -0,0 +1,86 @@
+"""URL canonicalization, so one page is fetched and counted once.
+
+``/about``, ``/about/``, ``/about/?utm_source=x`` and ``/about#team`` on
+``HTTP://Example.com:80`` all canonicalize to ``http://example.com/about``.
+Paths keep their case, so ``/About`` stays a different page.
+The canonical form is a key for comparing URLs; pages are fetched at the
+URL they were linked as (see ``resolve_url``).
+"""
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, urljoin, urldefrag, unquote_plus
+import re
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Query parameters that only track where a visitor came from
+TRACKING_PARAMETERS = {
+    'gclid', 'dclid', 'gbraid', 'wbraid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'twclid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMETERS or name.startswith(TRACKING_PREFIXES)
+
+
+def resolve_url(url: str, base: Optional[str] = None) -> str:
+    """The absolute URL a link points at, without its fragment, which is never sent to the server."""
+    if base:
+        url = urljoin(base, url)
+    return urldefrag(url.strip())[0]
+
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> str:
+    """Reduce a URL to the form used to decide whether two links are the same page.
+
+    Resolves ``url`` against ``base``, lower-cases the scheme and host, drops
+    default ports, fragments and tracking parameters, sorts the remaining
+    query parameters (keeping their original encoding) and removes trailing
+    and repeated slashes from the path. Paths are left case-sensitive since
+    servers may treat them so.
+    """
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        # IPv6 literals keep their brackets
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if parts.username:
+        netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+    query = '&'.join(sorted(
+        parameter for parameter in parts.query.split('&')
+        if parameter and not _is_tracking(unquote_plus(parameter.split('=', 1)[0]))
+    ))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def canonical_link(soup, url: str) -> str:
+    """The page's declared ``rel=canonical`` URL if it is on the same host, else the page's own URL.
+
+    Both are canonicalized. Canonical links to other hosts are ignored, as
+    they usually point at syndicated copies rather than this site's page.
+    """
+    own = canonicalize_url(url)
+    link = soup.find('link', rel=lambda value: value and 'canonical' in (
+        value if isinstance(value, list) else value.split()
+    ), href=True)
+    if link is None:
+        return own
+    declared = canonicalize_url(link['href'], base=url)
+    if urlsplit(declared).netloc != urlsplit(own).netloc:
+        return own
+    return declared
@@ -0,0 +1,119 @@
+"""A set of seen URLs whose memory use stays flat as crawls grow.
+
+Membership is first checked against Bloom filters, which answer "never
+seen" for almost every new URL without touching anything else. Only when
+a filter says "maybe" is the exact record consulted, so there are no false
+positives. The exact record holds 16-byte digests instead of URLs and
+moves from memory to a temporary SQLite database once it grows past
+``MAX_EXACT_IN_MEMORY`` entries.
+"""
+from typing import List, Optional, Tuple
+import hashlib
+import math
+import sqlite3
+import threading
+
+# URLs a filter is sized for before another, twice as large, is added
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.001
+# Digests kept in memory before the exact record spills to disk
+MAX_EXACT_IN_MEMORY = 10_000
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over 16-byte digests, using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest: bytes) -> List[int]:
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, digest: bytes) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class VisitedSet:
+    """Remember which keys (usually canonical URLs) have been seen."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE,
+                 max_exact_in_memory: int = MAX_EXACT_IN_MEMORY):
+        self.error_rate = error_rate
+        self.max_exact_in_memory = max_exact_in_memory
+        self._filters = [BloomFilter(capacity, error_rate)]
+        self._exact = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.count = 0
+        # Filter matches that the exact record had to settle
+        self.exact_lookups = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _in_exact(self, digest: bytes) -> bool:
+        self.exact_lookups += 1
+        if digest in self._exact:
+            return True
+        if self._db is None:
+            return False
+        return self._db.execute('SELECT 1 FROM seen WHERE digest = ?', (digest,)).fetchone() is not None
+
+    def _spill(self) -> None:
+        """Move the in-memory digests to the temporary database."""
+        if self._db is None:
+            # An empty filename gives a private on-disk database deleted on close
+            self._db = sqlite3.connect('', check_same_thread=False)
+            self._db.execute('CREATE TABLE seen (digest BLOB PRIMARY KEY) WITHOUT ROWID')
+        with self._db:
+            self._db.executemany('INSERT OR IGNORE INTO seen VALUES (?)', ((digest,) for digest in self._exact))
+        self._exact.clear()
+
+    def _check(self, key: str) -> Tuple[bytes, bool]:
+        digest = _digest(key)
+        maybe = any(digest in bloom for bloom in self._filters)
+        return digest, maybe and self._in_exact(digest)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._check(key)[1]
+
+    def add(self, key: str) -> bool:
+        """Record a key; return True if it had not been seen before."""
+        with self._lock:
+            digest, seen = self._check(key)
+            if seen:
+                return False
+            current = self._filters[-1]
+            if current.count >= current.capacity:
+                # Keep the false positive rate down as the crawl outgrows the filter
+                current = BloomFilter(current.capacity * 2, self.error_rate)
+                self._filters.append(current)
+            current.add(digest)
+            self._exact.add(digest)
+            if len(self._exact) >= self.max_exact_in_memory:
+                self._spill()
+            self.count += 1
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._exact.clear()
@@ -1,23 +1,235 @@
 import logging
 import requests
 from bs4 import BeautifulSoup
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin, urlparse
 import concurrent.futures
+import contextvars
+import asyncio
 import time
 import re
+from .page_store import PageStore, StoredPage
+from . import concurrency, crawler, site_discovery
+from .urls import canonicalize_url, canonical_link, resolve_url
+from .. import tracing
+from ..deadline import Deadline
+
+# Page analyses kept in full in a crawl's result; the rest only count towards the totals
+MAX_DETAILED_PAGES = 20
+
+
+def _content_score(page: Dict[str, Any]) -> float:
+    """A page's content optimization score (0-30): image alt texts, main landmark, load time."""
+    page_score = 0
+    # Check images
+    if page.get('images'):
+        images_with_alt = sum(1 for img in page['images'] if img.get('has_alt'))
+        total_images = len(page['images'])
+        if total_images > 0:
+            page_score += 10 * (images_with_alt / total_images)
+
+    # Check structure
+    if page.get('structure', {}).get('main_content'):
+        page_score += 10
+
+    # Check load time
+    if page.get('load_time', float('inf')) < 3:
+        page_score += 10
+    return page_score
+
+
+def _performance_score(average_load_time: float, mobile_friendly: bool, average_content_score: float) -> float:
+    """Combine site-wide metrics into a 0-100 performance score."""
+    # Score based on load time (0-40 points)
+    # Under 2 seconds is excellent (40 points)
+    # Over 8 seconds is poor (0 points)
+    load_time_score = max(0, min(40, 40 * (1 - average_load_time / 8)))
+
+    # Score based on mobile friendliness (0-30 points)
+    mobile_score = 30 if mobile_friendly else 0
+
+    # Calculate final score (0-100)
+    total_score = load_time_score + mobile_score + average_content_score
+
+    return round(total_score, 2)
+
+
+class PageAggregator:
+    """Site-wide totals built up one page analysis at a time.
+
+    Pages can be added as a crawl produces them and dropped afterwards, so
+    aggregating a large site does not keep every page in memory.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.urls: List[str] = []
+        self.load_time = 0.0
+        self.scored_load_time = 0.0
+        self.content_score = 0.0
+        self.words = 0
+        self.images = 0
+        self.forms = 0
+        self.form_fields = 0
+        self.alt_texts = 0
+        self.with_meta_description = 0
+        self.with_title = 0
+        self.title_length = 0
+        self.technologies = set()
+        self.page_types = set()
+        self.mobile_friendly = True
+        self.navigation = False
+        self.footer = False
+        self.sidebar = False
+        self.main_content = False
+        self.search = False
+        self.social_links = False
+        self.interactive = False
+
+    def add(self, page: Dict[str, Any]) -> None:
+        structure = page.get('structure', {})
+        images = page.get('images', [])
+        forms = page.get('forms', [])
+        self.pages += 1
+        self.urls.append(page.get('url'))
+        self.load_time += page.get('load_time', 0)
+        self.scored_load_time += page.get('load_time', float('inf'))
+        self.content_score += _content_score(page)
+        self.words += page.get('content', {}).get('word_count', 0)
+        self.images += len(images)
+        self.forms += len(forms)
+        self.form_fields += sum(len(form.get('fields', [])) for form in forms)
+        self.alt_texts += sum(img.get('has_alt', False) for img in images)
+        self.with_meta_description += bool(page.get('meta_description'))
+        self.with_title += bool(page.get('title'))
+        self.title_length += len(page.get('title') or '')
+        self.technologies.update(page.get('technologies', []))
+        self.page_types.add(page.get('type', ''))
+        self.mobile_friendly = self.mobile_friendly and bool(page.get('mobile_friendly', False))
+        self.navigation = self.navigation or bool(structure.get('navigation', False))
+        self.footer = self.footer or bool(structure.get('footer', False))
+        self.sidebar = self.sidebar or bool(structure.get('sidebar', False))
+        self.main_content = self.main_content or bool(structure.get('main_content', False))
+        self.search = self.search or 'search' in str(forms).lower()
+        self.social_links = self.social_links or 'social' in str(page.get('links', [])).lower()
+        self.interactive = self.interactive or bool(forms)
+
+    def result(self) -> Dict[str, Any]:
+        """The aggregated overview, content, technical, SEO, feature and UX analyses."""
+        if not self.pages:
+            return {}
+        average_load_time = self.load_time / self.pages
+        average_words = self.words / self.pages
+        return {
+            'overview': {
+                'total_pages': self.pages,
+                'average_load_time': average_load_time,
+                'pages_analyzed': list(self.urls)
+            },
+            'content_analysis': {
+                'total_words': self.words,
+                'average_words_per_page': average_words,
+                'total_images': self.images,
+                'total_forms': self.forms
+            },
+            'technical_analysis': {
+                'mobile_friendly': self.mobile_friendly,
+                'average_load_time': average_load_time,
+                'technologies_used': list(self.technologies)
+            },
+            'seo_analysis': {
+                'pages_with_meta_description': self.with_meta_description,
+                'pages_with_title': self.with_title,
+                'average_title_length': self.title_length / self.pages
+            },
+            'features': {
+                'navigation': {
+                    'menu_present': self.navigation,
+                    'footer_present': self.footer,
+                    'sidebar_present': self.sidebar
+                },
+                'functionality': {
+                    'forms_present': self.forms > 0,
+                    'search_functionality': self.search,
+                    'social_links': self.social_links
+                },
+                'content_features': {
+                    'multimedia_content': self.images > 0,
+                    'interactive_elements': self.interactive,
+                    'structured_content': self.main_content
+                }
+            },
+            'user_experience': {
+                'accessibility': {
+                    'alt_texts': self.alt_texts,
+                    'form_labels': self.form_fields,
+                    'semantic_structure': self.main_content
+                },
+                'performance': {
+                    'load_time_score': _performance_score(
+                        self.scored_load_time / self.pages, self.mobile_friendly, self.content_score / self.pages
+                    ),
+                    'mobile_friendly': self.mobile_friendly,
+                    'responsive_design': self.mobile_friendly
+                },
+                'usability': {
+                    'clear_navigation': self.navigation,
+                    'consistent_layout': len(self.page_types) > 1,
+                    'readable_content': average_words > 0
+                }
+            }
+        }
+
 
 class WebsiteAnalyzer:
+    # Bump when the analysis output changes to invalidate cached results
+    CACHE_VERSION = 1
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (compatible; WebsiteAnalyzer/1.0;)'
         })
+        # Per-host concurrency adapts to how the site responds; this only caps the threads
+        self.max_workers = concurrency.MAX_WINDOW
+
+    def _page_store(self, context: Dict[str, Any] = None) -> PageStore:
+        """Use the run's shared page store, or a private one for standalone calls."""
+        page_store = (context or {}).get('page_store')
+        return page_store if page_store is not None else PageStore(session=self.session, timeout=10)
 
-    def process(self, website_url: str) -> Dict[str, Any]:
-        """Analyze a website comprehensively."""
+    def _cached_analysis(self, website_url: str, context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached analysis of the site, if the run has a cache."""
+        cache = (context or {}).get('analysis_cache')
+        if cache is None:
+            return None
+        cached = cache.get('website', self.CACHE_VERSION, website_url)
+        if cached is not None:
+            self.logger.info(f"Using cached analysis of {website_url}")
+        return cached
+
+    def _cache_analysis(self, website_url: str, results: Dict[str, Any], context: Dict[str, Any] = None) -> None:
+        """Store a successful, complete analysis in the run's cache."""
+        cache = (context or {}).get('analysis_cache')
+        if cache is not None and not results.get('error') and not results.get('partial'):
+            cache.set('website', self.CACHE_VERSION, website_url, results)
+
+    @tracing.traced()
+    def process(self, website_url: str, context: Dict[str, Any] = None, max_pages: Optional[int] = None,
+                max_depth: int = crawler.DEFAULT_MAX_DEPTH) -> Dict[str, Any]:
+        """Analyze a website comprehensively.
+
+        By default the homepage and up to five important pages it links to
+        are analyzed. With ``max_pages`` the site is crawled instead, up to
+        that many pages and ``max_depth`` clicks from the homepage.
+        """
+        if max_pages:
+            # The crawler is asynchronous; give it an event loop of its own
+            return asyncio.run(self.process_async(website_url, context, max_pages=max_pages, max_depth=max_depth))
         try:
+            page_store = self._page_store(context)
+            deadline = Deadline.of(context)
             self.logger.info(f"Starting comprehensive analysis of {website_url}")
             
             # Initialize results
@@ -40,10 +252,14 @@ class WebsiteAnalyzer:
                 website_url = 'https://' + website_url
                 results['url'] = website_url
             
+            cached = self._cached_analysis(website_url, context)
+            if cached is not None:
+                return cached
+
             try:
                 # Test connection first
                 self.logger.info(f"Testing connection to {website_url}")
-                response = self.session.get(website_url, timeout=10)
+                response = page_store.get(website_url, timeout=deadline.timeout(10)).response
                 response.raise_for_status()
             except requests.RequestException as e:
                 self.logger.error(f"Failed to connect to website: {str(e)}")
@@ -51,7 +267,7 @@ class WebsiteAnalyzer:
 
             # Analyze homepage first
             self.logger.info("Analyzing homepage...")
-            homepage_analysis = self._analyze_page(website_url)
+            homepage_analysis = self._analyze_page(website_url, page_store)
             if homepage_analysis.get('error'):
                 self.logger.error(f"Failed to analyze homepage: {homepage_analysis['error']}")
                 return {'error': homepage_analysis['error']}
@@ -64,22 +280,30 @@ class WebsiteAnalyzer:
             
             # Analyze important pages in parallel
             self.logger.info(f"Analyzing {len(important_urls)} additional pages...")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 future_to_url = {
-                    executor.submit(self._analyze_page, url): url 
+                    executor.submit(contextvars.copy_context().run, self._analyze_page, url, page_store): url
                     for url in important_urls
                 }
-                for future in concurrent.futures.as_completed(future_to_url):
-                    url = future_to_url[future]
-                    try:
-                        page_analysis = future.result()
-                        if not page_analysis.get('error'):
-                            results['pages'].append(page_analysis)
-                            self.logger.info(f"Successfully analyzed {url}")
-                        else:
-                            self.logger.warning(f"Failed to analyze {url}: {page_analysis['error']}")
-                    except Exception as e:
-                        self.logger.error(f"Error analyzing {url}: {str(e)}")
+                try:
+                    for future in concurrent.futures.as_completed(future_to_url, timeout=deadline.remaining()):
+                        url = future_to_url[future]
+                        try:
+                            page_analysis = future.result()
+                            if not page_analysis.get('error'):
+                                results['pages'].append(page_analysis)
+                                self.logger.info(f"Successfully analyzed {url}")
+                            else:
+                                self.logger.warning(f"Failed to analyze {url}: {page_analysis['error']}")
+                        except Exception as e:
+                            self.logger.error(f"Error analyzing {url}: {str(e)}")
+                except concurrent.futures.TimeoutError:
+                    # Pages still queued are dropped; in-flight fetches end within their timeout
+                    unfinished = [future for future in future_to_url if not future.done()]
+                    for future in unfinished:
+                        future.cancel()
+                    self.logger.warning(f"Deadline reached, skipping {len(unfinished)} pages")
+                    results['partial'] = True
             
             # Aggregate and analyze all collected data
             self.logger.info("Aggregating analysis results...")
@@ -88,6 +312,7 @@ class WebsiteAnalyzer:
             
             # Validate completeness
             self._validate_analysis(results)
+            self._cache_analysis(website_url, results, context)
             
             return results
             
@@ -95,72 +320,208 @@ class WebsiteAnalyzer:
             self.logger.error(f"Error analyzing website: {str(e)}")
             return {'error': str(e)}
 
+    @tracing.traced()
+    async def process_async(self, website_url: str, context: Dict[str, Any] = None, max_pages: Optional[int] = None,
+                            max_depth: int = crawler.DEFAULT_MAX_DEPTH) -> Dict[str, Any]:
+        """Analyze a website comprehensively without blocking the event loop.
+
+        Takes the same crawl options as ``process``.
+        """
+        from . import async_http
+        
+        try:
+            page_store = self._page_store(context)
+            deadline = Deadline.of(context)
+            self.logger.info(f"Starting comprehensive analysis of {website_url}")
+            
+            # Initialize results
+            results = {
+                'url': website_url,
+                'pages': [],
+                'overview': {},
+                'content_analysis': {},
+                'technical_analysis': {},
+                'seo_analysis': {},
+                'error': None
+            }
+            
+            # Basic validation
+            if not website_url:
+                self.logger.error("No website URL provided")
+                return {'error': 'No website URL provided'}
+                
+            if not website_url.startswith(('http://', 'https://')):
+                website_url = 'https://' + website_url
+                results['url'] = website_url
+            
+            # A crawl covers more of the site than the default analysis, so it is cached separately
+            cache_key = f"{website_url} crawl:{max_pages}:{max_depth}" if max_pages else website_url
+            cached = self._cached_analysis(cache_key, context)
+            if cached is not None:
+                return cached
+
+            async with async_http.create_session(self.session.headers) as session:
+                try:
+                    # Test connection first
+                    self.logger.info(f"Testing connection to {website_url}")
+                    page = await page_store.get_async(website_url, session, timeout=deadline.timeout(10))
+                    page.response.raise_for_status()
+                except async_http.FETCH_ERRORS as e:
+                    self.logger.error(f"Failed to connect to website: {str(e)}")
+                    return {'error': f'Failed to connect to website: {str(e)}'}
+
+                # Analyze homepage first
+                self.logger.info("Analyzing homepage...")
+                homepage_analysis = await self._analyze_page_async(session, website_url, page_store)
+                if homepage_analysis.get('error'):
+                    self.logger.error(f"Failed to analyze homepage: {homepage_analysis['error']}")
+                    return {'error': homepage_analysis['error']}
+                
+                results['pages'].append(homepage_analysis)
+
+                if max_pages:
+                    results.update(await self._crawl_site(session, website_url, homepage_analysis, page_store,
+                                                          deadline, max_pages, max_depth, results))
+                    self._validate_analysis(results)
+                    self._cache_analysis(cache_key, results, context)
+                    return results
+                
+                # Get important pages to analyze
+                self.logger.info("Discovering important pages...")
+                important_urls = self._discover_important_pages(website_url, homepage_analysis.get('links', []))
+                
+                # Analyze important pages concurrently
+                self.logger.info(f"Analyzing {len(important_urls)} additional pages...")
+                semaphore = asyncio.Semaphore(self.max_workers)
+
+                async def analyze_bounded(url: str) -> Dict[str, Any]:
+                    async with semaphore:
+                        return await self._analyze_page_async(session, url, page_store)
+
+                tasks = [asyncio.ensure_future(analyze_bounded(url)) for url in important_urls]
+                if tasks:
+                    _, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+                    if pending:
+                        self.logger.warning(f"Deadline reached, skipping {len(pending)} pages")
+                        results['partial'] = True
+                        for task in pending:
+                            task.cancel()
+                        await asyncio.gather(*pending, return_exceptions=True)
+                for url, task in zip(important_urls, tasks):
+                    if task.cancelled():
+                        continue
+                    page_analysis = task.exception() or task.result()
+                    if isinstance(page_analysis, Exception):
+                        self.logger.error(f"Error analyzing {url}: {str(page_analysis)}")
+                    elif not page_analysis.get('error'):
+                        results['pages'].append(page_analysis)
+                        self.logger.info(f"Successfully analyzed {url}")
+                    else:
+                        self.logger.warning(f"Failed to analyze {url}: {page_analysis['error']}")
+            
+            # Aggregate and analyze all collected data
+            self.logger.info("Aggregating analysis results...")
+            aggregated = self._aggregate_analysis(results['pages'])
+            results.update(aggregated)
+            
+            # Validate completeness
+            self._validate_analysis(results)
+            self._cache_analysis(cache_key, results, context)
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error analyzing website: {str(e)}")
+            return {'error': str(e)}
+
+    @tracing.traced()
+    async def _crawl_site(self, session, website_url: str, homepage_analysis: Dict[str, Any],
+                          page_store: PageStore, deadline: Deadline, max_pages: int, max_depth: int,
+                          results: Dict[str, Any]) -> Dict[str, Any]:
+        """Crawl the site from its sitemaps and the homepage's links, aggregating pages as they arrive.
+
+        Pages robots.txt disallows are skipped. Only the first ``MAX_DETAILED_PAGES``
+        pages are kept in ``results['pages']``; the others count towards the
+        totals and are then dropped.
+        """
+        aggregator = PageAggregator()
+        aggregator.add(homepage_analysis)
+        discovery = await site_discovery.discover_async(session, website_url, deadline)
+        site_crawler = crawler.AsyncCrawler(
+            lambda url: self._analyze_page_async(session, url, page_store, keep=False),
+            max_pages=max_pages - 1, max_depth=max_depth, deadline=deadline, allowed=discovery.allowed
+        )
+        # Sitemap pages go first so recently modified ones keep their higher priority
+        sitemap_pages = discovery.pages()
+        seeds = [(url, site_discovery.SITEMAP_DEPTH, score) for url, score in sitemap_pages]
+        seeds += [(link, 1) for link in homepage_analysis.get('links', [])]
+        self.logger.info(f"Crawling up to {max_pages} pages of {website_url}...")
+        async for page_analysis in site_crawler.crawl(seeds, visited=[website_url]):
+            if page_analysis.get('error'):
+                self.logger.warning(f"Failed to analyze {page_analysis.get('url')}: {page_analysis['error']}")
+                continue
+            aggregator.add(page_analysis)
+            if len(results['pages']) < MAX_DETAILED_PAGES:
+                results['pages'].append(page_analysis)
+        if site_crawler.partial:
+            results['partial'] = True
+        tracing.current_span().set(pages=aggregator.pages, queued=len(site_crawler.frontier),
+                                   dropped=site_crawler.frontier.dropped, sitemap_pages=len(sitemap_pages))
+        self.logger.info(f"Crawled {aggregator.pages} pages of {website_url}")
+        return aggregator.result()
+
     def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
-        """Extract and normalize links from the page."""
+        """Extract same-site links from the page, without duplicates by canonical form."""
         links = []
         seen = set()
-        base_domain = urlparse(base_url).netloc
+        base_domain = urlparse(canonicalize_url(base_url)).netloc
         
         for a in soup.find_all('a', href=True):
             href = a['href'].strip()
             if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
                 continue
                 
-            # Normalize URL
-            if not href.startswith(('http://', 'https://')):
-                href = urljoin(base_url, href)
+            # Resolve relative links; aliases that differ only in fragments,
+            # tracking parameters or trailing slashes are one link
+            href = resolve_url(href, base=base_url)
+            canonical = canonicalize_url(href)
             
             # Only include links from the same domain
-            parsed = urlparse(href)
-            if parsed.netloc != base_domain:
+            if urlparse(canonical).netloc != base_domain:
                 continue
                 
-            # Remove fragments and normalize
-            href = href.split('#')[0]
-            if href and href not in seen:
+            if canonical not in seen:
                 links.append(href)
-                seen.add(href)
+                seen.add(canonical)
         
         return links
 
     def _discover_important_pages(self, base_url: str, links: List[str]) -> List[str]:
-        """Identify important pages to analyze."""
-        important_pages = set()
-        base_domain = urlparse(base_url).netloc
-        
-        # Important page patterns
-        important_patterns = [
-            r'/about',
-            r'/services',
-            r'/contact',
-            r'/team',
-            r'/portfolio',
-            r'/products',
-            r'/features',
-            r'/pricing',
-            r'/faq',
-            r'/support',
-            r'/blog'
-        ]
+        """Identify the most important pages to analyze, best first."""
+        important_pages = []
+        seen = set()
+        base_domain = urlparse(canonicalize_url(base_url)).netloc
         
         for link in links:
             try:
-                parsed = urlparse(link)
+                canonical = canonicalize_url(link)
+                parsed = urlparse(canonical)
                 if parsed.netloc != base_domain:
                     continue
                     
                 path = parsed.path.lower()
                 
                 # Check if it's an important page
-                if any(re.search(pattern, path) for pattern in important_patterns):
-                    important_pages.add(link)
+                if any(re.search(pattern, path) for pattern in crawler.IMPORTANT_PATTERNS) and canonical not in seen:
+                    important_pages.append(link)
+                    seen.add(canonical)
                     
             except Exception as e:
                 self.logger.warning(f"Error processing link {link}: {str(e)}")
                 continue
         
-        # Limit the number of pages to analyze
-        return list(important_pages)[:5]  # Analyze up to 5 important pages
+        # Analyze up to 5 important pages, ranked rather than in arbitrary order
+        return sorted(important_pages, key=crawler.score_url, reverse=True)[:5]
 
     def _analyze_law_firm_specific(self, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze law firm specific features."""
@@ -295,19 +656,41 @@ class WebsiteAnalyzer:
         
         return features
 
-    def _analyze_page(self, url: str) -> Dict[str, Any]:
+    def _analyze_page(self, url: str, page_store: PageStore = None) -> Dict[str, Any]:
         """Analyze a single page comprehensively."""
         try:
             self.logger.info(f"Analyzing page: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            page_store = page_store or self._page_store()
+            page = page_store.get(url, timeout=10)
+            page.response.raise_for_status()
+            return self._parse_page(url, page)
+        except Exception as e:
+            return {'error': str(e), 'url': url}
+
+    async def _analyze_page_async(self, session, url: str, page_store: PageStore = None,
+                                  keep: bool = True) -> Dict[str, Any]:
+        """Fetch a single page without blocking and analyze it in a worker thread."""
+        try:
+            self.logger.info(f"Analyzing page: {url}")
+            page_store = page_store or self._page_store()
+            page = await page_store.get_async(url, session, timeout=10, keep=keep)
+            page.response.raise_for_status()
+            return await asyncio.to_thread(self._parse_page, url, page)
+        except Exception as e:
+            return {'error': str(e), 'url': url}
+
+    def _parse_page(self, url: str, page: StoredPage) -> Dict[str, Any]:
+        """Analyze a fetched page comprehensively."""
+        try:
+            response = page.response
+            soup = page.soup
             
             # Basic page info
             page_info = {
                 'url': url,
                 'type': self._determine_page_type(url, soup),
                 'title': soup.title.string if soup.title else None,
+                'canonical_url': canonical_link(soup, url),
                 'meta_description': self._get_meta_description(soup),
                 'status_code': response.status_code,
                 'load_time': response.elapsed.total_seconds()
@@ -394,96 +777,11 @@ class WebsiteAnalyzer:
 
     def _aggregate_analysis(self, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Aggregate analysis from all pages."""
-        if not pages:
-            return {}
-            
-        # Calculate overview metrics
-        overview = {
-            'total_pages': len(pages),
-            'average_load_time': sum(p.get('load_time', 0) for p in pages) / len(pages),
-            'pages_analyzed': [p.get('url') for p in pages]
-        }
-        
-        # Aggregate content metrics
-        total_words = sum(p.get('content', {}).get('word_count', 0) for p in pages)
-        total_images = sum(len(p.get('images', [])) for p in pages)
-        total_forms = sum(len(p.get('forms', [])) for p in pages)
-        
-        content_analysis = {
-            'total_words': total_words,
-            'average_words_per_page': total_words / len(pages) if pages else 0,
-            'total_images': total_images,
-            'total_forms': total_forms
-        }
-        
-        # Aggregate technical metrics
-        technical_analysis = {
-            'mobile_friendly': all(p.get('mobile_friendly', False) for p in pages),
-            'average_load_time': sum(p.get('load_time', 0) for p in pages) / len(pages),
-            'technologies_used': self._aggregate_technologies(pages)
-        }
-        
-        # Aggregate SEO metrics
-        seo_analysis = {
-            'pages_with_meta_description': sum(1 for p in pages if p.get('meta_description')),
-            'pages_with_title': sum(1 for p in pages if p.get('title')),
-            'average_title_length': sum(len(p.get('title', '')) for p in pages) / len(pages) if pages else 0
-        }
-
-        # Add features analysis
-        features = {
-            'navigation': {
-                'menu_present': any(p.get('structure', {}).get('navigation', False) for p in pages),
-                'footer_present': any(p.get('structure', {}).get('footer', False) for p in pages),
-                'sidebar_present': any(p.get('structure', {}).get('sidebar', False) for p in pages)
-            },
-            'functionality': {
-                'forms_present': total_forms > 0,
-                'search_functionality': any('search' in str(p.get('forms', [])).lower() for p in pages),
-                'social_links': any('social' in str(p.get('links', [])).lower() for p in pages)
-            },
-            'content_features': {
-                'multimedia_content': total_images > 0,
-                'interactive_elements': any(p.get('forms', []) for p in pages),
-                'structured_content': any(p.get('structure', {}).get('main_content', False) for p in pages)
-            }
-        }
-
-        # Add user experience analysis
-        user_experience = {
-            'accessibility': {
-                'alt_texts': sum(img.get('has_alt', False) for p in pages for img in p.get('images', [])),
-                'form_labels': sum(len(form.get('fields', [])) for p in pages for form in p.get('forms', [])),
-                'semantic_structure': any(p.get('structure', {}).get('main_content', False) for p in pages)
-            },
-            'performance': {
-                'load_time_score': self._calculate_performance_score(pages),
-                'mobile_friendly': technical_analysis['mobile_friendly'],
-                'responsive_design': all(p.get('mobile_friendly', False) for p in pages)
-            },
-            'usability': {
-                'clear_navigation': features['navigation']['menu_present'],
-                'consistent_layout': len(set(p.get('type', '') for p in pages)) > 1,
-                'readable_content': content_analysis['average_words_per_page'] > 0
-            }
-        }
-        
-        return {
-            'overview': overview,
-            'content_analysis': content_analysis,
-            'technical_analysis': technical_analysis,
-            'seo_analysis': seo_analysis,
-            'features': features,
-            'user_experience': user_experience
-        }
-        
-    def _aggregate_technologies(self, pages: List[Dict[str, Any]]) -> List[str]:
-        """Aggregate technologies used across all pages."""
-        technologies = set()
+        aggregator = PageAggregator()
         for page in pages:
-            technologies.update(page.get('technologies', []))
-        return list(technologies)
-
+            aggregator.add(page)
+        return aggregator.result()
+        
     def _validate_analysis(self, results: Dict[str, Any]) -> None:
         """Validate that all necessary analysis components are present and complete."""
         required_sections = [
@@ -568,46 +866,11 @@ class WebsiteAnalyzer:
         """Calculate a performance score based on load times and other metrics."""
         if not pages:
             return 0.0
-            
-        # Calculate average load time
-        load_times = [p.get('load_time', float('inf')) for p in pages]
-        avg_load_time = sum(load_times) / len(load_times)
-        
-        # Score based on load time (0-40 points)
-        # Under 2 seconds is excellent (40 points)
-        # Over 8 seconds is poor (0 points)
-        load_time_score = max(0, min(40, 40 * (1 - avg_load_time / 8)))
-        
-        # Score based on mobile friendliness (0-30 points)
-        mobile_score = 30 if all(p.get('mobile_friendly', False) for p in pages) else 0
-        
-        # Score based on content optimization (0-30 points)
-        content_scores = []
-        for page in pages:
-            page_score = 0
-            # Check images
-            if page.get('images'):
-                images_with_alt = sum(1 for img in page['images'] if img.get('has_alt'))
-                total_images = len(page['images'])
-                if total_images > 0:
-                    page_score += 10 * (images_with_alt / total_images)
-            
-            # Check structure
-            if page.get('structure', {}).get('main_content'):
-                page_score += 10
-            
-            # Check load time
-            if page.get('load_time', float('inf')) < 3:
-                page_score += 10
-                
-            content_scores.append(page_score)
-        
-        avg_content_score = sum(content_scores) / len(content_scores) if content_scores else 0
-        
-        # Calculate final score (0-100)
-        total_score = load_time_score + mobile_score + avg_content_score
-        
-        return round(total_score, 2)
+        return _performance_score(
+            sum(p.get('load_time', float('inf')) for p in pages) / len(pages),
+            all(p.get('mobile_friendly', False) for p in pages),
+            sum(_content_score(page) for page in pages) / len(pages)
+        )
 
     def _get_meta_description(self, soup: BeautifulSoup) -> str:
         """Extract meta description from the page."""
@@ -1,34 +1,90 @@
-from typing import Dict, List, Any
-import os
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from typing import Dict, List, Any, Optional, Tuple, TYPE_CHECKING
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
-from PIL import Image
+from urllib.parse import urlparse
 import io
-import hashlib
 from .base_agent import BaseAgent
+from . import browser_pool, network_profiles, page_readiness, palette, screenshot_store
+from .urls import canonicalize_url, resolve_url
+from .. import tracing
+from ..deadline import Deadline
+
+# Selenium is slow to import, so it is only loaded once the screenshotter is used
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+DEFAULT_BREAKPOINTS = [
+    ('mobile', 375, 667),
+    ('tablet', 768, 1024),
+    ('desktop', 1920, 1080)
+]
+
+# Page width, elements sticking out past the viewport, and overlapping
+# in-flow siblings. Nested elements always intersect their parents, so only
+# siblings are compared.
+_LAYOUT_METRICS_SCRIPT = """
+    const viewportWidth = window.innerWidth;
+    const elements = document.body ? Array.from(document.body.getElementsByTagName('*')) : [];
+    const overflowing = [];
+    for (const el of elements) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width && rect.height && rect.right > viewportWidth + 1 && overflowing.length < 10) {
+            overflowing.push(el.tagName.toLowerCase() + (el.id ? '#' + el.id : ''));
+        }
+    }
+    let overlaps = 0;
+    for (const parent of [document.body].concat(elements)) {
+        if (!parent) continue;
+        const rects = Array.from(parent.children).slice(0, 50)
+            .filter(child => ['static', 'relative'].includes(getComputedStyle(child).position))
+            .map(child => child.getBoundingClientRect())
+            .filter(rect => rect.width && rect.height);
+        for (let i = 0; i < rects.length; i++) {
+            for (let j = i + 1; j < rects.length; j++) {
+                const a = rects[i], b = rects[j];
+                if (a.left < b.right - 1 && b.left < a.right - 1 && a.top < b.bottom - 1 && b.top < a.bottom - 1) {
+                    overlaps++;
+                }
+            }
+        }
+    }
+    return {scrollWidth: document.documentElement.scrollWidth, overflowing: overflowing, overlaps: overlaps};
+"""
+
+# Pages loaded at once from a single host, across all screenshotters in the process
+MAX_PAGES_PER_HOST = 3
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def _host_slots(host: str) -> threading.BoundedSemaphore:
+    """The semaphore limiting concurrent page loads from ``host``."""
+    with _host_semaphores_lock:
+        return _host_semaphores.setdefault(host, threading.BoundedSemaphore(MAX_PAGES_PER_HOST))
 
 class WebsiteScreenshotter(BaseAgent):
     """Captures and analyzes screenshots of websites."""
     
     def __init__(self):
         super().__init__()
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
-        self.chrome_options.add_argument('--window-size=1920,1080')
         
-        # Create screenshots directory if it doesn't exist
-        self.screenshots_dir = 'screenshots'
-        os.makedirs(self.screenshots_dir, exist_ok=True)
+        # Screenshots are stored by content, so re-captures of an unchanged page cost no space
+        self.screenshot_store = screenshot_store.get_store()
+        # Longest a page may take to settle before it is captured anyway
+        self.max_page_wait = page_readiness.DEFAULT_MAX_WAIT
+        # Drivers used at once for the pages of one site, and sites analyzed at once
+        self.max_parallel_pages = MAX_PAGES_PER_HOST
+        self.max_parallel_sites = 3
+        # (name, width, height) viewports checked by the responsive audit
+        self.breakpoints = list(DEFAULT_BREAKPOINTS)
+        # Captures need layout and styling, but not media, ads or trackers
+        self.network_profile = network_profiles.VISUAL
 
+    @tracing.traced()
     def process(self, client_brief: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process websites and capture screenshots."""
         results = {
@@ -38,111 +94,192 @@ class WebsiteScreenshotter(BaseAgent):
             'improvement_opportunities': []
         }
         
-        # Analyze client website
+        deadline = Deadline.of(context)
+        
+        # The client and competitor websites are analyzed concurrently
+        sites = []
         client_website = client_brief.get('website', '')
         if client_website:
-            results['client_website'] = self._analyze_website(client_website, is_client=True)
-        
-        # Analyze competitor websites
+            sites.append((client_website, True))
+        competitors = []
         if context and context.get('competitive_analysis'):
             competitors = context['competitive_analysis'].get('competitors', [])
-            for comp in competitors:
-                competitor_analysis = self._analyze_website(comp['website'], is_client=False)
-                if competitor_analysis:
-                    competitor_analysis['competitor_name'] = comp['name']
-                    results['competitor_websites'].append(competitor_analysis)
+            sites.extend((comp['website'], False) for comp in competitors)
+        analyses = self._analyze_websites(sites, deadline)
+        
+        # Analyze client website
+        if client_website:
+            results['client_website'] = analyses.pop(0)
+        
+        # Analyze competitor websites
+        for comp, competitor_analysis in zip(competitors, analyses):
+            if competitor_analysis:
+                competitor_analysis['competitor_name'] = comp['name']
+                results['competitor_websites'].append(competitor_analysis)
         
         # Generate insights
         results['design_insights'] = self._generate_design_insights(results)
         results['improvement_opportunities'] = self._identify_improvements(results)
+        if deadline.expired():
+            results['partial'] = True
         
         return results
 
-    def _analyze_website(self, url: str, is_client: bool) -> Dict[str, Any]:
-        """Analyze a website and capture screenshots of its pages."""
+    def _analyze_websites(self, sites: List[Tuple[str, bool]], deadline: Deadline) -> List[Optional[Dict[str, Any]]]:
+        """Analyze ``(url, is_client)`` sites, up to ``max_parallel_sites`` at once, in the given order."""
+        def analyze(url: str, is_client: bool) -> Optional[Dict[str, Any]]:
+            if deadline.expired():
+                return None
+            return self._analyze_website(url, is_client=is_client, deadline=deadline)
+        
+        if len(sites) <= 1 or self.max_parallel_sites <= 1:
+            return [analyze(url, is_client) for url, is_client in sites]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel_sites) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, analyze, url, is_client)
+                for url, is_client in sites
+            ]
+            return [future.result() for future in futures]
+
+    def _analyze_website(self, url: str, is_client: bool, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Analyze a website and capture screenshots of its pages until the deadline passes."""
+        deadline = deadline or Deadline()
         try:
-            driver = webdriver.Chrome(options=self.chrome_options)
-            pages = self._discover_pages(driver, url)
+            # Finding links only needs the DOM
+            with self._lease_driver(deadline, network_profiles.DOM_ONLY) as driver:
+                pages = self._discover_pages(driver, url)
             
             analysis = {
                 'website': url,
-                'pages': [],
+                'pages': self._capture_pages(url, pages, is_client, deadline),
                 'layout_patterns': [],
                 'color_scheme': [],
                 'ui_elements': [],
-                'responsive_issues': []
+                'responsive_issues': [],
+                'responsive_audit': []
             }
             
-            for page in pages:
-                page_analysis = self._analyze_page(driver, page, is_client)
-                if page_analysis:
-                    analysis['pages'].append(page_analysis)
-            
             # Aggregate patterns across pages
             analysis['layout_patterns'] = self._identify_layout_patterns(analysis['pages'])
             analysis['color_scheme'] = self._extract_color_scheme(analysis['pages'])
             analysis['ui_elements'] = self._identify_common_elements(analysis['pages'])
-            analysis['responsive_issues'] = self._check_responsive_design(driver, url)
+            if not deadline.expired():
+                with self._lease_driver(deadline) as driver:
+                    analysis['responsive_issues'], analysis['responsive_audit'] = self._check_responsive_design(driver, url)
             
-            driver.quit()
             return analysis
             
         except Exception as e:
             print(f"Error analyzing website {url}: {str(e)}")
             return None
 
-    def _discover_pages(self, driver: webdriver.Chrome, url: str) -> List[str]:
+    @contextlib.contextmanager
+    def _lease_driver(self, deadline: Deadline, profile: Optional[str] = None):
+        """Lease a pooled driver whose page loads give up once the run is out of time.
+
+        Requests not needed by ``profile`` (by default ``network_profile``) are blocked.
+        """
+        pool = browser_pool.get_pool()
+        with pool.driver(timeout=deadline.remaining(), profile=profile or self.network_profile) as driver:
+            if deadline.remaining() is not None:
+                driver.set_page_load_timeout(deadline.timeout(30))
+            yield driver
+
+    def _capture_pages(self, url: str, pages: List[str], is_client: bool,
+                       deadline: Deadline) -> List[Dict[str, Any]]:
+        """Analyze a site's pages on up to ``max_parallel_pages`` drivers at once.
+
+        Each worker leases its own driver and takes pages from a shared list
+        until none are left or the deadline passes. Results keep the order
+        the pages were discovered in, so the aggregates match a serial run.
+        """
+        captured: List[Optional[Dict[str, Any]]] = [None] * len(pages)
+        remaining = list(enumerate(pages))
+        lock = threading.Lock()
+        host_slots = _host_slots(urlparse(url).netloc)
+        
+        def capture() -> None:
+            with self._lease_driver(deadline) as driver:
+                while True:
+                    with lock:
+                        if not remaining:
+                            return
+                        if deadline.expired():
+                            print(f"Deadline reached, skipping remaining pages of {url}")
+                            remaining.clear()
+                            return
+                        index, page = remaining.pop(0)
+                    with host_slots:
+                        captured[index] = self._analyze_page(driver, page, is_client)
+        
+        workers = min(self.max_parallel_pages, len(pages))
+        if workers <= 1:
+            capture()
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, capture) for _ in range(workers)]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # The other workers pick up the pages this one could not take
+                        print(f"Error capturing pages of {url}: {str(e)}")
+        
+        return [page for page in captured if page]
+
+    def _discover_pages(self, driver: 'webdriver.Chrome', url: str) -> List[str]:
         """Discover pages on the website."""
         try:
-            driver.get(url)
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            with tracing.span('browser.get', 'browser', url=url):
+                driver.get(url)
+            page_readiness.wait_for_page_ready(driver, self.max_page_wait)
             
             soup = BeautifulSoup(driver.page_source, 'html.parser')
-            base_domain = urlparse(url).netloc
+            home = canonicalize_url(url)
+            base_domain = urlparse(home).netloc
             
-            pages = set([url])
+            # Canonical forms, so /about, /about/ and /about#team are captured once
+            pages = {home: url}
             for link in soup.find_all('a', href=True):
-                href = link['href']
-                absolute_url = urljoin(url, href)
+                absolute_url = resolve_url(link['href'], base=url)
+                canonical = canonicalize_url(absolute_url)
                 
                 # Only include pages from the same domain
-                if urlparse(absolute_url).netloc == base_domain:
-                    pages.add(absolute_url)
+                if urlparse(canonical).netloc == base_domain:
+                    pages.setdefault(canonical, absolute_url)
             
-            return list(pages)[:10]  # Limit to 10 pages for efficiency
+            return list(pages.values())[:10]  # Limit to 10 pages for efficiency
             
         except Exception as e:
             print(f"Error discovering pages: {str(e)}")
             return [url]
 
-    def _analyze_page(self, driver: webdriver.Chrome, url: str, is_client: bool) -> Dict[str, Any]:
+    def _analyze_page(self, driver: 'webdriver.Chrome', url: str, is_client: bool) -> Dict[str, Any]:
         """Analyze a single page and capture screenshots."""
         try:
-            driver.get(url)
-            time.sleep(2)  # Wait for dynamic content to load
+            with tracing.span('browser.get', 'browser', url=url):
+                driver.get(url)
+            # Wait for dynamic content to load
+            page_readiness.wait_for_page_ready(driver, self.max_page_wait)
             
             # Take full page screenshot
             page_source = driver.page_source
             soup = BeautifulSoup(page_source, 'html.parser')
             
-            # Generate unique filename based on URL
-            url_hash = hashlib.md5(url.encode()).hexdigest()[:10]
-            screenshot_path = os.path.join(self.screenshots_dir, f"{url_hash}.png")
-            
             # Save screenshot
-            driver.save_screenshot(screenshot_path)
+            screenshot = self.screenshot_store.put(driver.get_screenshot_as_png(), url)
+            screenshot_path = screenshot['path']
             
             # Analyze page structure
             analysis = {
                 'url': url,
                 'screenshot_path': screenshot_path,
+                'screenshot_hash': screenshot['hash'],
                 'title': soup.title.string if soup.title else '',
                 'type': self._determine_page_type(url, soup),
                 'layout_elements': self._analyze_layout(soup),
                 'ui_components': self._analyze_ui_components(soup),
-                'color_palette': self._extract_colors(driver),
+                'color_palette': self._extract_colors(screenshot_path),
                 'text_content': self._analyze_text_content(soup),
                 'responsive_elements': self._analyze_responsive_elements(soup)
             }
@@ -217,22 +354,14 @@ class WebsiteScreenshotter(BaseAgent):
         
         return components
 
-    def _extract_colors(self, driver: webdriver.Chrome) -> List[str]:
-        """Extract color palette from the page."""
-        # Execute JavaScript to get computed styles
-        colors = driver.execute_script("""
-            var colors = new Set();
-            var elements = document.getElementsByTagName('*');
-            for (var i = 0; i < elements.length; i++) {
-                var style = window.getComputedStyle(elements[i]);
-                colors.add(style.color);
-                colors.add(style.backgroundColor);
-            }
-            return Array.from(colors);
-        """)
-        
-        # Filter out transparent and none values
-        return [color for color in colors if color and color != 'transparent' and color != 'rgba(0, 0, 0, 0)']
+    def _extract_colors(self, screenshot_path: str) -> List[Dict[str, Any]]:
+        """Extract the page's color palette from its screenshot, as visitors see it."""
+        try:
+            with tracing.span('palette.extract', 'image'):
+                return palette.extract_palette(screenshot_path)
+        except Exception as e:
+            print(f"Error extracting colors: {str(e)}")
+            return []
 
     def _analyze_text_content(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """Analyze text content and typography."""
@@ -274,15 +403,13 @@ class WebsiteScreenshotter(BaseAgent):
         
         return patterns
 
-    def _extract_color_scheme(self, pages: List[Dict[str, Any]]) -> List[str]:
-        """Extract common color scheme across pages."""
-        all_colors = []
-        for page in pages:
-            all_colors.extend(page['color_palette'])
-        
-        # Get unique colors
-        unique_colors = list(set(all_colors))
-        return unique_colors[:5]  # Return top 5 most common colors
+    def _extract_color_scheme(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Extract the five colors covering most of the site, with their design roles."""
+        scheme = palette.combine_palettes([page['color_palette'] for page in pages])
+        roles = {color: role for role, color in palette.palette_roles(scheme).items() if color}
+        for color in scheme:
+            color['usage'] = roles.get(color['hex'], 'supporting').capitalize()
+        return scheme
 
     def _identify_common_elements(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Identify common UI elements across pages."""
@@ -311,47 +438,74 @@ class WebsiteScreenshotter(BaseAgent):
         
         return common_elements
 
-    def _check_responsive_design(self, driver: webdriver.Chrome, url: str) -> List[str]:
-        """Check responsive design issues."""
+    def _check_responsive_design(self, driver: 'webdriver.Chrome', url: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Check responsive design issues at each of ``self.breakpoints``.
+
+        The page is loaded once; each breakpoint is applied with DevTools
+        device-metrics emulation, so the already-loaded document is laid out
+        again instead of reloaded. Returns the issues found and a per-breakpoint
+        audit with overflow and overlap metrics and a screenshot.
+        """
+        with tracing.span('browser.get', 'browser', url=url):
+            driver.get(url)
+        page_readiness.wait_for_page_ready(driver, self.max_page_wait)
+        
         issues = []
-        viewports = [
-            (375, 667),  # iPhone
-            (768, 1024),  # Tablet
-            (1920, 1080)  # Desktop
-        ]
+        audit = []
+        try:
+            for name, width, height in self.breakpoints:
+                with tracing.span('browser.emulate', 'browser', breakpoint=name):
+                    self._emulate_viewport(driver, width, height)
+                    metrics = driver.execute_script(_LAYOUT_METRICS_SCRIPT)
+                screenshot = self.screenshot_store.put(driver.get_screenshot_as_png(), url)
+                
+                audit.append({
+                    'breakpoint': name,
+                    'width': width,
+                    'height': height,
+                    'scroll_width': metrics['scrollWidth'],
+                    'overflowing_elements': metrics['overflowing'],
+                    'overlapping_elements': metrics['overlaps'],
+                    'screenshot_path': screenshot['path'],
+                    'screenshot_hash': screenshot['hash']
+                })
+                
+                # Check for horizontal scrolling
+                if metrics['scrollWidth'] > width:
+                    issues.append(f"Horizontal scrolling at {width}x{height}")
+                
+                # Check for overlapping elements
+                if metrics['overlaps']:
+                    issues.append(f"Overlapping elements at {width}x{height}")
+        finally:
+            self._clear_viewport_emulation(driver)
         
-        for width, height in viewports:
+        return issues, audit
+
+    @staticmethod
+    def _emulate_viewport(driver: 'webdriver.Chrome', width: int, height: int) -> None:
+        """Lay the current document out at a viewport size and wait for two frames."""
+        try:
+            driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+                'width': width,
+                'height': height,
+                'deviceScaleFactor': 1,
+                'mobile': width < 768
+            })
+        except Exception:
+            # Drivers without DevTools access fall back to resizing the window
             driver.set_window_size(width, height)
-            driver.get(url)
-            time.sleep(2)
-            
-            # Check for horizontal scrolling
-            scroll_width = driver.execute_script('return document.documentElement.scrollWidth')
-            if scroll_width > width:
-                issues.append(f"Horizontal scrolling at {width}x{height}")
-            
-            # Check for overlapping elements
-            overlapping = driver.execute_script("""
-                var elements = document.getElementsByTagName('*');
-                for (var i = 0; i < elements.length; i++) {
-                    var rect1 = elements[i].getBoundingClientRect();
-                    for (var j = i + 1; j < elements.length; j++) {
-                        var rect2 = elements[j].getBoundingClientRect();
-                        if (!(rect1.right < rect2.left || 
-                            rect1.left > rect2.right || 
-                            rect1.bottom < rect2.top || 
-                            rect1.top > rect2.bottom)) {
-                            return true;
-                        }
-                    }
-                }
-                return false;
-            """)
-            
-            if overlapping:
-                issues.append(f"Overlapping elements at {width}x{height}")
-        
-        return issues
+        driver.execute_async_script(
+            "const done = arguments[arguments.length - 1];"
+            "requestAnimationFrame(() => requestAnimationFrame(done));"
+        )
+
+    @staticmethod
+    def _clear_viewport_emulation(driver: 'webdriver.Chrome') -> None:
+        try:
+            driver.execute_cdp_cmd('Emulation.clearDeviceMetricsOverride', {})
+        except Exception:
+            pass
 
     def _generate_design_insights(self, results: Dict[str, Any]) -> List[str]:
         """Generate insights from website analysis."""
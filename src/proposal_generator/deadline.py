@@ -0,0 +1,66 @@
+"""Shared time budget for a proposal run.
+
+The generator creates one ``Deadline`` per run and puts it in the run
+context. Components check it cooperatively: they cap request timeouts and
+politeness sleeps to the remaining budget, and stop looping over pages or
+competitors once it has expired, returning what they have with
+``'partial': True``. Stages that still have not finished when the budget
+runs out are cut by the scheduler.
+"""
+from typing import Dict, Any, Optional
+import asyncio
+import time
+
+
+class Deadline:
+    """A point in time after which remaining work should be abandoned.
+
+    ``Deadline()`` never expires, so components can use the same code path
+    whether or not the caller set a budget.
+    """
+
+    # Shortest timeout handed to a request once the budget is nearly spent
+    MIN_TIMEOUT = 1.0
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    @classmethod
+    def of(cls, context: Optional[Dict[str, Any]]) -> 'Deadline':
+        """The run's deadline, or one that never expires outside a run."""
+        return (context or {}).get('deadline') or cls()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None if there is no limit."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, seconds: float) -> float:
+        """Cap a request timeout to the remaining budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        return max(self.MIN_TIMEOUT, min(seconds, remaining))
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep for up to ``seconds``; return False if the deadline cut the sleep short."""
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            time.sleep(remaining)
+            return False
+        time.sleep(seconds)
+        return True
+
+    async def sleep_async(self, seconds: float) -> bool:
+        """Non-blocking ``sleep``."""
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            await asyncio.sleep(remaining)
+            return False
+        await asyncio.sleep(seconds)
+        return True
@@ -1,40 +1,120 @@
 import logging
+import contextlib
+import contextvars
+import functools
+import importlib
 import os
 import tempfile
-import html2text
 import platform
 import time
 import json
-from typing import Dict, Any, List
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from .components.website_analyzer import WebsiteAnalyzer
-from .components.competitor_analyzer import CompetitorAnalyzer
-from .components.competitor_finder import CompetitorFinder
-from .components.competitive_analyzer import CompetitiveAnalyzer
-from .components.sentiment_analyzer import SentimentAnalyzer
-from .components.seo_analyzer import SEOAnalyzer
-from .components.website_screenshotter import WebsiteScreenshotter
-from .components.mockup_generator import MockupGenerator
+import re
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from . import tracing
+from .components.analysis_cache import AnalysisCache
+from .deadline import Deadline
+from .scheduler import StageScheduler
+
+# Names used for pipeline stages in the proposal's coverage notes
+STAGE_LABELS = {
+    'website': 'Website analysis',
+    'seo': 'SEO analysis',
+    'screenshot': 'Visual design analysis',
+    'competitor_finder': 'Competitor discovery',
+    'competitor_analysis': 'Competitor analysis',
+    'competitive_analysis': 'Market and financial analysis',
+    'sentiment': 'Sentiment analysis',
+    'mockups': 'Design mockups'
+}
+
+# Proposal sections in document order, with the stages each one is rendered
+# from. Coverage notes depend on every stage.
+PROPOSAL_SECTIONS = {
+    'title': (),
+    'executive_summary': ('website', 'seo', 'competitor_analysis', 'competitive_analysis', 'sentiment'),
+    'website_overview': ('website', 'seo', 'screenshot'),
+    'market_analysis': ('competitor_analysis', 'competitive_analysis', 'sentiment'),
+    'project_scope': ('website', 'seo', 'screenshot'),
+    'implementation_strategy': ('website', 'seo', 'competitor_analysis', 'competitive_analysis'),
+    'mockups': ('mockups',),
+    'investment': (),
+    'coverage_notes': None
+}
+
+# Client pages shown as screenshot thumbnails in the visual analysis
+MAX_PROPOSAL_SCREENSHOTS = 4
+
+# A markdown line holding only an image: ![caption](path)
+IMAGE_LINE = re.compile(r'^!\[(?P<caption>[^\]]*)\]\((?P<path>[^)]+)\)$')
+
+class _LazyComponent:
+    """Builds a generator component the first time it is accessed.
+
+    The component module is imported only then, so a proposal pays the
+    import and setup cost only for the stages its analysis options request.
+    """
+
+    def __init__(self, module_name: str, class_name: str):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.name = None
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        # Stages may first touch a component from several threads at once
+        with instance._component_locks_guard:
+            lock = instance._component_locks.setdefault(self.name, threading.Lock())
+        with lock:
+            component = instance.__dict__.get(self.name)
+            if component is None:
+                instance.logger.debug(f"Initializing {self.class_name}")
+                module = importlib.import_module(self.module_name, __package__)
+                component = getattr(module, self.class_name)()
+                # Stored on the instance, so later lookups bypass this descriptor
+                instance.__dict__[self.name] = component
+            return component
 
 class ProposalGenerator:
     """Generates comprehensive proposals based on client briefs."""
     
-    def __init__(self):
-        """Initialize the proposal generator with all necessary components."""
-        self.logger = logging.getLogger(__name__)
+    # Components are created on first use
+    website_analyzer = _LazyComponent('.components.website_analyzer', 'WebsiteAnalyzer')
+    competitor_analyzer = _LazyComponent('.components.competitor_analyzer', 'CompetitorAnalyzer')
+    competitor_finder = _LazyComponent('.components.competitor_finder', 'CompetitorFinder')
+    competitive_analyzer = _LazyComponent('.components.competitive_analyzer', 'CompetitiveAnalyzer')
+    sentiment_analyzer = _LazyComponent('.components.sentiment_analyzer', 'SentimentAnalyzer')
+    seo_analyzer = _LazyComponent('.components.seo_analyzer', 'SEOAnalyzer')
+    website_screenshotter = _LazyComponent('.components.website_screenshotter', 'WebsiteScreenshotter')
+    mockup_generator = _LazyComponent('.components.mockup_generator', 'MockupGenerator')
+    
+    def __init__(self, max_workers: int = 4, use_cache: bool = True, cache_path: Optional[str] = None):
+        """Initialize the proposal generator.
+        
+        Analysis components are not built here; each one is constructed the
+        first time a stage needs it.
         
-        # Initialize components
-        self.website_analyzer = WebsiteAnalyzer()
-        self.competitor_analyzer = CompetitorAnalyzer()
-        self.competitor_finder = CompetitorFinder()
-        self.competitive_analyzer = CompetitiveAnalyzer()
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.seo_analyzer = SEOAnalyzer()
-        self.website_screenshotter = WebsiteScreenshotter()
-        self.mockup_generator = MockupGenerator()
+        Args:
+            max_workers: Maximum number of analysis stages to run concurrently
+            use_cache: Reuse analysis results stored by earlier runs
+            cache_path: Location of the analysis cache database
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.analysis_cache = AnalysisCache(cache_path) if use_cache else None
+        # Seconds spent in each stage of the most recent proposal, plus rendering
+        self.last_stage_timings: Dict[str, float] = {}
+        # Spans recorded during the most recent proposal
+        self.last_trace: Optional[tracing.Trace] = None
+        # Stages the deadline cut from the most recent proposal, with the reason
+        self.last_cut_stages: Dict[str, str] = {}
+        
+        self._component_locks: Dict[str, threading.Lock] = {}
+        self._component_locks_guard = threading.Lock()
         
         # Set up logging if not already configured
         if not logging.getLogger().handlers:
@@ -43,137 +123,499 @@ class ProposalGenerator:
                 format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
             )
 
-    def create_proposal(self, client_brief: Dict[str, Any]) -> str:
-        """Create a complete proposal based on client brief."""
+    def create_proposal(self, client_brief: Dict[str, Any], return_trace: bool = False,
+                        deadline: Optional[float] = None) -> Union[str, Tuple[str, tracing.Trace]]:
+        """Create a complete proposal based on client brief.
+        
+        Every run records a trace of its stages, component calls, requests
+        and cache lookups in ``last_trace``.
+        
+        Args:
+            client_brief: The client brief
+            return_trace: Return a ``(proposal, trace)`` tuple instead of the proposal
+            deadline: Time budget in seconds for the analyses. Analyses that run
+                out of time stop early or are left out, and the proposal lists
+                them in a coverage notes section.
+        """
+        trace = tracing.Trace(client_brief.get('client_name') or 'proposal')
+        self.last_trace = trace
         try:
-            self.logger.info("Starting proposal generation")
-            
-            # Initialize analyses
-            website_analysis = None
-            competitor_analysis = None
-            competitive_analysis = None
-            sentiment_analysis = None
-            seo_analysis = None
-            visual_analysis = None
-            
-            # Get analysis options
-            analysis_options = client_brief.get('analysis_options', {})
-            
-            # Website Analysis
-            website_url = client_brief.get('website_url')
-            if website_url and analysis_options.get('website_analysis'):
-                self.logger.info(f"Analyzing website: {website_url}")
-                website_analysis = self.website_analyzer.process(website_url)
-                if website_analysis.get('error'):
-                    self.logger.error(f"Website analysis failed: {website_analysis['error']}")
-                    website_analysis = None
-                else:
-                    # Additional analyses for the website
-                    seo_analysis = self.seo_analyzer.process({'website': website_url})
-                    visual_analysis = self.website_screenshotter.process({'url': website_url, 'is_client': True})
-            
-            # Competitor Analysis
-            if analysis_options.get('competitor_analysis'):
-                self.logger.info("Finding and analyzing competitors...")
-                # First find competitors
-                finder_results = self.competitor_finder.process(client_brief)
+            with trace.activate(), tracing.span('create_proposal', 'proposal'):
+                self.logger.info("Starting proposal generation")
                 
-                if finder_results and finder_results.get('competitors'):
-                    self.logger.info(f"Found {len(finder_results['competitors'])} competitors")
-                    # Then analyze them in detail
-                    competitor_analysis = self.competitor_analyzer.process(finder_results['competitors'])
-                    
-                    if competitor_analysis and competitor_analysis.get('competitors'):
-                        self.logger.info("Analyzing market and financial data...")
-                        # Get market and financial data
-                        competitors = [comp.get('website', '') for comp in competitor_analysis.get('competitors', [])]
-                        competitive_analysis = self.competitive_analyzer.process({
-                            'company_name': client_brief.get('client_name', ''),
-                            'competitors': competitors,
-                            'industry': client_brief.get('industry', '')
-                        })
-                else:
-                    self.logger.warning("No competitors found by competitor finder")
-            
-            # Sentiment Analysis
-            if analysis_options.get('sentiment_analysis'):
-                self.logger.info("Analyzing market sentiment...")
-                sentiment_analysis = self.sentiment_analyzer.process(client_brief)
-            
-            # Generate mockups if requested
-            mockups = None
-            if analysis_options.get('mockups'):
-                self.logger.info("Generating mockups...")
-                mockups = self.mockup_generator.process(client_brief)
-            
-            # Generate each section
-            sections = []
-            
-            # Title
-            project_name = f"Proposal for {client_brief.get('client_name', 'Client')}"
-            sections.append(f"# {project_name}\n")
+                # Run all requested analyses concurrently, respecting dependencies
+                context = self._create_run_context(deadline)
+                scheduler = self._build_scheduler(client_brief, context)
+                with self._screenshot_lease(scheduler):
+                    results = scheduler.run(context['deadline'])
+                    analyses = self._collect_analyses(results, self._coverage_notes(scheduler, results, deadline))
+                    self._log_run_stats(context)
+                
+                    proposal = self._render_timed(client_brief, analyses, scheduler)
+            return (proposal, trace) if return_trace else proposal
             
-            # Executive Summary
-            sections.append(self._generate_executive_summary(
+        except Exception as e:
+            self.logger.error(f"Error generating proposal: {str(e)}")
+            raise
+
+    async def create_proposal_async(self, client_brief: Dict[str, Any], return_trace: bool = False,
+                                    deadline: Optional[float] = None) -> Union[str, Tuple[str, tracing.Trace]]:
+        """Create a complete proposal without blocking the event loop.
+        
+        Network-bound analyses use non-blocking HTTP and sleeps, and the
+        remaining blocking stages run in worker threads, so a single event
+        loop can drive many proposals at once. Tracing and deadlines work as
+        in ``create_proposal``.
+        """
+        trace = tracing.Trace(client_brief.get('client_name') or 'proposal')
+        self.last_trace = trace
+        try:
+            with trace.activate(), tracing.span('create_proposal', 'proposal'):
+                self.logger.info("Starting proposal generation")
+                
+                context = self._create_run_context(deadline)
+                scheduler = self._build_scheduler(client_brief, context, use_async=True)
+                with self._screenshot_lease(scheduler):
+                    results = await scheduler.run_async(context['deadline'])
+                    analyses = self._collect_analyses(results, self._coverage_notes(scheduler, results, deadline))
+                    self._log_run_stats(context)
+                
+                    proposal = self._render_timed(client_brief, analyses, scheduler)
+            return (proposal, trace) if return_trace else proposal
+            
+        except Exception as e:
+            self.logger.error(f"Error generating proposal: {str(e)}")
+            raise
+
+    def stream_proposal(self, client_brief: Dict[str, Any],
+                        deadline: Optional[float] = None) -> Iterator[Tuple[str, str]]:
+        """Yield ``(section, markdown)`` pairs as soon as each section can be rendered.
+        
+        A section is rendered once the analyses it depends on have finished
+        (see ``PROPOSAL_SECTIONS``), so sections arrive in the order their
+        analyses complete rather than in document order. Sections the
+        analyses leave out are not yielded. ``assemble_proposal`` joins the
+        yielded sections into the document ``create_proposal`` would return.
+        The trace, stage timings and cut stages are recorded as in
+        ``create_proposal``.
+        """
+        # The trace stays active between sections, so every step runs in a
+        # private context instead of the caller's
+        run_context = contextvars.copy_context()
+        sections = self._stream_sections(client_brief, deadline)
+        try:
+            while True:
+                try:
+                    yield run_context.run(next, sections)
+                except StopIteration:
+                    return
+        finally:
+            run_context.run(sections.close)
+
+    @staticmethod
+    def assemble_proposal(sections: Dict[str, Optional[str]]) -> str:
+        """Join rendered sections, keyed by section name, in document order."""
+        return "\n\n".join(sections[name] for name in PROPOSAL_SECTIONS if sections.get(name))
+
+    def _stream_sections(self, client_brief: Dict[str, Any],
+                         deadline: Optional[float]) -> Iterator[Tuple[str, str]]:
+        """Run the analyses and render each section once its stages have settled."""
+        trace = tracing.Trace(client_brief.get('client_name') or 'proposal')
+        self.last_trace = trace
+        try:
+            with trace.activate(), tracing.span('create_proposal', 'proposal'):
+                self.logger.info("Starting proposal generation")
+                
+                context = self._create_run_context(deadline)
+                scheduler = self._build_scheduler(client_brief, context)
+                with self._screenshot_lease(scheduler):
+                    results: Dict[str, Any] = {}
+                    remaining = list(PROPOSAL_SECTIONS)
+                    render_time = 0.0
+                
+                    def render_ready(settled, coverage_notes=None):
+                        nonlocal render_time
+                        analyses = self._collect_analyses(results, coverage_notes)
+                        for name in list(remaining):
+                            stages = PROPOSAL_SECTIONS[name]
+                            if stages is None:
+                                stages = scheduler.stages
+                            if any(stage in scheduler.stages and stage not in settled for stage in stages):
+                                continue
+                            remaining.remove(name)
+                            start = time.perf_counter()
+                            with tracing.span('render', 'stage', section=name):
+                                markdown = self._render_section(name, client_brief, analyses)
+                            render_time += time.perf_counter() - start
+                            if markdown:
+                                yield name, markdown
+                
+                    # Sections that need no analysis are available immediately
+                    yield from render_ready(set())
+                    for name, result in scheduler.iter_run(context['deadline']):
+                        results[name] = result
+                        yield from render_ready(results.keys())
+                
+                    # Every stage has now finished or been cut
+                    coverage_notes = self._coverage_notes(scheduler, results, deadline)
+                    self._log_run_stats(context)
+                    yield from render_ready(scheduler.stages.keys(), coverage_notes)
+                    self.last_stage_timings = dict(scheduler.timings, render=render_time)
+                
+        except Exception as e:
+            self.logger.error(f"Error generating proposal: {str(e)}")
+            raise
+
+    def _render_timed(self, client_brief: Dict[str, Any], analyses: Dict[str, Any],
+                      scheduler: StageScheduler) -> str:
+        """Render the proposal and record the stage and rendering timings."""
+        start = time.perf_counter()
+        with tracing.span('render', 'stage'):
+            proposal = self._render_proposal(client_brief, analyses)
+        self.last_stage_timings = dict(scheduler.timings, render=time.perf_counter() - start)
+        return proposal
+
+    def _render_proposal(self, client_brief: Dict[str, Any], analyses: Dict[str, Any]) -> str:
+        """Render the proposal markdown from the collected analyses."""
+        return self.assemble_proposal({
+            name: self._render_section(name, client_brief, analyses)
+            for name in PROPOSAL_SECTIONS
+        })
+
+    def _render_section(self, name: str, client_brief: Dict[str, Any],
+                        analyses: Dict[str, Any]) -> Optional[str]:
+        """Render one proposal section, or None if the analyses leave it out."""
+        website_analysis = analyses['website_analysis']
+        competitor_analysis = analyses['competitor_analysis']
+        competitive_analysis = analyses['competitive_analysis']
+        sentiment_analysis = analyses['sentiment_analysis']
+        seo_analysis = analyses['seo_analysis']
+        visual_analysis = analyses['visual_analysis']
+        mockups = analyses['mockups']
+        
+        if name == 'title':
+            project_name = f"Proposal for {client_brief.get('client_name', 'Client')}"
+            return f"# {project_name}"
+        
+        if name == 'executive_summary':
+            return self._generate_executive_summary(
                 client_brief,
                 website_analysis=website_analysis,
                 competitor_analysis=competitor_analysis,
                 competitive_analysis=competitive_analysis,
                 sentiment_analysis=sentiment_analysis,
                 seo_analysis=seo_analysis
-            ))
-            sections.append("")
-            
-            # Current Website Analysis
-            if website_analysis or seo_analysis or visual_analysis:
-                sections.append(self._generate_website_overview(
-                    website_analysis=website_analysis,
-                    seo_analysis=seo_analysis,
-                    visual_analysis=visual_analysis
-                ))
-                sections.append("")
-            
-            # Market Analysis
-            if competitor_analysis or competitive_analysis or sentiment_analysis:
-                sections.append(self._generate_market_analysis(
-                    competitor_analysis=competitor_analysis,
-                    competitive_analysis=competitive_analysis,
-                    sentiment_analysis=sentiment_analysis
-                ))
-                sections.append("")
-            
-            # Project Scope
-            sections.append(self._generate_project_scope(
+            )
+        
+        # Current Website Analysis
+        if name == 'website_overview':
+            if not (website_analysis or seo_analysis or visual_analysis):
+                return None
+            return self._generate_website_overview(
+                website_analysis=website_analysis,
+                seo_analysis=seo_analysis,
+                visual_analysis=visual_analysis
+            )
+        
+        if name == 'market_analysis':
+            if not (competitor_analysis or competitive_analysis or sentiment_analysis):
+                return None
+            return self._generate_market_analysis(
+                competitor_analysis=competitor_analysis,
+                competitive_analysis=competitive_analysis,
+                sentiment_analysis=sentiment_analysis
+            )
+        
+        if name == 'project_scope':
+            return self._generate_project_scope(
                 client_brief,
                 website_analysis=website_analysis,
                 seo_analysis=seo_analysis,
                 visual_analysis=visual_analysis
-            ))
-            sections.append("")
-            
-            # Implementation Strategy
-            sections.append(self._generate_implementation_strategy(
+            )
+        
+        if name == 'implementation_strategy':
+            return self._generate_implementation_strategy(
                 client_brief,
                 website_analysis=website_analysis,
                 competitor_analysis=competitor_analysis,
                 competitive_analysis=competitive_analysis,
                 seo_analysis=seo_analysis
-            ))
-            sections.append("")
-            
-            # Mockups and Visuals
-            if mockups:
-                sections.append(self._generate_mockups_section(mockups))
-                sections.append("")
-            
-            # Investment
-            sections.append(self._generate_investment(client_brief))
-            
-            return "\n".join(sections)
-            
-        except Exception as e:
-            self.logger.error(f"Error generating proposal: {str(e)}")
-            raise
+            )
+        
+        # Mockups and Visuals
+        if name == 'mockups':
+            return self._generate_mockups_section(mockups) if mockups else None
+        
+        if name == 'investment':
+            return self._generate_investment(client_brief)
+        
+        # Analyses the deadline cut short or left out
+        if name == 'coverage_notes':
+            if not analyses['coverage_notes']:
+                return None
+            return self._generate_coverage_notes(analyses['coverage_notes'])
+        
+        raise ValueError(f"Unknown proposal section '{name}'")
+
+    def _create_run_context(self, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Create the state shared by all stages of a single proposal run.
+
+        The page store makes sure each URL is downloaded once per run, no
+        matter how many analyzers read it. The analysis cache, if enabled,
+        persists results across runs. The deadline starts counting now.
+        """
+        from .components.page_store import PageStore
+        
+        return {
+            'page_store': PageStore(),
+            'analysis_cache': self.analysis_cache,
+            'deadline': Deadline(deadline)
+        }
+
+    @staticmethod
+    def _screenshot_lease(scheduler: StageScheduler):
+        """Keep the screenshots a run captures or shows from being evicted while it needs them.
+
+        Runs without screenshot or mockup stages don't touch the store.
+        """
+        if 'screenshot' not in scheduler.stages and 'mockups' not in scheduler.stages:
+            return contextlib.nullcontext()
+        from .components import screenshot_store
+
+        return screenshot_store.get_store().lease()
+
+    def _coverage_notes(self, scheduler: StageScheduler, results: Dict[str, Any],
+                        deadline: Optional[float]) -> List[str]:
+        """Describe the analyses the deadline cut short or left out."""
+        self.last_cut_stages = dict(scheduler.cut)
+        notes = []
+        for name in scheduler.stages:
+            label = STAGE_LABELS.get(name, name)
+            reason = scheduler.cut.get(name)
+            result = results.get(name)
+            if reason == StageScheduler.TIMED_OUT:
+                notes.append(f"{label} did not finish within the {deadline:g}-second time limit and was left out.")
+            elif reason == StageScheduler.NOT_STARTED:
+                notes.append(f"{label} could not start before the {deadline:g}-second time limit and was left out.")
+            elif isinstance(result, dict) and result.get('partial'):
+                notes.append(f"{label} was cut short by the {deadline:g}-second time limit and is based on partial data.")
+        if notes:
+            tracing.current_span().set(cut_stages=self.last_cut_stages)
+        return notes
+
+    def _log_run_stats(self, context: Dict[str, Any]) -> None:
+        """Log fetch statistics for a finished run."""
+        from .components import concurrency
+
+        stats = context['page_store'].stats()
+        tracing.current_span().set(page_store=stats, concurrency=concurrency.get_limiter().stats())
+        self.logger.info(
+            f"Page store: {stats['misses']} fetched, {stats['hits']} reused, "
+            f"{stats['bytes_fetched']} bytes downloaded"
+        )
+        if context.get('analysis_cache') is not None:
+            cache = context['analysis_cache']
+            self.logger.info(f"Analysis cache: {cache.hits} hits, {cache.misses} misses")
+
+    def _build_scheduler(self, client_brief: Dict[str, Any], context: Dict[str, Any],
+                         use_async: bool = False) -> StageScheduler:
+        """Build the analysis stage graph for the requested analysis options.
+
+        Website, SEO, screenshot, competitor finding, sentiment and mockup
+        stages are independent and run in parallel; competitor and competitive
+        analysis start as soon as the competitor finder returns. With
+        ``use_async`` the network-bound stages use their non-blocking variants.
+        """
+        analysis_options = client_brief.get('analysis_options', {})
+        scheduler = StageScheduler(max_workers=self.max_workers)
+
+        def add_stage(name, func, async_func=None, depends_on=None):
+            runner = async_func if use_async and async_func else func
+            scheduler.add_stage(name, functools.partial(runner, client_brief, context=context), depends_on=depends_on)
+        
+        # Website Analysis
+        if client_brief.get('website_url') and analysis_options.get('website_analysis'):
+            add_stage('website', self._run_website_analysis, self._run_website_analysis_async)
+            add_stage('seo', self._run_seo_analysis, self._run_seo_analysis_async)
+            add_stage('screenshot', self._run_screenshot_analysis)
+        
+        # Competitor Analysis
+        if analysis_options.get('competitor_analysis'):
+            add_stage('competitor_finder', self._run_competitor_finder)
+            add_stage(
+                'competitor_analysis',
+                self._run_competitor_analysis,
+                self._run_competitor_analysis_async,
+                depends_on=['competitor_finder']
+            )
+            add_stage(
+                'competitive_analysis',
+                self._run_competitive_analysis,
+                self._run_competitive_analysis_async,
+                depends_on=['competitor_finder']
+            )
+        
+        # Sentiment Analysis
+        if analysis_options.get('sentiment_analysis'):
+            add_stage('sentiment', self._run_sentiment_analysis)
+        
+        # Generate mockups if requested, in the colors of the client's current site
+        if analysis_options.get('mockups'):
+            add_stage('mockups', self._run_mockup_generation,
+                      depends_on=['screenshot'] if 'screenshot' in scheduler.stages else None)
+        
+        return scheduler
+
+    def _run_website_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                              context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Analyze the client website, returning None if the analysis failed."""
+        website_url = client_brief['website_url']
+        self.logger.info(f"Analyzing website: {website_url}")
+        return self._check_website_analysis(
+            self.website_analyzer.process(website_url, context, **self._crawl_options(client_brief))
+        )
+
+    async def _run_website_analysis_async(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                          context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Analyze the client website without blocking, returning None if the analysis failed."""
+        website_url = client_brief['website_url']
+        self.logger.info(f"Analyzing website: {website_url}")
+        return self._check_website_analysis(
+            await self.website_analyzer.process_async(website_url, context, **self._crawl_options(client_brief))
+        )
+
+    def _crawl_options(self, client_brief: Dict[str, Any]) -> Dict[str, Any]:
+        """Crawl limits requested in the brief's ``analysis_options``, if any."""
+        analysis_options = client_brief.get('analysis_options', {})
+        options = {}
+        if analysis_options.get('crawl_pages'):
+            options['max_pages'] = int(analysis_options['crawl_pages'])
+            if analysis_options.get('crawl_depth'):
+                options['max_depth'] = int(analysis_options['crawl_depth'])
+        return options
+
+    def _check_website_analysis(self, website_analysis: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Discard a failed website analysis."""
+        if website_analysis.get('error'):
+            self.logger.error(f"Website analysis failed: {website_analysis['error']}")
+            return None
+        return website_analysis
+
+    def _run_seo_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                          context: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze the client website's SEO."""
+        return self.seo_analyzer.process({'website': client_brief['website_url']}, context)
+
+    async def _run_seo_analysis_async(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                      context: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze the client website's SEO without blocking."""
+        return await self.seo_analyzer.process_async({'website': client_brief['website_url']}, context)
+
+    def _run_screenshot_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                 context: Dict[str, Any]) -> Dict[str, Any]:
+        """Capture and analyze screenshots of the client website."""
+        website_url = client_brief['website_url']
+        return self.website_screenshotter.process({'url': website_url, 'website': website_url, 'is_client': True}, context)
+
+    def _run_competitor_finder(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                               context: Dict[str, Any]) -> Dict[str, Any]:
+        """Find competitors for the client."""
+        self.logger.info("Finding and analyzing competitors...")
+        finder_results = self.competitor_finder.process(client_brief, context)
+        if finder_results and finder_results.get('competitors'):
+            self.logger.info(f"Found {len(finder_results['competitors'])} competitors")
+        else:
+            self.logger.warning("No competitors found by competitor finder")
+        return finder_results
+
+    def _run_competitor_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                 context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Analyze the competitors returned by the finder in detail."""
+        competitors = self._found_competitors(results)
+        if not competitors:
+            return None
+        return self.competitor_analyzer.process(competitors, context)
+
+    async def _run_competitor_analysis_async(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                             context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Analyze the competitors returned by the finder without blocking."""
+        competitors = self._found_competitors(results)
+        if not competitors:
+            return None
+        return await self.competitor_analyzer.process_async(competitors, context)
+
+    def _run_competitive_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                  context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Gather market and financial data for the competitors returned by the finder."""
+        if not self._found_competitors(results):
+            return None
+        self.logger.info("Analyzing market and financial data...")
+        return self.competitive_analyzer.process(self._competitive_request(client_brief, results), context)
+
+    async def _run_competitive_analysis_async(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                              context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Gather market and financial data for the found competitors without blocking."""
+        if not self._found_competitors(results):
+            return None
+        self.logger.info("Analyzing market and financial data...")
+        return await self.competitive_analyzer.process_async(
+            self._competitive_request(client_brief, results), context
+        )
+
+    def _found_competitors(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Competitors returned by the competitor finder stage."""
+        finder_results = results.get('competitor_finder') or {}
+        return finder_results.get('competitors') or []
+
+    def _competitive_request(self, client_brief: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the competitive analyzer input from the brief and found competitors."""
+        competitors = [comp.get('website', '') for comp in self._found_competitors(results) if comp.get('website')]
+        return {
+            'company_name': client_brief.get('client_name', ''),
+            'competitors': competitors,
+            'industry': client_brief.get('industry', '')
+        }
+
+    def _run_sentiment_analysis(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                                context: Dict[str, Any]) -> Dict[str, Any]:
+        """Analyze market sentiment for the client."""
+        self.logger.info("Analyzing market sentiment...")
+        return self.sentiment_analyzer.process(client_brief)
+
+    def _run_mockup_generation(self, client_brief: Dict[str, Any], results: Dict[str, Any],
+                               context: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate design mockups for the client."""
+        self.logger.info("Generating mockups...")
+        visual_analysis = results.get('screenshot') or {}
+        return self.mockup_generator.process(
+            client_brief, {'website_analysis': visual_analysis.get('client_website') or {}}
+        )
+
+    def _collect_analyses(self, results: Dict[str, Any], coverage_notes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Combine stage results into the analyses used to render the proposal."""
+        website_analysis = results.get('website')
+        competitor_analysis = results.get('competitor_analysis')
+        
+        # SEO and visual analysis are only reported alongside a successful website analysis
+        seo_analysis = results.get('seo') if website_analysis else None
+        visual_analysis = results.get('screenshot') if website_analysis else None
+        
+        # Market and financial data is only reported when competitors were analyzed
+        competitive_analysis = None
+        if competitor_analysis and competitor_analysis.get('competitors'):
+            competitive_analysis = results.get('competitive_analysis')
+        
+        return {
+            'website_analysis': website_analysis,
+            'seo_analysis': seo_analysis,
+            'visual_analysis': visual_analysis,
+            'competitor_analysis': competitor_analysis,
+            'competitive_analysis': competitive_analysis,
+            'sentiment_analysis': results.get('sentiment'),
+            'mockups': results.get('mockups'),
+            'coverage_notes': coverage_notes or []
+        }
 
     def _generate_executive_summary(self, client_brief: Dict[str, Any], **kwargs) -> str:
         """Generate the executive summary section."""
@@ -339,17 +781,46 @@ class ProposalGenerator:
                 sections.append("\n#### Responsive Design Issues")
                 for issue in visual_analysis['responsive_issues']:
                     sections.append(f"- {issue}")
+            
+            # Screenshots of the client's current pages
+            screenshots = self._screenshot_thumbnails(visual_analysis.get('client_website') or {})
+            if screenshots:
+                sections.append("\n#### Current Pages")
+                for caption, thumbnail in screenshots:
+                    sections.append(f"\n![{caption}]({thumbnail})")
         
         return "\n".join(sections)
 
+    @staticmethod
+    def _screenshot_thumbnails(site_analysis: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Captions and thumbnail paths for the first screenshots of a site's pages."""
+        from .components import screenshot_store
+        
+        store = screenshot_store.get_store()
+        thumbnails = []
+        seen = set()
+        for page in site_analysis.get('pages') or []:
+            content_hash = (page or {}).get('screenshot_hash')
+            if not content_hash or content_hash in seen:
+                continue
+            seen.add(content_hash)
+            thumbnail = store.thumbnail(content_hash, 'medium')
+            if thumbnail:
+                caption = (page.get('title') or page.get('url') or '').replace('[', '(').replace(']', ')').strip()
+                thumbnails.append((caption, thumbnail))
+            if len(thumbnails) == MAX_PROPOSAL_SCREENSHOTS:
+                break
+        return thumbnails
+
     def _generate_market_analysis(self, **kwargs) -> str:
         """Generate the market analysis section based on competitor and sentiment analysis."""
         sections = []
         sections.append("## Market Analysis\n")
         
-        competitor_analysis = kwargs.get('competitor_analysis', {})
-        competitive_analysis = kwargs.get('competitive_analysis', {})
-        sentiment_analysis = kwargs.get('sentiment_analysis', {})
+        # Analyses cut by the deadline are None even when related ones are present
+        competitor_analysis = kwargs.get('competitor_analysis') or {}
+        competitive_analysis = kwargs.get('competitive_analysis') or {}
+        sentiment_analysis = kwargs.get('sentiment_analysis') or {}
         
         # Market Overview
         sections.append("### Market Overview")
@@ -613,8 +1084,8 @@ class ProposalGenerator:
                         strategy.append(f"| {p['priority']} | {p['description']} | {p['impact']} |")
         
         # Market Strategy
-        competitor_analysis = kwargs.get('competitor_analysis', {})
-        competitive_analysis = kwargs.get('competitive_analysis', {})
+        competitor_analysis = kwargs.get('competitor_analysis') or {}
+        competitive_analysis = kwargs.get('competitive_analysis') or {}
         
         if competitor_analysis or competitive_analysis:
             strategy.append("\n### Market Strategy\n")
@@ -671,6 +1142,14 @@ class ProposalGenerator:
         
         return "\n".join(strategy)
 
+    def _generate_coverage_notes(self, notes: List[str]) -> str:
+        """Generate the section listing analyses cut by the deadline."""
+        sections = ["## Coverage Notes\n"]
+        sections.append("This proposal was prepared within a fixed time limit, so some analyses are incomplete:\n")
+        for note in notes:
+            sections.append(f"- {note}")
+        return "\n".join(sections)
+
     def _generate_timeline(self, client_brief: Dict[str, Any]) -> str:
         """Generate the project timeline section."""
         timeline = []
@@ -903,6 +1382,13 @@ class ProposalGenerator:
 
     def generate_pdf(self, content: str, output_path: str) -> str:
         """Generate a PDF from the proposal content."""
+        # reportlab is slow to import and only needed for PDF output
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, Image
+        from reportlab.lib.utils import ImageReader
+        from xml.sax.saxutils import escape
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        
         try:
             # Ensure content is a string
             if not isinstance(content, str):
@@ -967,7 +1453,15 @@ class ProposalGenerator:
                     continue
                 
                 try:
-                    if line.startswith('# '):
+                    image = IMAGE_LINE.match(line.strip())
+                    if image and os.path.exists(image.group('path')):
+                        # Screenshots are embedded as thumbnails, scaled to the page width
+                        width, height = ImageReader(image.group('path')).getSize()
+                        scale = min(1.0, doc.width / width)
+                        story.append(Image(image.group('path'), width=width * scale, height=height * scale))
+                        if image.group('caption'):
+                            story.append(Paragraph(f"<i>{escape(image.group('caption'))}</i>", styles['CustomNormal']))
+                    elif line.startswith('# '):
                         # Main heading
                         text = line[2:].strip()
                         story.append(Paragraph(text, styles['CustomHeading1']))
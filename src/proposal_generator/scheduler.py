@@ -0,0 +1,232 @@
+import logging
+import asyncio
+import concurrent.futures
+import contextvars
+import time
+from typing import Dict, Any, List, Callable, Iterator, Optional, Tuple
+from . import tracing
+from .deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """A single unit of work in the proposal pipeline."""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+
+
+class StageScheduler:
+    """Runs pipeline stages as a dependency graph on a bounded thread pool.
+
+    Each stage receives the results of all stages that have finished so far
+    and may start as soon as every stage it depends on has completed, so the
+    total wall-clock time approaches the longest dependency chain rather than
+    the sum of all stages.
+
+    With a deadline, stages still running when it passes are abandoned and
+    stages not yet started are never started. Their names are recorded in
+    ``cut`` and they have no entry in the returned results. Abandoned stages
+    that run in worker threads keep their thread until they return, so
+    stages should also check the deadline themselves.
+    """
+
+    # Reasons recorded in ``cut``
+    TIMED_OUT = 'timed_out'
+    NOT_STARTED = 'not_started'
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        # Wall-clock seconds spent in each stage during the last run
+        self.timings: Dict[str, float] = {}
+        # Stages cut by the deadline during the last run, with the reason
+        self.cut: Dict[str, str] = {}
+
+    def add_stage(self, name: str, func: Callable[[Dict[str, Any]], Any], depends_on: Optional[List[str]] = None) -> None:
+        """Register a stage. Dependencies must be registered before running.
+
+        ``func`` may be a plain function or a coroutine function; coroutine
+        functions are awaited directly by ``run_async`` and executed on a
+        private event loop by ``run``.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+        self.stages[name] = Stage(name, func, depends_on)
+
+    def _validate(self) -> None:
+        """Ensure every dependency exists and the graph has no cycles."""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def run(self, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run all stages and return a mapping of stage name to result."""
+        return dict(self.iter_run(deadline))
+
+    def iter_run(self, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, Any]]:
+        """Run all stages, yielding ``(name, result)`` as each stage finishes.
+
+        Stages keep running in the background while the caller handles a
+        result. Closing the iterator early abandons the stages still running.
+        """
+        self._validate()
+        self.timings = {}
+        self.cut = {}
+        deadline = deadline or Deadline()
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running: Dict[concurrent.futures.Future, str] = {}
+        abandoned = False
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while (pending or running) and not deadline.expired():
+                # Submit every stage whose dependencies are satisfied
+                ready = [
+                    stage for stage in pending.values()
+                    if all(dep in results for dep in stage.depends_on)
+                ]
+                for stage in ready:
+                    del pending[stage.name]
+                    logger.debug(f"Starting stage: {stage.name}")
+                    # Each stage runs in a copy of this context so its spans join the active trace
+                    context = contextvars.copy_context()
+                    future = executor.submit(context.run, self._timed_call, stage, dict(results))
+                    running[future] = stage.name
+
+                if not running:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    running, timeout=deadline.remaining(), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    logger.debug(f"Finished stage: {name}")
+                    yield name, results[name]
+
+            # Keep stages that finished just as the deadline passed
+            for future in [future for future in running if future.done()]:
+                name = running.pop(future)
+                results[name] = future.result()
+                yield name, results[name]
+            self._record_cut(running.values(), pending)
+        except GeneratorExit:
+            abandoned = True
+            raise
+        except Exception:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            # Don't wait for abandoned stages; the proposal is rendered without them
+            executor.shutdown(wait=not (self.cut or abandoned), cancel_futures=True)
+
+    async def run_async(self, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run all stages on the current event loop and return their results.
+
+        Coroutine stages are awaited directly; blocking stages run in worker
+        threads. At most ``max_workers`` stages run at the same time. Stages
+        cut by the deadline are cancelled.
+        """
+        self._validate()
+        self.timings = {}
+        self.cut = {}
+        deadline = deadline or Deadline()
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = set()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run_stage(stage: Stage) -> Any:
+            for dep in stage.depends_on:
+                await tasks[dep]
+            async with semaphore:
+                started.add(stage.name)
+                logger.debug(f"Starting stage: {stage.name}")
+                start = time.perf_counter()
+                try:
+                    with tracing.span(stage.name, 'stage'):
+                        if asyncio.iscoroutinefunction(stage.func):
+                            result = await stage.func(dict(results))
+                        else:
+                            result = await asyncio.to_thread(stage.func, dict(results))
+                finally:
+                    self.timings[stage.name] = time.perf_counter() - start
+            results[stage.name] = result
+            logger.debug(f"Finished stage: {stage.name}")
+            return result
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        if not tasks:
+            return results
+
+        try:
+            done, unfinished = await asyncio.wait(
+                tasks.values(), timeout=deadline.remaining(), return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        unfinished_names = [name for name, task in tasks.items() if task in unfinished]
+        for name in unfinished_names:
+            tasks[name].cancel()
+        self._record_cut(
+            [name for name in unfinished_names if name in started],
+            [name for name in unfinished_names if name not in started]
+        )
+        return results
+
+    def _record_cut(self, timed_out, not_started) -> None:
+        """Record the stages the deadline cut from this run."""
+        for name in timed_out:
+            self.cut[name] = self.TIMED_OUT
+        for name in not_started:
+            self.cut[name] = self.NOT_STARTED
+        if self.cut:
+            logger.warning(f"Deadline reached, cut stages: {', '.join(sorted(self.cut))}")
+
+    def _timed_call(self, stage: Stage, results: Dict[str, Any]) -> Any:
+        """Call a stage and record how long it took."""
+        start = time.perf_counter()
+        try:
+            with tracing.span(stage.name, 'stage'):
+                return self._call_stage(stage, results)
+        finally:
+            self.timings[stage.name] = time.perf_counter() - start
+
+    @staticmethod
+    def _call_stage(stage: Stage, results: Dict[str, Any]) -> Any:
+        """Call a stage from a worker thread, running coroutine stages to completion."""
+        if asyncio.iscoroutinefunction(stage.func):
+            return asyncio.run(stage.func(results))
+        return stage.func(results)
@@ -0,0 +1,277 @@
+"""Structured tracing for proposal runs.
+
+A ``Trace`` collects timed spans for the pipeline stages, component
+``process`` calls, outbound HTTP and browser requests, cache lookups and
+deliberate waits. Code reports spans with the ``span`` context manager or
+the ``traced`` decorator; both are no-ops unless a trace is active in the
+current context, so components cost nothing extra when used on their own.
+
+The active trace and span live in context variables. Asyncio tasks inherit
+them automatically; code that hands work to a thread pool must submit it
+through ``contextvars.copy_context().run`` to keep its spans attached.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Iterator
+import asyncio
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+_active_trace: ContextVar[Optional['Trace']] = ContextVar('proposal_generator_trace', default=None)
+_active_span: ContextVar[Optional['Span']] = ContextVar('proposal_generator_span', default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, trace: 'Trace', name: str, category: str,
+                 parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = next(trace._ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.lane = _current_lane()
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self._start_perf = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes such as byte counts, status codes or cache hits."""
+        self.attributes.update(attributes)
+
+    def record_error(self, error: Any) -> None:
+        """Mark the span as failed."""
+        if isinstance(error, BaseException):
+            error = f"{type(error).__name__}: {error}"
+        self.error = str(error)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._start_perf
+        self.trace._add(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'category': self.category,
+            'start': self.start,
+            'duration_ms': round((self.duration or 0.0) * 1000, 3),
+            'thread': self.lane,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class _NullSpan:
+    """Stand-in returned when no trace is active."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: Any) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """The spans recorded during one proposal run."""
+
+    def __init__(self, name: str = 'proposal'):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.start = time.time()
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def activate(self) -> Iterator['Trace']:
+        """Record spans from the current context into this trace."""
+        trace_token = _active_trace.set(self)
+        span_token = _active_span.set(None)
+        try:
+            yield self
+        finally:
+            _active_span.reset(span_token)
+            _active_trace.reset(trace_token)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Finished spans in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return [span.to_dict() for span in spans]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Count, total seconds and errors per span name, slowest first."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span.name, {'category': span.category, 'count': 0, 'seconds': 0.0, 'errors': 0})
+            entry['count'] += 1
+            entry['seconds'] += span.duration or 0.0
+            if span.error:
+                entry['errors'] += 1
+        return dict(sorted(totals.items(), key=lambda item: item[1]['seconds'], reverse=True))
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Convert to the Chrome trace-event format (chrome://tracing, Perfetto)."""
+        lanes: Dict[Any, int] = {}
+        events = []
+        for span in self.to_dicts():
+            lane = lanes.setdefault(span['thread'], len(lanes) + 1)
+            args = dict(span['attributes'])
+            if span['error']:
+                args['error'] = span['error']
+            events.append({
+                'name': span['name'],
+                'cat': span['category'],
+                'ph': 'X',
+                'ts': round((span['start'] - self.start) * 1e6),
+                'dur': round(span['duration_ms'] * 1000),
+                'pid': 1,
+                'tid': lane,
+                'args': args
+            })
+        for lane_key, tid in lanes.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': lane_key}})
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'trace_id': self.trace_id, 'name': self.name}
+        }
+
+    def export(self, path: str, format: Optional[str] = None) -> str:
+        """Write the trace to a file.
+
+        Args:
+            path: Output file
+            format: 'jsonl' for one span per line, 'chrome' for the trace-event
+                format; inferred from the file extension when omitted
+
+        Returns:
+            The path written
+        """
+        if format is None:
+            format = 'jsonl' if path.endswith('.jsonl') else 'chrome'
+        if format not in ('jsonl', 'chrome'):
+            raise ValueError(f"Unknown trace format '{format}'")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            if format == 'jsonl':
+                for span in self.to_dicts():
+                    f.write(json.dumps(span, default=str) + '\n')
+            else:
+                json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+
+def _current_lane() -> Any:
+    """Identify the thread, or the asyncio task, a span runs on."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return f"task-{task.get_name()}"
+    return threading.current_thread().name
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace active in this context, if any."""
+    return _active_trace.get()
+
+
+def current_span() -> Any:
+    """The innermost open span, or a no-op span outside a trace."""
+    return _active_span.get() or NULL_SPAN
+
+
+@contextmanager
+def span(name: str, category: str = 'internal', **attributes: Any) -> Iterator[Any]:
+    """Time a block as a child of the current span.
+
+    Exceptions raised inside the block are recorded on the span and re-raised.
+    """
+    trace = _active_trace.get()
+    if trace is None:
+        yield NULL_SPAN
+        return
+
+    parent = _active_span.get()
+    current = Span(trace, name, category, parent.span_id if parent else None, attributes)
+    token = _active_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _active_span.reset(token)
+        current.finish()
+
+
+def _record_result(current: Any, result: Any) -> None:
+    """Flag component results that report an error instead of raising."""
+    if isinstance(result, dict) and result.get('error'):
+        current.record_error(result['error'])
+
+
+def traced(category: str = 'component', name: Optional[str] = None):
+    """Decorate a method so every call is recorded as a span.
+
+    The span is named ``ClassName.method`` unless ``name`` is given. Works on
+    plain and coroutine functions.
+    """
+    def decorator(func):
+        def span_name(args) -> str:
+            if name:
+                return name
+            owner = type(args[0]).__name__ if args else func.__module__
+            return f"{owner}.{func.__name__}"
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _active_trace.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name(args), category) as current:
+                    result = await func(*args, **kwargs)
+                    _record_result(current, result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name(args), category) as current:
+                result = func(*args, **kwargs)
+                _record_result(current, result)
+                return result
+        return wrapper
+    return decorator
+
+
+def record_response(current: Any, response: Any) -> None:
+    """Attach the status code and size of an HTTP response to a span."""
+    current.set(status=getattr(response, 'status_code', None), bytes=len(getattr(response, 'content', b'') or b''))
@@ -1,12 +1,29 @@
 import streamlit as st
 import json
 from proposal_generator import ProposalGenerator
+from proposal_generator.generator import IMAGE_LINE, PROPOSAL_SECTIONS
+from proposal_generator.components import screenshot_store
 import os
 import tempfile
 import traceback
 
 st.set_page_config(page_title="AI Proposal Generator", layout="wide")
 
+def show_markdown(content):
+    """Render proposal markdown, showing local images such as screenshot thumbnails with st.image."""
+    text = []
+    for line in content.split('\n'):
+        image = IMAGE_LINE.match(line.strip())
+        if image and os.path.exists(image.group('path')):
+            if text:
+                st.markdown('\n'.join(text))
+                text = []
+            st.image(image.group('path'), caption=image.group('caption') or None)
+        else:
+            text.append(line)
+    if text:
+        st.markdown('\n'.join(text))
+
 st.title("AI Proposal Generator")
 
 # Initialize session state
@@ -18,6 +35,9 @@ if 'pdf_generated' not in st.session_state:
     st.session_state.pdf_generated = False
 if 'mockups' not in st.session_state:
     st.session_state.mockups = None
+# Screenshot store hashes of the mockups shown, by path, so reruns only look up thumbnails
+if 'mockup_hashes' not in st.session_state:
+    st.session_state.mockup_hashes = {}
 
 # Sidebar for template selection and analysis options
 st.sidebar.title("Settings")
@@ -104,10 +124,23 @@ if submitted:
                 # Generate proposal
                 generator = ProposalGenerator()
                 try:
-                    proposal_content = generator.create_proposal(client_brief)
+                    # Show each section as soon as its analyses finish, in document order
+                    live_preview = st.empty()
+                    with live_preview.container():
+                        st.header("Proposal Preview")
+                        placeholders = {name: st.empty() for name in PROPOSAL_SECTIONS}
+                    sections = {}
+                    for name, markdown in generator.stream_proposal(client_brief):
+                        sections[name] = markdown
+                        with placeholders[name].container():
+                            show_markdown(markdown)
+                    proposal_content = ProposalGenerator.assemble_proposal(sections)
+                    # The full preview below replaces the live one
+                    live_preview.empty()
                     
                     # Store proposal content
                     st.session_state.proposal_content = proposal_content
+                    st.session_state.mockup_hashes = {}
                     
                     # Generate PDF
                     with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
@@ -160,8 +193,14 @@ if st.session_state.mockups:
     # Display mockups
     for i, (page_name, mockup_path) in enumerate(mockups_list):
         if isinstance(mockup_path, str) and os.path.exists(mockup_path):
+            # Show a cached thumbnail rather than the full-size image, storing each mockup once
+            store = screenshot_store.get_store()
+            mockup_hash = st.session_state.mockup_hashes.get(mockup_path)
+            if mockup_hash is None:
+                mockup_hash = store.put_file(mockup_path, near_duplicates=False)['hash']
+                st.session_state.mockup_hashes[mockup_path] = mockup_hash
             with mockup_cols[i % 2]:
-                st.image(mockup_path, caption=page_name)
+                st.image(store.thumbnail(mockup_hash, 'medium') or mockup_path, caption=page_name)
 
 # Display download button and preview outside the form
 if st.session_state.proposal_content is not None:
@@ -182,4 +221,4 @@ if st.session_state.proposal_content is not None:
     
     # Display preview
     st.header("Proposal Preview")
-    st.markdown(str(st.session_state.proposal_content)) 
\ No newline at end of file
+    show_markdown(str(st.session_state.proposal_content)) 
\ No newline at end of file
@@ -0,0 +1,100 @@
+from urllib.parse import urlparse
+from src.proposal_generator.components.browser_pool import BrowserPool, PooledDriver
+
+
+class FakeChrome:
+    """Just enough of a Chrome driver to keep per-domain cookies and per-tab session storage."""
+
+    def __init__(self):
+        self.cookies = {}
+        self.local_storage = {}
+        self.session_storage = {}
+        self.handles = ['tab-0']
+        self.current_window_handle = 'tab-0'
+        self.current_url = 'about:blank'
+        self.switch_to = self
+
+    def get(self, url):
+        self.current_url = url
+
+    def _domain(self):
+        return urlparse(self.current_url).hostname
+
+    def _origin(self):
+        parts = urlparse(self.current_url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def visit_and_store(self, url):
+        """Load a page that sets a cookie, local storage and session storage."""
+        self.get(url)
+        self.cookies.setdefault(self._domain(), {})['session'] = '1'
+        self.local_storage.setdefault(self._origin(), {})['key'] = '1'
+        self.session_storage.setdefault((self.current_window_handle, self._origin()), {})['key'] = '1'
+
+    def delete_all_cookies(self):
+        self.cookies.pop(self._domain(), None)
+
+    def execute_cdp_cmd(self, command, params):
+        if command == 'Network.getAllCookies':
+            return {'cookies': [
+                {'domain': domain, 'name': name} for domain, cookies in self.cookies.items() for name in cookies
+            ]}
+        if command == 'Network.clearBrowserCookies':
+            self.cookies.clear()
+        elif command == 'Storage.clearDataForOrigin':
+            self.local_storage.pop(params['origin'], None)
+        return {}
+
+    def execute_script(self, script):
+        return 1
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def new_window(self, kind):
+        handle = f'tab-{len(self.handles) + 1}'
+        self.handles.append(handle)
+        self.window(handle)
+
+    def window(self, handle):
+        self.current_window_handle = handle
+        self.current_url = 'about:blank'
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+
+    def set_window_size(self, width, height):
+        pass
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def get_log(self, name):
+        return []
+
+    def quit(self):
+        pass
+
+
+def _pool():
+    pool = BrowserPool(size=1)
+    pool._launch = lambda: PooledDriver(FakeChrome())
+    return pool
+
+
+def test_release_clears_state_of_every_site_visited():
+    pool = _pool()
+    with pool.driver() as driver:
+        driver.visit_and_store('https://first.example/')
+        driver.visit_and_store('https://second.example/page')
+        driver.get('https://first.example/other')
+        chrome = driver.driver
+
+    with pool.driver() as driver:
+        assert driver.driver is chrome
+        assert chrome.cookies == {}
+        assert chrome.local_storage == {}
+        assert not any(handle == driver.current_window_handle for handle, _ in chrome.session_storage)
+        assert chrome.window_handles == [driver.current_window_handle]
+        assert driver.origins == set()
@@ -0,0 +1,124 @@
+from contextlib import ExitStack
+from src.proposal_generator.components import concurrency
+from src.proposal_generator.components.concurrency import HostConcurrencyLimiter
+import asyncio
+import pytest
+
+URL = 'https://example.com/page'
+
+
+class FakeClock:
+    """Stands in for the ``time`` module so request latencies are exact."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(concurrency, 'time', fake)
+    return fake
+
+
+def _request(limiter, clock, status=200, latency=0.1):
+    with limiter.slot(URL) as slot:
+        clock.now += latency
+        slot.record(FakeResponse(status))
+
+
+def _state(limiter):
+    return limiter._hosts['example.com']
+
+
+def test_slow_start_grows_the_window_by_one_per_success(clock):
+    limiter = HostConcurrencyLimiter(initial_window=2, max_window=16)
+    for _ in range(4):
+        _request(limiter, clock)
+    assert _state(limiter).window == 6.0
+
+    for _ in range(20):
+        _request(limiter, clock)
+    assert _state(limiter).window == 16.0
+
+
+def test_growth_is_linear_above_the_threshold_set_by_a_backoff(clock):
+    limiter = HostConcurrencyLimiter(initial_window=8, max_window=16)
+    _request(limiter, clock, status=503)
+    state = _state(limiter)
+    assert (state.window, state.threshold, state.backoffs) == (4.0, 4.0, 1)
+
+    _request(limiter, clock)
+    assert state.window == pytest.approx(4.25)
+
+
+def test_window_is_halved_once_per_congestion_epoch(clock):
+    limiter = HostConcurrencyLimiter(initial_window=8, max_window=16)
+    with ExitStack() as stack:
+        slots = [stack.enter_context(limiter.slot(URL)) for _ in range(4)]
+        clock.now += 0.1
+        for slot in slots:
+            slot.record(FakeResponse(503))
+    # The four requests were in flight together, so they report one congestion event
+    state = _state(limiter)
+    assert (state.window, state.backoffs) == (4.0, 1)
+
+    # A request sent after the backoff starts a new epoch
+    clock.now += 0.1
+    _request(limiter, clock, status=429)
+    assert (state.window, state.backoffs) == (2.0, 2)
+
+
+def test_slow_responses_count_as_overload_and_the_window_never_drops_below_one(clock):
+    limiter = HostConcurrencyLimiter(initial_window=2, max_window=16)
+    _request(limiter, clock, latency=0.1)
+    assert _state(limiter).window == 3.0
+    _request(limiter, clock, latency=0.4)
+    assert _state(limiter).window == 4.0
+    _request(limiter, clock, latency=2.0)
+    assert _state(limiter).window == 2.0
+    for _ in range(3):
+        clock.now += 0.1
+        _request(limiter, clock, status=500)
+    assert _state(limiter).window == concurrency.MIN_WINDOW
+
+
+def test_errors_that_signal_overload_back_off(clock):
+    limiter = HostConcurrencyLimiter(initial_window=4, max_window=16)
+    with pytest.raises(TimeoutError):
+        with limiter.slot(URL):
+            raise TimeoutError()
+    assert _state(limiter).window == 2.0
+    assert _state(limiter).in_flight == 0
+
+
+def test_async_waiters_are_woken_when_a_slot_is_released():
+    limiter = HostConcurrencyLimiter(initial_window=1, max_window=1)
+
+    async def run():
+        order = []
+
+        async def second():
+            async with limiter.slot_async(URL):
+                order.append('second')
+
+        async with limiter.slot_async(URL):
+            waiting = asyncio.ensure_future(second())
+            await asyncio.sleep(0.01)
+            assert len(_state(limiter).async_waiters) == 1
+            assert not order
+            order.append('first')
+        await asyncio.wait_for(waiting, timeout=1)
+        return order
+
+    assert asyncio.run(run()) == ['first', 'second']
+    assert _state(limiter).async_waiters == []
+    assert _state(limiter).in_flight == 0
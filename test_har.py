@@ -0,0 +1,103 @@
+from src.proposal_generator.components.har import analyze_har, har_from_performance_log
+import json
+import pytest
+
+WALL_TIME = 1_700_000_000.0
+
+
+def _event(method, **params):
+    """One ``driver.get_log('performance')`` entry wrapping a DevTools event."""
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+def _sent(request_id, url, timestamp, resource_type, initiator=None, redirect_response=None):
+    params = {
+        'requestId': request_id,
+        'request': {'url': url, 'method': 'GET', 'headers': {}, 'initialPriority': 'High'},
+        'timestamp': timestamp,
+        'wallTime': WALL_TIME + timestamp,
+        'type': resource_type,
+        'initiator': initiator or {'type': 'other'}
+    }
+    if redirect_response:
+        params['redirectResponse'] = redirect_response
+    return _event('Network.requestWillBeSent', **params)
+
+
+def _response(request_id, url, timestamp, mime_type, headers, resource_type, length, encoded_length):
+    return [
+        _event('Network.responseReceived', requestId=request_id, timestamp=timestamp, type=resource_type,
+               response={'url': url, 'status': 200, 'statusText': 'OK', 'mimeType': mime_type,
+                         'headers': headers, 'protocol': 'http/1.1'}),
+        _event('Network.dataReceived', requestId=request_id, dataLength=length),
+        _event('Network.loadingFinished', requestId=request_id, timestamp=timestamp + 0.05,
+               encodedDataLength=encoded_length)
+    ]
+
+
+@pytest.fixture
+def performance_log():
+    """A redirected document, a script it loads and a third-party script that script loads."""
+    return [
+        _sent('1', 'http://example.com/', 0.0, 'Document'),
+        _sent('1', 'https://www.example.com/', 0.05, 'Document', redirect_response={
+            'url': 'http://example.com/', 'status': 301, 'statusText': 'Moved Permanently',
+            'headers': {'Location': 'https://www.example.com/'}, 'mimeType': '', 'encodedDataLength': 200
+        }),
+        *_response('1', 'https://www.example.com/', 0.25, 'text/html',
+                   {'Content-Type': 'text/html', 'Content-Encoding': 'br'}, 'Document', 5000, 5200),
+        _sent('2', 'https://www.example.com/app.js', 0.35, 'Script',
+              initiator={'type': 'parser', 'url': 'https://www.example.com/'}),
+        *_response('2', 'https://www.example.com/app.js', 0.55, 'application/javascript',
+                   {'Cache-Control': 'max-age=60'}, 'Script', 4000, 4100),
+        _sent('3', 'https://cdn.tracker.net/t.js', 0.65, 'Script', initiator={
+            'type': 'script', 'stack': {'callFrames': [{'url': 'https://www.example.com/app.js'}]}
+        }),
+        *_response('3', 'https://cdn.tracker.net/t.js', 0.85, 'application/javascript',
+                   {'Content-Encoding': 'gzip', 'Cache-Control': 'public, max-age=31536000'}, 'Script', 2000, 900),
+        # Events of requests from before the log was read are ignored
+        _event('Network.dataReceived', requestId='unknown', dataLength=10),
+    ]
+
+
+def test_har_entries_follow_redirects_and_initiators(performance_log):
+    har = har_from_performance_log(performance_log, 'http://example.com/', title='Example')
+    entries = har['log']['entries']
+    assert [entry['request']['url'] for entry in entries] == [
+        'http://example.com/', 'https://www.example.com/',
+        'https://www.example.com/app.js', 'https://cdn.tracker.net/t.js'
+    ]
+    redirect, document, script, third_party = entries
+    assert redirect['response']['status'] == 301
+    assert redirect['response']['redirectURL'] == 'https://www.example.com/'
+    assert redirect['response']['_transferSize'] == 200
+    assert document['response']['redirectURL'] == ''
+    assert document['response']['content'] == {'size': 5000, 'mimeType': 'text/html'}
+    assert script['_resourceType'] == 'script'
+    assert script['_initiator'] == 'https://www.example.com/'
+    assert third_party['_initiator'] == 'https://www.example.com/app.js'
+    assert third_party['time'] == pytest.approx(250)
+    assert har['log']['pages'][0]['title'] == 'Example'
+
+
+def test_analyze_har_reports_the_costs_of_the_page_load(performance_log):
+    analysis = analyze_har(har_from_performance_log(performance_log, 'http://example.com/'))
+    assert analysis['requests'] == 4
+    assert analysis['total_bytes'] == 200 + 5200 + 4100 + 900
+
+    critical_path = analysis['critical_path']
+    assert critical_path['requests'] == [
+        'https://www.example.com/', 'https://www.example.com/app.js', 'https://cdn.tracker.net/t.js'
+    ]
+    assert critical_path['depth'] == 3
+    assert critical_path['length_ms'] == pytest.approx(850, abs=0.2)
+
+    assert analysis['uncompressed'] == [{'url': 'https://www.example.com/app.js', 'bytes': 4000}]
+    assert analysis['cache_issues'] == [
+        {'url': 'https://www.example.com/app.js', 'reason': 'max-age=60 is under a day'}
+    ]
+    third_party = analysis['third_party']
+    assert third_party['requests'] == 1
+    assert third_party['bytes'] == 900
+    assert third_party['share_of_bytes'] == round(900 / 10400, 3)
+    assert list(third_party['hosts']) == ['cdn.tracker.net']
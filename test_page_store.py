@@ -0,0 +1,58 @@
+from datetime import timedelta
+from requests.structures import CaseInsensitiveDict
+from src.proposal_generator.components import async_http
+from src.proposal_generator.components.page_store import PageStore
+import asyncio
+
+URL = 'https://example.com/'
+
+
+def _install_slow_fetch(monkeypatch, calls):
+    """Replace the network fetch with one that takes a moment and counts calls."""
+    async def fetch(session, url, timeout=10):
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return async_http.AsyncResponse(url, 200, CaseInsensitiveDict(), b'<html></html>', timedelta(seconds=0.05))
+    monkeypatch.setattr(async_http, 'fetch', fetch)
+
+
+def test_cancelled_waiter_does_not_fail_other_waiters(monkeypatch):
+    calls = []
+    _install_slow_fetch(monkeypatch, calls)
+    store = PageStore()
+
+    async def run():
+        fetcher = asyncio.create_task(store.get_async(URL, None))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(store.get_async(URL, None))
+        waiter = asyncio.create_task(store.get_async(URL, None))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        pages = await asyncio.gather(fetcher, waiter)
+        assert cancelled.cancelled()
+        return pages
+
+    pages = asyncio.run(run())
+    assert [page.content for page in pages] == [b'<html></html>'] * 2
+    assert calls == [URL]
+
+
+def test_cancelled_fetch_is_retried_by_the_next_caller(monkeypatch):
+    calls = []
+    _install_slow_fetch(monkeypatch, calls)
+    store = PageStore()
+
+    async def run():
+        fetcher = asyncio.create_task(store.get_async(URL, None))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(store.get_async(URL, None))
+        await asyncio.sleep(0.01)
+        fetcher.cancel()
+        page = await waiter
+        assert fetcher.cancelled()
+        return page, await store.get_async(URL, None)
+
+    page, later = asyncio.run(run())
+    assert page.content == b'<html></html>'
+    assert later is page
+    assert calls == [URL, URL]
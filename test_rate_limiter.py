@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from requests.structures import CaseInsensitiveDict
+from src.proposal_generator.components import rate_limiter
+from src.proposal_generator.components.rate_limiter import HostRateLimiter, parse_retry_after
+import pytest
+
+
+class FakeClock:
+    """Stands in for the ``time`` module so buckets refill only when the test says so."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict({'Retry-After': retry_after} if retry_after is not None else {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', fake)
+    return fake
+
+
+def _waits(limiter, url, count):
+    return [limiter._reserve(url)[1] for _ in range(count)]
+
+
+def test_burst_then_requests_are_spaced_at_the_rate(clock):
+    limiter = HostRateLimiter(requests_per_second=0.5, burst=2, host_limits={})
+    assert _waits(limiter, 'https://example.com/a', 3) == [0.0, 0.0, 2.0]
+
+
+def test_queued_callers_wait_in_turn_until_tokens_refill(clock):
+    limiter = HostRateLimiter(requests_per_second=0.5, burst=2, host_limits={})
+    # Tokens go negative, so each queued caller waits one interval longer
+    assert _waits(limiter, 'https://example.com/', 5) == [0.0, 0.0, 2.0, 4.0, 6.0]
+    clock.now += 6.0
+    assert _waits(limiter, 'https://example.com/', 1) == [2.0]
+    clock.now += 100.0
+    # A long idle period refills only up to the burst
+    assert _waits(limiter, 'https://example.com/', 3) == [0.0, 0.0, 2.0]
+
+
+def test_hosts_have_separate_buckets_and_subdomains_share_their_domain(clock):
+    limiter = HostRateLimiter(requests_per_second=0.5, burst=1, host_limits={'directory.com': (0.25, 1)})
+    assert _waits(limiter, 'https://www.example.com/', 2) == [0.0, 2.0]
+    assert _waits(limiter, 'https://other.org/', 1) == [0.0]
+    assert limiter._reserve('https://lawyers.directory.com/a')[1] == 0.0
+    assert limiter._reserve('https://directory.com/b') == ('directory.com', 4.0)
+
+
+def test_retry_after_in_seconds_pauses_the_host(clock):
+    limiter = HostRateLimiter(requests_per_second=1, burst=5, host_limits={})
+    limiter.observe('https://example.com/x', FakeResponse(503, '12'))
+    assert limiter._reserve('https://example.com/y')[1] == 12.0
+    assert limiter._reserve('https://other.org/')[1] == 0.0
+    clock.now += 12.0
+    assert limiter._reserve('https://example.com/z')[1] == 0.0
+
+
+def test_retry_after_as_http_date_pauses_the_host(clock):
+    limiter = HostRateLimiter(requests_per_second=1, burst=5, host_limits={})
+    when = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    limiter.observe('https://example.com/x', FakeResponse(429, when))
+    assert 115 <= limiter._reserve('https://example.com/y')[1] <= 120
+
+
+def test_bare_429_backs_off_and_other_statuses_do_not(clock):
+    limiter = HostRateLimiter(requests_per_second=1, burst=5, host_limits={})
+    limiter.observe('https://example.com/', FakeResponse(503))
+    limiter.observe('https://example.com/', FakeResponse(200, '60'))
+    assert limiter._reserve('https://example.com/')[1] == 0.0
+    limiter.observe('https://example.com/', FakeResponse(429))
+    assert limiter._reserve('https://example.com/')[1] == rate_limiter.DEFAULT_BACKOFF == 30.0
+
+
+def test_retry_after_is_capped():
+    limiter = HostRateLimiter(host_limits={})
+    limiter.observe('https://example.com/', FakeResponse(429, '86400'))
+    _, bucket = limiter._bucket('example.com')
+    assert bucket.blocked_until - rate_limiter.time.monotonic() <= rate_limiter.MAX_RETRY_AFTER
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('30') == 30.0
+    assert parse_retry_after(' 1.5 ') == 1.5
+    assert parse_retry_after('-4') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
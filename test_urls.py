@@ -0,0 +1,48 @@
+from src.proposal_generator.components.urls import canonicalize_url, canonical_link, resolve_url
+from bs4 import BeautifulSoup
+
+
+def test_documented_aliases_share_one_canonical_form():
+    base = 'HTTP://Example.com:80/'
+    for link in ['/about', '/about/', '/about/?utm_source=x', '/about#team', '/about//']:
+        assert canonicalize_url(link, base=base) == 'http://example.com/about'
+
+
+def test_paths_keep_their_case():
+    assert canonicalize_url('http://example.com/About/') == 'http://example.com/About'
+
+
+def test_default_ports_are_dropped_and_others_kept():
+    assert canonicalize_url('https://example.com:443/x') == 'https://example.com/x'
+    assert canonicalize_url('http://example.com:8080/x') == 'http://example.com:8080/x'
+    assert canonicalize_url('https://example.com:80/x') == 'https://example.com:80/x'
+
+
+def test_ipv6_hosts_keep_their_brackets():
+    assert canonicalize_url('http://[::1]:8080/x/') == 'http://[::1]:8080/x'
+    assert canonicalize_url('http://[2001:DB8::1]:80/') == 'http://[2001:db8::1]/'
+
+
+def test_tracking_parameters_are_stripped():
+    url = 'https://example.com/p?utm_source=a&id=3&fbclid=b&%75tm_medium=c&gclid=d'
+    assert canonicalize_url(url) == 'https://example.com/p?id=3'
+    assert canonicalize_url('https://example.com/?utm_campaign=x') == 'https://example.com/'
+
+
+def test_query_parameters_are_sorted_with_their_encoding_kept():
+    assert canonicalize_url('https://example.com/p?b=2&a=1') == canonicalize_url('https://example.com/p?a=1&b=2')
+    assert canonicalize_url('https://example.com/p?print') == 'https://example.com/p?print'
+    assert canonicalize_url('https://example.com/p?q=a%20b&b=1;c=2') == 'https://example.com/p?b=1;c=2&q=a%20b'
+
+
+def test_resolve_url_keeps_the_link_as_written():
+    assert resolve_url('About/?utm_source=x#team', base='https://example.com/en/') == \
+        'https://example.com/en/About/?utm_source=x'
+
+
+def test_canonical_link_ignores_other_hosts():
+    page = 'https://example.com/about/?utm_source=x'
+    same_host = BeautifulSoup('<link rel="canonical" href="/company">', 'html.parser')
+    other_host = BeautifulSoup('<link rel="canonical" href="https://mirror.example.org/about">', 'html.parser')
+    assert canonical_link(same_host, page) == 'https://example.com/company'
+    assert canonical_link(other_host, page) == 'https://example.com/about'
@@ -0,0 +1,35 @@
+from src.proposal_generator.components.visited_set import VisitedSet
+
+
+def test_bloom_miss_skips_the_exact_record_and_a_hit_consults_it():
+    visited = VisitedSet()
+    assert visited.add('https://example.com/a')
+    assert 'https://example.com/b' not in visited
+    assert visited.exact_lookups == 0
+
+    assert 'https://example.com/a' in visited
+    assert visited.exact_lookups == 1
+    assert not visited.add('https://example.com/a')
+    assert len(visited) == 1
+
+
+def test_exact_record_spills_to_disk_past_the_memory_limit():
+    visited = VisitedSet(max_exact_in_memory=3)
+    urls = [f'https://example.com/page/{number}' for number in range(7)]
+    assert all(visited.add(url) for url in urls)
+    assert visited._db is not None
+    assert len(visited._exact) < 3
+
+    assert all(url in visited for url in urls)
+    assert not any(visited.add(url) for url in urls)
+    assert 'https://example.com/page/7' not in visited
+    assert len(visited) == 7
+    visited.close()
+
+
+def test_a_larger_filter_is_added_when_one_fills_up():
+    visited = VisitedSet(capacity=2)
+    for number in range(5):
+        visited.add(f'https://example.com/{number}')
+    assert [bloom.capacity for bloom in visited._filters] == [2, 4]
+    assert all(f'https://example.com/{number}' in visited for number in range(5))